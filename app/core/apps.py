@@ -37,3 +37,5 @@ class CoreConfig(AppConfig):
     def ready(self):
         # Ensure groups/permissions applied after migrations
         post_migrate.connect(_setup_role_groups, sender=self, dispatch_uid='core_setup_role_groups')
+        # Registers the Company save/delete handlers that drop cached tenant profiles.
+        from . import tenant_context  # noqa: F401
@@ -0,0 +1,213 @@
+"""Find missing and unused indexes on tenant tables.
+
+Every query through ``TenantManager`` filters on ``tenant_id``, so each
+``TenantAwareModel`` table needs at least one index led by it.
+:func:`tables_without_tenant_index` checks that against the live schema.
+:func:`analyze_statements` runs ``EXPLAIN`` (never ``ANALYZE``) on the
+statements of a query log and reports sequential scans of tenant tables, as
+well as the indexes of the scanned tables that no plan used.
+"""
+
+import json
+import re
+from collections import Counter
+
+from django.apps import apps
+from django.db import DatabaseError, connection, transaction
+
+from .models import TenantAwareModel
+
+TENANT_COLUMN = 'tenant_id'
+EXPLAINABLE = ('select', 'update', 'delete', 'with')
+
+# Django's django.db.backends debug log: "(0.002) SELECT ...; args=(...); alias=default"
+_DJANGO_LOG = re.compile(r'^\(\d+(?:\.\d+)?\)\s+(?P<sql>.*?);\s+args=')
+# PostgreSQL log_statement / log_min_duration_statement lines.
+_POSTGRES_LOG = re.compile(r'(?:statement|execute [^:]*):\s+(?P<sql>.*)$')
+_SQLITE_PLAN = re.compile(r'^(?:SCAN|SEARCH) (?:TABLE )?(?P<table>\S+)(?: AS \S+)?(?: USING (?:COVERING )?INDEX (?P<index>\S+))?')
+_CONDITION = r'"{table}"\."(?P<column>\w+)"\s*(?:=|<|>|<=|>=|!=|<>|IN\b|LIKE\b|IS\b|BETWEEN\b)'
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|\$\d+")
+
+
+def tenant_tables():
+    """Map db table -> model for every concrete TenantAwareModel."""
+
+    return {
+        model._meta.db_table: model
+        for model in apps.get_models()
+        if issubclass(model, TenantAwareModel) and not model._meta.proxy
+    }
+
+
+def table_indexes(table):
+    """Return ``{name: (columns, unique)}`` for the non-primary-key indexes of ``table``."""
+
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return {
+        name: (info['columns'], info['unique'])
+        for name, info in constraints.items()
+        if (info['index'] or info['unique']) and not info['primary_key'] and info['columns']
+    }
+
+
+def tables_without_tenant_index():
+    """Tenant tables that have no index (or unique constraint) whose first column is tenant_id."""
+
+    missing = []
+    for table in sorted(tenant_tables()):
+        if not any(columns[0] == TENANT_COLUMN for columns, _ in table_indexes(table).values()):
+            missing.append(table)
+    return missing
+
+
+def parse_log(lines):
+    """Yield the SQL statements found in Django debug, PostgreSQL or plain one-statement-per-line logs."""
+
+    for line in lines:
+        line = line.strip()
+        match = _DJANGO_LOG.match(line) or _POSTGRES_LOG.search(line)
+        sql = match.group('sql') if match else line
+        sql = sql.strip().rstrip(';')
+        first_word = sql.split(None, 1)[0].lower() if sql else ''
+        if first_word in EXPLAINABLE:
+            yield sql
+
+
+def normalize(sql):
+    """Collapse literals and placeholders so repeated queries group together."""
+
+    return re.sub(r'\s+', ' ', _LITERAL.sub('?', sql)).strip()
+
+
+def _explain(sql):
+    """Return ``[(table, index_name_or_None), ...]`` for the relation scans of ``sql``'s plan."""
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            scans = []
+            for row in cursor.fetchall():
+                match = _SQLITE_PLAN.match(row[-1])
+                if match:
+                    scans.append((match.group('table'), match.group('index')))
+            return scans
+        if connection.vendor == 'postgresql':
+            options = 'GENERIC_PLAN, FORMAT JSON' if re.search(r'\$\d', sql) else 'FORMAT JSON'
+            cursor.execute(f'EXPLAIN ({options}) {sql}')
+            plan = cursor.fetchone()[0]
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            scans = []
+            _walk_postgres_plan(plan[0]['Plan'], scans)
+            return scans
+    raise DatabaseError(f'EXPLAIN is not supported on {connection.vendor}')
+
+
+def _walk_postgres_plan(node, scans):
+    if node.get('Node Type') == 'Seq Scan':
+        scans.append((node.get('Relation Name'), None))
+    elif node.get('Index Name'):
+        scans.append((node.get('Relation Name'), node['Index Name']))
+    for child in node.get('Plans', ()):
+        _walk_postgres_plan(child, scans)
+
+
+def _filtered_columns(sql, table):
+    columns = []
+    for match in re.finditer(_CONDITION.format(table=re.escape(table)), sql):
+        if match.group('column') not in columns:
+            columns.append(match.group('column'))
+    return columns
+
+
+def suggest_index(sql, table):
+    """Columns for an index serving ``sql``'s filters on ``table``, tenant_id first."""
+
+    columns = [column for column in _filtered_columns(sql, table) if column != TENANT_COLUMN]
+    return [TENANT_COLUMN] + columns
+
+
+def analyze_statements(statements):
+    """EXPLAIN each distinct statement once and summarize the plans.
+
+    Returns a dict with ``statements`` (distinct count), ``skipped`` (statements
+    that could not be explained), ``missing`` (one entry per sequentially
+    scanned tenant table and filter shape: table, calls, suggested columns,
+    sample SQL) and ``unused`` (table, index, columns for non-unique indexes of
+    tenant tables the log touched that no plan used).
+    """
+
+    tables = tenant_tables()
+    calls = Counter()
+    samples = {}
+    for sql in statements:
+        key = normalize(sql)
+        calls[key] += 1
+        samples.setdefault(key, sql)
+
+    used = set()
+    touched = set()
+    missing = {}
+    skipped = 0
+    for key, sql in samples.items():
+        try:
+            scans = _explain(sql)
+        except DatabaseError:
+            skipped += 1
+            continue
+        for table, index in scans:
+            if table not in tables:
+                continue
+            touched.add(table)
+            if index:
+                used.add((table, index))
+                continue
+            suggestion = tuple(suggest_index(sql, table))
+            entry = missing.setdefault((table, suggestion), {
+                'table': table, 'columns': list(suggestion), 'calls': 0, 'sample': sql,
+            })
+            entry['calls'] += calls[key]
+
+    unused = []
+    for table in sorted(touched):
+        for name, (columns, unique) in sorted(table_indexes(table).items()):
+            if not unique and (table, name) not in used:
+                unused.append({'table': table, 'index': name, 'columns': columns})
+
+    return {
+        'statements': len(samples),
+        'skipped': skipped,
+        'missing': sorted(missing.values(), key=lambda entry: -entry['calls']),
+        'unused': unused,
+    }
+
+
+def postgres_index_stats():
+    """Cumulative PostgreSQL statistics for tenant tables: never-scanned indexes and seq-scan-heavy tables."""
+
+    tables = list(tenant_tables())
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT s.relname, s.indexrelname, s.idx_scan
+            FROM pg_stat_user_indexes s JOIN pg_index i ON i.indexrelid = s.indexrelid
+            WHERE s.relname = ANY(%s) AND s.idx_scan = 0 AND NOT i.indisunique
+            ORDER BY s.relname, s.indexrelname
+            """,
+            [tables],
+        )
+        unused = [{'table': table, 'index': index} for table, index, _ in cursor.fetchall()]
+        cursor.execute(
+            """
+            SELECT relname, seq_scan, coalesce(idx_scan, 0), n_live_tup
+            FROM pg_stat_user_tables
+            WHERE relname = ANY(%s) AND seq_scan > coalesce(idx_scan, 0)
+            ORDER BY seq_scan DESC
+            """,
+            [tables],
+        )
+        scanned = [
+            {'table': table, 'seq_scan': seq_scan, 'idx_scan': idx_scan, 'rows': rows}
+            for table, seq_scan, idx_scan, rows in cursor.fetchall()
+        ]
+    return {'unused': unused, 'seq_scanned': scanned}
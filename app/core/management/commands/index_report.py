@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from app.core import index_report
+
+
+class Command(BaseCommand):
+    help = (
+        'Report tenant tables without a tenant_id-led index and, from a query log, the statements '
+        'that scan tenant tables sequentially and the indexes no logged statement used. Accepts '
+        "Django's django.db.backends debug log, PostgreSQL statement logs (log_min_duration_statement) "
+        'or one SQL statement per line. Statements are only EXPLAINed, never executed.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', action='append', default=[], help='Query log file (repeatable).')
+        parser.add_argument('--min-calls', type=int, default=1,
+                            help='Only report sequential scans seen at least this many times.')
+        parser.add_argument('--db-stats', action='store_true',
+                            help="Also read PostgreSQL's cumulative index and table scan statistics.")
+
+    def handle(self, *args, **options):
+        missing_tables = index_report.tables_without_tenant_index()
+        self.stdout.write(f'Tenant tables without a tenant_id-led index: {len(missing_tables)}')
+        for table in missing_tables:
+            self.stdout.write(f'  {table}')
+
+        if options['log']:
+            statements = []
+            for path in options['log']:
+                try:
+                    with open(path, encoding='utf-8', errors='replace') as log:
+                        statements.extend(index_report.parse_log(log))
+                except OSError as exc:
+                    raise CommandError(f'Cannot read {path}: {exc}')
+            report = index_report.analyze_statements(statements)
+            missing = [entry for entry in report['missing'] if entry['calls'] >= options['min_calls']]
+
+            self.stdout.write(
+                f"\nExplained {report['statements'] - report['skipped']} of {report['statements']} distinct statements."
+            )
+            self.stdout.write(f'Sequential scans of tenant tables: {len(missing)}')
+            for entry in missing:
+                self.stdout.write(
+                    f"  {entry['table']} x{entry['calls']}: suggest index ({', '.join(entry['columns'])})\n"
+                    f"    {entry['sample'][:300]}"
+                )
+            self.stdout.write(f"Indexes unused by the logged statements: {len(report['unused'])}")
+            for entry in report['unused']:
+                self.stdout.write(f"  {entry['table']}.{entry['index']} ({', '.join(entry['columns'])})")
+
+        if options['db_stats']:
+            if connection.vendor != 'postgresql':
+                raise CommandError('--db-stats needs PostgreSQL.')
+            stats = index_report.postgres_index_stats()
+            self.stdout.write(f"\nIndexes never scanned since the statistics were reset: {len(stats['unused'])}")
+            for entry in stats['unused']:
+                self.stdout.write(f"  {entry['table']}.{entry['index']}")
+            self.stdout.write(f"Tables scanned sequentially more often than by index: {len(stats['seq_scanned'])}")
+            for entry in stats['seq_scanned']:
+                self.stdout.write(
+                    f"  {entry['table']}: {entry['seq_scan']} seq / {entry['idx_scan']} index scans, ~{entry['rows']} rows"
+                )
@@ -0,0 +1,106 @@
+"""Per-tenant company profile, resolved once per request and cached per process.
+
+``get_tenant_context()`` returns a read-only :class:`TenantContext` for the
+current tenant (or a given one). Within a request the same object is reused;
+across requests it comes from a process-level cache that is dropped for a
+company whenever it is saved or deleted, and otherwise expires after
+``TENANT_CONTEXT_CACHE_TTL`` seconds so other worker processes pick up
+changes made elsewhere.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Company
+from .tenant_middleware import _thread_locals, get_current_tenant
+
+DEFAULT_TTL = 300
+
+_cache = {}
+_lock = threading.Lock()
+
+
+class TenantContext:
+    """What the app needs to know about a tenant's company without querying it."""
+
+    __slots__ = ('tenant_id', 'name', 'company_type')
+
+    def __init__(self, tenant_id, name=None, company_type=None):
+        self.tenant_id = tenant_id
+        self.name = name
+        self.company_type = company_type
+
+    @property
+    def exists(self):
+        return self.company_type is not None
+
+    @property
+    def is_wholesale(self):
+        return self.company_type == 'wholesale'
+
+    @property
+    def is_retail(self):
+        return self.company_type == 'retail'
+
+    def __repr__(self):
+        return f"<TenantContext {self.tenant_id} {self.company_type}>"
+
+
+def _load(tenant_id):
+    row = Company.objects.filter(id=tenant_id).values_list('name', 'company_type').first()
+    return TenantContext(tenant_id, *row) if row else TenantContext(tenant_id)
+
+
+def _cached(tenant_id):
+    ttl = getattr(settings, 'TENANT_CONTEXT_CACHE_TTL', DEFAULT_TTL)
+    now = time.monotonic()
+    with _lock:
+        entry = _cache.get(tenant_id)
+    if entry and entry[0] > now:
+        return entry[1]
+    context = _load(tenant_id)
+    with _lock:
+        _cache[tenant_id] = (now + ttl, context)
+    return context
+
+
+def get_tenant_context(tenant_id=None):
+    """Return the TenantContext for ``tenant_id`` (default: the current tenant)."""
+
+    if tenant_id is None:
+        tenant_id = get_current_tenant()
+    if tenant_id is None:
+        return TenantContext(None)
+    context = getattr(_thread_locals, 'tenant_context', None)
+    if context is not None and context.tenant_id == tenant_id:
+        return context
+    context = _cached(tenant_id)
+    if tenant_id == get_current_tenant():
+        _thread_locals.tenant_context = context
+    return context
+
+
+def invalidate(tenant_id=None):
+    """Forget the cached profile of one tenant, or of every tenant."""
+
+    with _lock:
+        if tenant_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(tenant_id, None)
+    context = getattr(_thread_locals, 'tenant_context', None)
+    if context is not None and (tenant_id is None or context.tenant_id == tenant_id):
+        _thread_locals.tenant_context = None
+
+
+@receiver(post_save, sender=Company, dispatch_uid='core_company_saved')
+@receiver(post_delete, sender=Company, dispatch_uid='core_company_deleted')
+def _company_changed(sender, instance, **kwargs):
+    invalidate(instance.pk)
+    # Another request may re-cache the old row before this transaction commits.
+    transaction.on_commit(lambda: invalidate(instance.pk))
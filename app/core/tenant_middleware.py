@@ -1,5 +1,7 @@
 from threading import local
 
+from django.utils.functional import SimpleLazyObject
+
 # Thread-local storage to store tenant_id for each request
 _thread_locals = local()
 
@@ -16,33 +18,20 @@ def set_current_tenant(tenant_id):
     but the tenant is known from a signed token.
     """
     _thread_locals.tenant_id = tenant_id
+    # The company profile resolved for the previous tenant no longer applies.
+    _thread_locals.tenant_context = None
 
 
-def set_current_tenant(tenant_id):
-    """
-    Sets the tenant_id for the current request thread.
-    Useful for public flows (e.g., QR links) where the user is not authenticated
-    but the tenant is known from a signed token.
-    """
-    _thread_locals.tenant_id = tenant_id
-
-
-def set_current_tenant(tenant_id):
-    """
-    Sets the tenant_id for the current request thread.
-    Useful for public flows (e.g., QR links) where the user is not authenticated
-    but the tenant is known from a signed token.
-    """
-    _thread_locals.tenant_id = tenant_id
-
-
-def set_current_tenant(tenant_id):
-    """
-    Sets the tenant_id for the current request thread.
-    Useful for public flows (e.g., QR links) where the user is not authenticated
-    but the tenant is known from a signed token.
-    """
-    _thread_locals.tenant_id = tenant_id
+def _user_tenant(user):
+    # Prefer employee_profile.tenant_id
+    profile = getattr(user, 'employee_profile', None)
+    if profile and hasattr(profile, 'tenant_id'):
+        return profile.tenant_id
+    if hasattr(user, 'tenant_id'):
+        return user.tenant_id
+    if hasattr(user, 'profile') and hasattr(user.profile, 'tenant_id'):
+        return user.profile.tenant_id
+    return None
 
 
 class TenantMiddleware:
@@ -56,18 +45,19 @@ class TenantMiddleware:
     def __call__(self, request):
         tenant_id = None
 
-        # Example: if user is logged in and has tenant info
         if request.user.is_authenticated:
-            # Prefer employee_profile.tenant_id
-            profile = getattr(request.user, 'employee_profile', None)
-            if profile and hasattr(profile, 'tenant_id'):
-                tenant_id = profile.tenant_id
-            elif hasattr(request.user, 'tenant_id'):
-                tenant_id = request.user.tenant_id
-            elif hasattr(request.user, 'profile') and hasattr(request.user.profile, 'tenant_id'):
-                tenant_id = request.user.profile.tenant_id
-
-        # Store in thread-local
-        _thread_locals.tenant_id = tenant_id
+            # Resolved on every request (one indexed lookup of the profile, which stays
+            # cached on the user for the view), so a profile that is deleted or moved to
+            # another company takes effect immediately.
+            tenant_id = _user_tenant(request.user)
+
+        set_current_tenant(tenant_id)
+        # Company profile (type, name) for views and templates, loaded on first use.
+        request.tenant = SimpleLazyObject(lambda: _tenant_context(tenant_id))
 
         return self.get_response(request)
+
+
+def _tenant_context(tenant_id):
+    from .tenant_context import get_tenant_context
+    return get_tenant_context(tenant_id)
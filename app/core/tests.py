@@ -0,0 +1,147 @@
+import tempfile
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from app.core import index_report, tenant_context
+from app.core.models import Company
+from app.core.tenant_context import get_tenant_context
+from app.core.tenant_middleware import TenantMiddleware, get_current_tenant, set_current_tenant
+from app.employee.models import EmployeeProfile
+from app.inventory.models import Inventory, Product
+from app.point_of_sale.models import OrderItem, SalesOrder
+
+
+class TenantContextTests(TestCase):
+    def setUp(self):
+        tenant_context.invalidate()
+        self.addCleanup(tenant_context.invalidate)
+        self.addCleanup(set_current_tenant, None)
+        self.company = Company.objects.create(id=1201, name='Corner Shop', company_type='retail')
+
+    def test_profile_is_cached_across_requests_until_the_company_is_saved(self):
+        self.assertTrue(get_tenant_context(1201).is_retail)
+        set_current_tenant(1201)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_tenant_context().name, 'Corner Shop')
+
+        self.company.company_type = 'wholesale'
+        self.company.save()
+        context = get_tenant_context(1201)
+        self.assertTrue(context.is_wholesale)
+
+        self.company.delete()
+        self.assertFalse(get_tenant_context(1201).exists)
+
+    def test_unknown_tenant_is_neither_retail_nor_wholesale(self):
+        context = get_tenant_context(99999)
+        self.assertEqual((context.exists, context.is_retail, context.is_wholesale), (False, False, False))
+        self.assertIsNone(get_tenant_context().tenant_id)
+
+    def test_finalize_reads_company_type_from_the_cache(self):
+        set_current_tenant(1201)
+        product = Product.objects.create(name='Nail', cost=Decimal('1.00'), price=Decimal('2.00'), model='N')
+        Inventory.objects.create(product=product, location='Main', quantity=5)
+        order = SalesOrder.objects.create()
+        OrderItem.objects.create(sales_order=order, product=product, quantity=2, price=Decimal('2.00'))
+        get_tenant_context(1201)
+
+        with CaptureQueriesContext(connection) as ctx:
+            order.finalize_order()
+
+        self.assertEqual(order.status, 'completed')
+        self.assertFalse([q for q in ctx.captured_queries if Company._meta.db_table in q['sql']])
+
+
+class TenantMiddlewareTests(TestCase):
+    def setUp(self):
+        tenant_context.invalidate()
+        self.addCleanup(tenant_context.invalidate)
+        self.addCleanup(set_current_tenant, None)
+        Company.objects.create(id=1202, name='Depot', company_type='wholesale')
+        self.user = User.objects.create_user(username='clerk', password='pass123')
+        EmployeeProfile.objects.create(user=self.user, role='salesman', tenant_id=1202)
+        self.seen = []
+        self.middleware = TenantMiddleware(lambda request: self.seen.append((get_current_tenant(), request.tenant)))
+
+    def _request(self):
+        request = RequestFactory().get('/')
+        request.user = User.objects.get(pk=self.user.pk)
+        request.session = {}
+        return request
+
+    def test_tenant_and_profile_are_resolved_with_one_query(self):
+        request = self._request()
+        with self.assertNumQueries(1):
+            self.middleware(request)
+            self.assertEqual(request.user.employee_profile.role, 'salesman')
+        tenant_id, context = self.seen[-1]
+        self.assertEqual(tenant_id, 1202)
+        self.assertTrue(context.is_wholesale)
+
+    def test_moved_or_deleted_profile_takes_effect_on_the_next_request(self):
+        self.middleware(self._request())
+        EmployeeProfile.objects.filter(user=self.user).update(tenant_id=4242)
+        self.middleware(self._request())
+        self.assertEqual(self.seen[-1][0], 4242)
+
+        EmployeeProfile._base_manager.filter(user=self.user).delete()
+        self.middleware(self._request())
+        self.assertIsNone(self.seen[-1][0])
+
+
+class IndexReportTests(TestCase):
+    LOG = [
+        '(0.001) SELECT "product"."id" FROM "product" WHERE "product"."tenant_id" = 5 '
+        'ORDER BY "product"."name" ASC LIMIT 24; args=(5,); alias=default',
+        '(0.001) SELECT "product"."id" FROM "product" WHERE "product"."tenant_id" = 7 '
+        'ORDER BY "product"."name" ASC LIMIT 24; args=(7,); alias=default',
+        'LOG:  duration: 12.3 ms  statement: SELECT "customers_customer"."id" FROM "customers_customer" '
+        'WHERE "customers_customer"."city" = \'Pune\'',
+        'LOG:  duration: 9.1 ms  statement: SELECT "customers_customer"."id" FROM "customers_customer" '
+        'WHERE "customers_customer"."city" = \'Goa\'',
+        'SELECT * FROM no_such_table',
+        'BEGIN',
+    ]
+
+    def test_every_tenant_table_has_a_tenant_led_index(self):
+        self.assertEqual(index_report.tables_without_tenant_index(), [])
+
+    def test_log_statements_are_parsed_and_grouped(self):
+        statements = list(index_report.parse_log(self.LOG))
+
+        self.assertEqual(len(statements), 5)
+        self.assertTrue(statements[2].startswith('SELECT "customers_customer"."id"'))
+        self.assertEqual(index_report.normalize(statements[0]), index_report.normalize(statements[1]))
+
+    def test_sequential_scans_and_unused_indexes_are_reported(self):
+        report = index_report.analyze_statements(index_report.parse_log(self.LOG))
+
+        self.assertEqual((report['statements'], report['skipped']), (3, 1))
+        self.assertEqual(report['missing'], [{
+            'table': 'customers_customer', 'columns': ['tenant_id', 'city'], 'calls': 2,
+            'sample': self.LOG[2].split('statement: ')[1],
+        }])
+        unused = {(entry['table'], tuple(entry['columns'])) for entry in report['unused']}
+        self.assertIn(('product', ('tenant_id', 'barcode')), unused)
+        self.assertIn(('customers_customer', ('tenant_id', 'name')), unused)
+        self.assertNotIn(('product', ('tenant_id', 'name')), unused)
+
+    def test_command_prints_the_report(self):
+        log = tempfile.NamedTemporaryFile('w', suffix='.log')
+        self.addCleanup(log.close)
+        log.write('\n'.join(self.LOG))
+        log.flush()
+        out = StringIO()
+
+        call_command('index_report', log=[log.name], min_calls=2, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('Tenant tables without a tenant_id-led index: 0', output)
+        self.assertIn('customers_customer x2: suggest index (tenant_id, city)', output)
+        self.assertIn('Indexes unused by the logged statements:', output)
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_customer_device'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['tenant_id', 'name'], name='customers_c_tenant__5b0286_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customerfinancialsnapshot',
+            index=models.Index(fields=['tenant_id', 'customer'], name='customers_c_tenant__ab7334_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customerledger',
+            index=models.Index(fields=['tenant_id', 'customer', '-date'], name='customers_c_tenant__8e9e28_idx'),
+        ),
+    ]
@@ -19,6 +19,11 @@ class Customer(TenantAwareModel):
     shop = models.CharField(max_length=255, blank=True, null=True)
     total_debt = models.DecimalField(max_digits=10, decimal_places=2, default=0.0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant_id', 'name']),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -35,6 +40,12 @@ class CustomerLedger(TenantAwareModel):
     description = models.TextField(blank=True, null=True)
     reference = models.CharField(max_length=100, blank=True, null=True)  # optional txn ID
 
+    class Meta:
+        # A customer's ledger, newest first.
+        indexes = [
+            models.Index(fields=['tenant_id', 'customer', '-date']),
+        ]
+
     def __str__(self):
         return f"{self.type.capitalize()} {self.amount} on {self.date}"
 
@@ -48,5 +59,10 @@ class CustomerFinancialSnapshot(TenantAwareModel):
     total_debt = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     last_updated = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant_id', 'customer']),
+        ]
+
     def __str__(self):
         return f"Snapshot for {self.customer.name}"
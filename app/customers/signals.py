@@ -1,7 +1,9 @@
 # customers/signals.py
 from django.db import models
+from django.db.models import F
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
 from decimal import Decimal
 from .models import CustomerLedger, CustomerFinancialSnapshot
 from app.point_of_sale.models import Invoice
@@ -25,10 +27,47 @@ def update_snapshot(customer):
     snapshot.save()
 
 
+# ---- Invoice paid in full at creation (point-of-sale checkout) ----
+def record_paid_invoice(invoice, payment):
+    """Write the ledger entries of an invoice and its full payment in one go.
+
+    The invoice and payment must have been saved with ``_ledger_recorded = True``
+    so the handlers below skip them. Both entries are inserted together and the
+    snapshot is moved by the amounts instead of re-aggregating the ledger.
+    """
+    customer = invoice.sales_order.customer
+    CustomerLedger.objects.bulk_create([
+        CustomerLedger(
+            customer=customer,
+            amount=invoice.total_invoice_amount,
+            type='debit',
+            description=f"Invoice #{invoice.id}",
+            reference=str(invoice.id),
+            tenant_id=invoice.tenant_id,
+        ),
+        CustomerLedger(
+            customer=customer,
+            amount=payment.amount,
+            type='credit',
+            description=f"Payment for Invoice #{invoice.id}",
+            reference=str(payment.id),
+            tenant_id=invoice.tenant_id,
+        ),
+    ])
+    updated = CustomerFinancialSnapshot.objects.filter(customer=customer).update(
+        total_sales=F('total_sales') + invoice.total_invoice_amount,
+        total_payments=F('total_payments') + payment.amount,
+        total_debt=F('total_debt') + invoice.total_invoice_amount - payment.amount,
+        last_updated=timezone.now(),
+    )
+    if not updated:
+        update_snapshot(customer)
+
+
 # ---- When an Invoice is created ----
 @receiver(post_save, sender=Invoice)
 def create_ledger_for_invoice(sender, instance, created, **kwargs):
-    if created:
+    if created and not getattr(instance, '_ledger_recorded', False):
         CustomerLedger.objects.create(
             customer=instance.sales_order.customer,
             amount=instance.total_invoice_amount,
@@ -42,7 +81,7 @@ def create_ledger_for_invoice(sender, instance, created, **kwargs):
 # ---- When a Payment is created ----
 @receiver(post_save, sender=Payment)
 def create_ledger_for_payment(sender, instance, created, **kwargs):
-    if created:
+    if created and not getattr(instance, '_ledger_recorded', False):
         ledger_type = 'credit' if instance.type == 'payment' else 'debit'  # Refunds can be debit or credit depending on logic
         desc = "Payment" if instance.type == 'payment' else "Refund"
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app.dashboard'
+
+    def ready(self):  # pragma: no cover - import side effect
+        from . import signals  # noqa: F401
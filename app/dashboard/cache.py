@@ -0,0 +1,127 @@
+"""Tenant-namespaced cache for computed dashboard payloads.
+
+Entries live under a per-tenant generation number. Invalidating a tenant bumps
+its generation, which orphans every entry written under the previous one; the
+TTL then reclaims them. Because both the generation and the hit/miss counters
+are stored in the configured cache, invalidation and stats are shared across
+workers whenever a shared backend (Redis, Memcached, database) is configured,
+and stay process-local with Django's default local-memory cache.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from app.core.tenant_middleware import get_current_tenant
+
+KEY_PREFIX = 'dashboard'
+DEFAULT_TIMEOUT = 60
+
+
+def _cache():
+    return caches[getattr(settings, 'DASHBOARD_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def _generation_key(tenant_id):
+    return f"{KEY_PREFIX}:{tenant_id}:generation"
+
+
+def _stats_key(name):
+    return f"{KEY_PREFIX}:stats:{name}"
+
+
+def _generation(cache, tenant_id):
+    key = _generation_key(tenant_id)
+    generation = cache.get(key)
+    if generation is None:
+        # A fresh, time-based generation never collides with entries left behind
+        # by an evicted counter.
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def _record(name):
+    cache = _cache()
+    key = _stats_key(name)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def generation(tenant_id=None):
+    """The tenant's current cache generation; it changes whenever the tenant is invalidated."""
+
+    tenant_id = tenant_id if tenant_id is not None else get_current_tenant()
+    if tenant_id is None:
+        return None
+    return _generation(_cache(), tenant_id)
+
+
+def get_or_compute(name, builder, tenant_id=None, timeout=None):
+    """Return the cached value for ``name`` in the tenant namespace, computing it on a miss.
+
+    ``timeout`` overrides ``DASHBOARD_CACHE_TIMEOUT`` for this entry.
+    """
+
+    tenant_id = tenant_id if tenant_id is not None else get_current_tenant()
+    if tenant_id is None:
+        return builder()
+
+    cache = _cache()
+    key = f"{KEY_PREFIX}:{tenant_id}:{_generation(cache, tenant_id)}:{name}"
+    value = cache.get(key)
+    if value is not None:
+        _record('hits')
+        return value
+
+    _record('misses')
+    value = builder()
+    cache.set(key, value, timeout if timeout is not None else _timeout())
+    return value
+
+
+def invalidate_tenant(tenant_id):
+    """Drop every cached dashboard payload for ``tenant_id``."""
+
+    if tenant_id is None:
+        return
+    cache = _cache()
+    key = _generation_key(tenant_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_tenant_on_commit(tenant_id):
+    """Invalidate ``tenant_id`` once the current transaction commits (at once outside a transaction).
+
+    Bumping the generation earlier would let a concurrent request cache the
+    pre-commit data under the new generation.
+    """
+
+    if tenant_id is not None:
+        transaction.on_commit(lambda: invalidate_tenant(tenant_id))
+
+
+def cache_stats():
+    """Return hit/miss counters for the dashboard cache."""
+
+    cache = _cache()
+    hits = cache.get(_stats_key('hits')) or 0
+    misses = cache.get(_stats_key('misses')) or 0
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else 0.0,
+    }
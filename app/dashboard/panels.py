@@ -0,0 +1,121 @@
+"""Independently loadable dashboard panels.
+
+Each panel computes only the data for one widget and declares how long its
+payload may be cached. The dashboard shell fetches every panel in parallel, so a
+slow aggregate only delays its own widget.
+"""
+
+from datetime import timedelta
+
+from app.dashboard.services import category_distribution, sales_kpis, top_selling_products
+from app.inventory.models import Category, Inventory, Product
+from app.point_of_sale.models import SalesOrder
+
+LOW_STOCK_THRESHOLD = 5
+EXPIRY_WINDOW_DAYS = 90
+
+
+def _percent_change(current, previous):
+    if previous > 0:
+        return round(((current - previous) / previous) * 100, 1)
+    return 100 if current > 0 else 0
+
+
+def build_sales_summary(today):
+    kpis = sales_kpis(today)
+    return {
+        'total_sales_today': kpis['sales_today'],
+        'today_sales_trend': _percent_change(kpis['sales_today'], kpis['sales_yesterday']),
+        'total_sales_this_month': kpis['sales_this_month'],
+        'monthly_sales_trend': _percent_change(kpis['sales_this_month'], kpis['sales_last_month']),
+        'total_orders': kpis['total_orders'],
+        'orders_today': kpis['orders_today'],
+        'low_stock_count': Inventory.objects.filter(quantity__lte=LOW_STOCK_THRESHOLD).count(),
+    }
+
+
+def build_catalog_summary(today):
+    cutoff_date = today + timedelta(days=EXPIRY_WINDOW_DAYS)
+    return {
+        'total_customers': SalesOrder.objects.filter(status='completed').values('customer').distinct().count(),
+        'total_products': Product.objects.count(),
+        'total_categories': Category.objects.count(),
+        'expiring_soon_count': Product.objects.filter(expiry_date__isnull=False, expiry_date__lte=cutoff_date).count(),
+    }
+
+
+def build_recent_orders(today):
+    recent_orders = (
+        SalesOrder.objects.filter(status='completed')
+        .select_related('customer')
+        .order_by('-created_at')[:10]
+    )
+    return {'recent_orders': list(recent_orders)}
+
+
+def build_low_stock(today):
+    low_stock_items = (
+        Inventory.objects.filter(quantity__lte=LOW_STOCK_THRESHOLD)
+        .select_related('product', 'product__category')
+    )
+    return {'low_stock_items': list(low_stock_items)}
+
+
+def build_expiring_soon(today):
+    cutoff_date = today + timedelta(days=EXPIRY_WINDOW_DAYS)
+    expiring_products = Product.objects.filter(expiry_date__isnull=False, expiry_date__lte=cutoff_date)
+    # Map inventories by product id for quick lookup
+    inventories = Inventory.objects.filter(product__in=expiring_products)
+    inv_map = {inv.product_id: inv for inv in inventories}
+    expiring_soon_items = []
+    for p in expiring_products.select_related('category'):
+        expiring_soon_items.append({
+            'product': p,
+            'inventory': inv_map.get(p.id),
+            'days_left': (p.expiry_date - today).days,
+        })
+    return {'expiring_soon_items': expiring_soon_items}
+
+
+def build_top_sellers(today):
+    thirty_days_ago = today - timedelta(days=30)
+    return {
+        'top_products': top_selling_products(thirty_days_ago, today, limit=5),
+        'category_sales': category_distribution(thirty_days_ago, today),
+    }
+
+
+# name -> builder, fragment template and the number of seconds its payload may be
+# served from the tenant cache.
+PANELS = {
+    'sales_summary': {
+        'builder': build_sales_summary,
+        'template': 'dashboard/panels/sales_summary.html',
+        'cache_timeout': 30,
+    },
+    'catalog_summary': {
+        'builder': build_catalog_summary,
+        'template': 'dashboard/panels/catalog_summary.html',
+        'cache_timeout': 300,
+    },
+    'recent_orders': {
+        'builder': build_recent_orders,
+        'template': 'dashboard/panels/recent_orders.html',
+        'cache_timeout': 30,
+    },
+    'low_stock': {
+        'builder': build_low_stock,
+        'template': 'dashboard/panels/low_stock.html',
+        'cache_timeout': 60,
+    },
+    'expiring_soon': {
+        'builder': build_expiring_soon,
+        'template': 'dashboard/panels/expiring_soon.html',
+        'cache_timeout': 900,
+    },
+    'top_sellers': {
+        'builder': build_top_sellers,
+        'template': 'dashboard/panels/top_sellers.html',
+        'cache_timeout': 120,
+    },
+}
@@ -0,0 +1,161 @@
+"""Aggregation services backing the dashboard charts and APIs."""
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.db.models import CharField, DateField, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from app.point_of_sale.models import OrderItem, TenantDailySales
+
+GRANULARITY_DAY = 'day'
+GRANULARITY_MONTH = 'month'
+
+LABEL_FORMATS = {
+    GRANULARITY_DAY: '%b %d',
+    GRANULARITY_MONTH: '%b %Y',
+}
+
+TREND_PERIODS = {
+    # period -> (granularity, number of buckets)
+    'week': (GRANULARITY_DAY, 7),
+    'month': (GRANULARITY_DAY, 30),
+    'year': (GRANULARITY_MONTH, 12),
+}
+
+
+def _add_months(value: date, months: int) -> date:
+    """Shift a first-of-month date by ``months`` (may be negative)."""
+
+    month_index = value.year * 12 + (value.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def bucket_starts(end_date: date, count: int, granularity: str = GRANULARITY_DAY):
+    """Return ``count`` ascending bucket start dates ending with the bucket containing ``end_date``."""
+
+    if granularity == GRANULARITY_MONTH:
+        last = end_date.replace(day=1)
+        return [_add_months(last, -offset) for offset in range(count - 1, -1, -1)]
+    return [end_date - timedelta(days=offset) for offset in range(count - 1, -1, -1)]
+
+
+def _next_bucket(bucket: date, granularity: str) -> date:
+    if granularity == GRANULARITY_MONTH:
+        return _add_months(bucket, 1)
+    return bucket + timedelta(days=1)
+
+
+def sales_time_series(buckets, granularity: str = GRANULARITY_DAY):
+    """Return completed-sales revenue per bucket using a single grouped query.
+
+    ``buckets`` is an ascending list of bucket start dates (see :func:`bucket_starts`).
+    Revenue is read from the ``TenantDailySales`` rollup, whose dates are already the
+    tenant's local business days, so the cost is proportional to the days displayed.
+    Buckets without sales are filled with ``Decimal('0')`` so the result always lines
+    up with ``buckets``.
+    """
+
+    if not buckets:
+        return []
+
+    range_end = _next_bucket(buckets[-1], granularity)
+    rows = TenantDailySales.objects.filter(date__gte=buckets[0], date__lt=range_end)
+
+    if granularity == GRANULARITY_MONTH:
+        rows = rows.annotate(bucket=TruncMonth('date', output_field=DateField()))
+    else:
+        rows = rows.annotate(bucket=F('date'))
+
+    rows = rows.values('bucket').annotate(total=Sum('total_revenue')).order_by('bucket')
+
+    totals = {}
+    for row in rows:
+        bucket = row['bucket']
+        if isinstance(bucket, datetime):
+            bucket = bucket.date()
+        totals[bucket] = row['total'] or Decimal('0')
+
+    return [totals.get(bucket, Decimal('0')) for bucket in buckets]
+
+
+def sales_kpis(today: date | None = None):
+    """Return today/yesterday/this month/last month revenue and order counts in one query."""
+
+    today = today or timezone.localdate()
+    yesterday = today - timedelta(days=1)
+    this_month = today.replace(day=1)
+    last_month = _add_months(this_month, -1)
+    next_month = _add_months(this_month, 1)
+
+    zero = Value(Decimal('0.00'), output_field=DecimalField(max_digits=15, decimal_places=2))
+    return TenantDailySales.objects.aggregate(
+        sales_today=Coalesce(Sum('total_revenue', filter=Q(date=today)), zero),
+        sales_yesterday=Coalesce(Sum('total_revenue', filter=Q(date=yesterday)), zero),
+        sales_this_month=Coalesce(
+            Sum('total_revenue', filter=Q(date__gte=this_month, date__lt=next_month)), zero
+        ),
+        sales_last_month=Coalesce(
+            Sum('total_revenue', filter=Q(date__gte=last_month, date__lt=this_month)), zero
+        ),
+        orders_today=Coalesce(Sum('total_orders', filter=Q(date=today)), 0),
+        total_orders=Coalesce(Sum('total_orders'), 0),
+    )
+
+
+def sales_trend(period: str, today: date | None = None):
+    """Build the ``{'labels': [...], 'values': [...]}`` payload for a trend period."""
+
+    granularity, count = TREND_PERIODS.get(period, TREND_PERIODS['week'])
+    today = today or timezone.localdate()
+    buckets = bucket_starts(today, count, granularity)
+    values = sales_time_series(buckets, granularity)
+
+    label_format = LABEL_FORMATS[granularity]
+    return {
+        'labels': [bucket.strftime(label_format) for bucket in buckets],
+        'values': [float(value) for value in values],
+    }
+
+
+def _completed_items_between(start_date: date, end_date: date):
+    """Order items of completed sales placed on local days ``start_date`` to ``end_date``.
+
+    ``ProductSalesSummary`` counts items whatever their order's status, so the
+    panels that must only show completed sales group these items instead.
+    """
+
+    start = timezone.make_aware(datetime.combine(start_date, time.min))
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+    return OrderItem.objects.filter(
+        sales_order__status='completed',
+        sales_order__created_at__gte=start,
+        sales_order__created_at__lt=end,
+    )
+
+
+def top_selling_products(start_date: date, end_date: date, limit: int = 5):
+    """Return ``[[product_name, quantity], ...]`` for the best sellers in the window."""
+
+    rows = (
+        _completed_items_between(start_date, end_date)
+        .values('product_id', 'product__name')
+        .annotate(quantity=Sum('quantity'))
+        .order_by('-quantity', 'product__name')[:limit]
+    )
+    return [[row['product__name'], row['quantity']] for row in rows]
+
+
+def category_distribution(start_date: date, end_date: date):
+    """Return ``{category_name: revenue}`` for the window, grouping missing categories as 'Uncategorized'."""
+
+    revenue = ExpressionWrapper(F('quantity') * F('price'), output_field=DecimalField(max_digits=15, decimal_places=2))
+    rows = (
+        _completed_items_between(start_date, end_date)
+        .annotate(category_name=Coalesce('product__category__name', Value('Uncategorized'), output_field=CharField()))
+        .values('category_name')
+        .annotate(revenue=Sum(revenue))
+        .order_by('-revenue')
+    )
+    return {row['category_name']: float(row['revenue'] or 0) for row in rows}
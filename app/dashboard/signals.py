@@ -0,0 +1,32 @@
+"""Signal handlers for dashboard app."""
+
+from django.db.models.signals import post_delete, post_save
+
+from app.inventory.models import Inventory, Product
+from app.point_of_sale.models import OrderItem, SalesOrder
+
+from .cache import invalidate_tenant_on_commit
+
+INVALIDATING_MODELS = (SalesOrder, OrderItem, Inventory, Product)
+
+
+def invalidate_dashboard_cache(sender, instance, **kwargs):
+    """Drop the tenant's cached dashboard payloads once a sales or stock change commits.
+
+    Bulk writes send no signals; they call ``invalidate_tenant_on_commit`` themselves.
+    """
+
+    invalidate_tenant_on_commit(getattr(instance, 'tenant_id', None))
+
+
+for model in INVALIDATING_MODELS:
+    post_save.connect(
+        invalidate_dashboard_cache,
+        sender=model,
+        dispatch_uid=f'dashboard_cache_save_{model._meta.label_lower}',
+    )
+    post_delete.connect(
+        invalidate_dashboard_cache,
+        sender=model,
+        dispatch_uid=f'dashboard_cache_delete_{model._meta.label_lower}',
+    )
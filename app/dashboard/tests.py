@@ -1,6 +1,28 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
 from django.urls import reverse
+from django.utils import timezone
+
+from app.core.tenant_middleware import set_current_tenant
+from app.dashboard.cache import cache_stats, get_or_compute, invalidate_tenant
+from app.dashboard.panels import PANELS
+from app.dashboard.services import (
+    GRANULARITY_MONTH,
+    bucket_starts,
+    category_distribution,
+    sales_kpis,
+    sales_time_series,
+    top_selling_products,
+)
+from app.employee.models import EmployeeProfile
+from app.inventory import importer, spreadsheet
+from app.inventory.models import Category, Product
+from app.point_of_sale.models import OrderItem, SalesOrder, TenantDailySales
 
 
 class RootRedirectTestCase(TestCase):
@@ -34,3 +56,199 @@ class RootRedirectTestCase(TestCase):
         """Test that dashboard redirects to login when not logged in"""
         response = self.client.get('/dashboard/')
         self.assertEqual(response.status_code, 302)  # Should redirect to login
+
+
+class SalesTimeSeriesTests(TestCase):
+    def setUp(self):
+        set_current_tenant(201)
+        self.addCleanup(set_current_tenant, None)
+        self.product = Product.objects.create(
+            name='Trend Widget', cost=Decimal('5.00'), price=Decimal('10.00'), model='TW-1'
+        )
+        self.orders = []
+        for qty in (2, 3):
+            order = SalesOrder.objects.create(status='completed')
+            OrderItem.objects.create(sales_order=order, product=self.product, quantity=qty, price=Decimal('10.00'))
+            self.orders.append(order)
+
+    def test_buckets_filled_from_single_query(self):
+        today = timezone.localdate()
+        moved = self.orders[1]
+        SalesOrder._base_manager.filter(pk=moved.pk).update(
+            created_at=timezone.now() - timedelta(days=2)
+        )
+        moved.refresh_from_db()
+        self.orders[0].refresh_daily_sales()
+        moved.refresh_daily_sales()
+        buckets = bucket_starts(today, 7)
+
+        with self.assertNumQueries(1):
+            values = sales_time_series(buckets)
+
+        self.assertEqual(len(values), 7)
+        self.assertEqual(values[-1], Decimal('20.00'))
+        self.assertEqual(values[-3], Decimal('30.00'))
+        self.assertEqual(sum(values), Decimal('50.00'))
+
+    def test_daily_rollup_tracks_completed_orders(self):
+        for order in self.orders:
+            order.refresh_daily_sales()
+
+        rollup = TenantDailySales.objects.get()
+        self.assertEqual(rollup.date, timezone.localdate())
+        self.assertEqual(rollup.total_revenue, Decimal('50.00'))
+        self.assertEqual(rollup.total_orders, 2)
+        self.assertEqual(rollup.total_quantity, 5)
+
+        kpis = sales_kpis()
+        self.assertEqual(kpis['sales_today'], Decimal('50.00'))
+        self.assertEqual(kpis['orders_today'], 2)
+
+        self.orders[0].delete()
+        rollup = TenantDailySales.objects.get()
+        self.assertEqual(rollup.total_revenue, Decimal('30.00'))
+        self.assertEqual(rollup.total_orders, 1)
+
+    def test_daily_rollup_row_is_locked_before_the_day_is_aggregated(self):
+        self.orders[0].refresh_daily_sales()
+        with CaptureQueriesContext(connection) as ctx:
+            self.orders[1].refresh_daily_sales()
+
+        tables = [
+            'rollup' if 'tenant_daily_sales' in query['sql'].split(' WHERE ')[0] else 'orders'
+            for query in ctx.captured_queries
+        ]
+        # Under READ COMMITTED an aggregate taken before the lock can miss a concurrent sale.
+        self.assertEqual(tables[0], 'rollup')
+        self.assertEqual(TenantDailySales.objects.get().total_orders, 2)
+
+    def test_month_buckets_use_calendar_months(self):
+        buckets = bucket_starts(date(2026, 3, 31), 4, GRANULARITY_MONTH)
+        self.assertEqual(buckets, [date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1)])
+
+
+class DashboardQueryCountTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser(username='boss', password='pass123', email='boss@example.com')
+        EmployeeProfile.objects.create(user=self.user, role='manager', tenant_id=301)
+        self.client.force_login(self.user)
+        set_current_tenant(301)
+        self.addCleanup(set_current_tenant, None)
+        self.category = Category.objects.create(name='Gadgets')
+
+    def _sell_products(self, count):
+        for i in range(count):
+            product = Product.objects.create(
+                name=f'Gadget {Product.objects.count()}', category=self.category,
+                cost=Decimal('1.00'), price=Decimal('4.00'), model='G',
+            )
+            order = SalesOrder.objects.create(status='completed')
+            # Product sales summaries are refreshed when the transaction commits.
+            with self.captureOnCommitCallbacks(execute=True):
+                OrderItem.objects.create(sales_order=order, product=product, quantity=i + 1, price=Decimal('4.00'))
+
+    def _dashboard_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            for panel in PANELS:
+                response = self.client.get(reverse('dashboard:dashboard_panel', args=[panel]))
+                self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_top_products_and_categories_are_single_queries(self):
+        self._sell_products(3)
+        today = timezone.localdate()
+        start = today - timedelta(days=30)
+
+        with self.assertNumQueries(1):
+            top = top_selling_products(start, today)
+        with self.assertNumQueries(1):
+            categories = category_distribution(start, today)
+
+        self.assertEqual(top[0], ['Gadget 2', 3])
+        self.assertEqual(categories, {'Gadgets': 24.0})
+
+    def test_top_products_and_categories_count_only_completed_sales(self):
+        self._sell_products(1)
+        other = Category.objects.create(name='Spares')
+        product = Product.objects.create(name='Spare', category=other, cost=Decimal('1.00'), price=Decimal('9.00'), model='S')
+        for status in ('draft', 'in_transit', 'cancelled'):
+            order = SalesOrder.objects.create(status=status)
+            with self.captureOnCommitCallbacks(execute=True):
+                OrderItem.objects.create(sales_order=order, product=product, quantity=50, price=Decimal('9.00'))
+        today = timezone.localdate()
+        start = today - timedelta(days=30)
+
+        self.assertEqual(top_selling_products(start, today), [['Gadget 0', 1]])
+        self.assertEqual(category_distribution(start, today), {'Gadgets': 4.0})
+
+    def test_panels_report_timing_and_cache_policy(self):
+        response = self.client.get(reverse('dashboard:dashboard_panel', args=['sales_summary']))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Server-Timing'].startswith('sales_summary;dur='))
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        url = reverse('dashboard:dashboard_panel', args=['sales_summary'])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SalesOrder.objects.create(status='completed')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(reverse('dashboard:dashboard_panel', args=['missing']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_dashboard_query_count_independent_of_sales_volume(self):
+        self._sell_products(2)
+        baseline = self._dashboard_queries()
+
+        self._sell_products(15)
+        self.assertEqual(self._dashboard_queries(), baseline)
+
+        response = self.client.get(reverse('dashboard:dashboard_panel', args=['top_sellers']))
+        self.assertContains(response, 'Gadget 16')
+        self.assertContains(response, 'Gadgets')
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        set_current_tenant(401)
+        self.addCleanup(set_current_tenant, None)
+        invalidate_tenant(401)
+        self.calls = 0
+
+    def _build(self):
+        self.calls += 1
+        return {'value': self.calls}
+
+    def test_hit_after_first_compute_and_invalidated_by_product_save(self):
+        before = cache_stats()
+
+        self.assertEqual(get_or_compute('kpis', self._build), {'value': 1})
+        self.assertEqual(get_or_compute('kpis', self._build), {'value': 1})
+        self.assertEqual(self.calls, 1)
+
+        after = cache_stats()
+        self.assertEqual(after['hits'] - before['hits'], 1)
+        self.assertEqual(after['misses'] - before['misses'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(name='Fresh', cost=Decimal('1.00'), price=Decimal('2.00'), model='F')
+            # Not before the change commits.
+            self.assertEqual(get_or_compute('kpis', self._build), {'value': 1})
+        self.assertEqual(get_or_compute('kpis', self._build), {'value': 2})
+
+    def test_bulk_inventory_import_invalidates_on_commit(self):
+        get_or_compute('kpis', self._build)
+        row, _ = spreadsheet.parse_row(2, {
+            'product name': 'Bulk', 'category': 'Bulk', 'cost': '1', 'price': '2', 'location': 'Shelf', 'quantity': '3',
+        })
+        with self.captureOnCommitCallbacks(execute=True):
+            importer.import_chunk([row], 401)
+        self.assertEqual(get_or_compute('kpis', self._build), {'value': 2})
+
+    def test_entries_are_namespaced_per_tenant(self):
+        get_or_compute('kpis', self._build, tenant_id=402)
+        get_or_compute('kpis', self._build, tenant_id=403)
+        self.assertEqual(self.calls, 2)
@@ -4,5 +4,8 @@ from . import views
 app_name = 'dashboard'
 urlpatterns = [
     path('', views.dashboard_view, name='dashboard'),
+    path('panels/<str:panel>/', views.dashboard_panel, name='dashboard_panel'),
     path('api/sales/trend/<str:period>/', views.sales_trend_api, name='sales_trend_api'),
+    path('api/cache/stats/', views.cache_stats_api, name='cache_stats_api'),
+    path('api/stock-locks/stats/', views.stock_lock_stats_api, name='stock_lock_stats_api'),
 ]
@@ -1,13 +1,16 @@
 from django.shortcuts import render
 from django.utils import timezone
-from datetime import timedelta, datetime, time
 from django.contrib.auth.decorators import login_required, permission_required
-from django.db.models import Sum, Count, Q
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response
 import json
+import time
 from decimal import Decimal
-from app.point_of_sale.models import SalesOrder, OrderItem
-from app.inventory.models import Product, Inventory, Category
+from app.core.tenant_middleware import get_current_tenant
+from app.dashboard.cache import cache_stats, generation, get_or_compute
+from app.dashboard.panels import PANELS
+from app.dashboard.services import TREND_PERIODS, sales_trend
+from app.inventory.locking import retry_stats
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -36,298 +39,60 @@ class DecimalEncoder(json.JSONEncoder):
 @permission_required('point_of_sale.view_reports', login_url='/authentication/login/', raise_exception=True)
 def sales_trend_api(request, period):
     """API endpoint for sales trend data"""
+    if period not in TREND_PERIODS:
+        period = 'week'
     today = timezone.localdate()
-    tz = timezone.get_current_timezone()
+    payload = get_or_compute(f'trend:{period}:{today.isoformat()}', lambda: sales_trend(period, today=today))
+    return JsonResponse(payload)
 
-    if period == 'week':
-        # Last 7 days (local date boundaries)
-        labels = []
-        values = []
-        for i in range(7):
-            date_i = today - timedelta(days=i)
-            start = timezone.make_aware(datetime.combine(date_i, time.min), tz)
-            end = timezone.make_aware(datetime.combine(date_i + timedelta(days=1), time.min), tz)
-            orders_for_date = SalesOrder.objects.filter(
-                created_at__gte=start,
-                created_at__lt=end,
-                status='completed'
-            )
-            order_items_for_date = OrderItem.objects.filter(sales_order__in=orders_for_date)
-            daily_sales = sum(item.quantity * item.price for item in order_items_for_date)
-            labels.insert(0, date_i.strftime('%b %d'))
-            values.insert(0, float(daily_sales))
-    
-    elif period == 'month':
-        # Last 30 days (local date boundaries)
-        labels = []
-        values = []
-        for i in range(30):
-            date_i = today - timedelta(days=i)
-            start = timezone.make_aware(datetime.combine(date_i, time.min), tz)
-            end = timezone.make_aware(datetime.combine(date_i + timedelta(days=1), time.min), tz)
-            orders_for_date = SalesOrder.objects.filter(
-                created_at__gte=start,
-                created_at__lt=end,
-                status='completed'
-            )
-            order_items_for_date = OrderItem.objects.filter(sales_order__in=orders_for_date)
-            daily_sales = sum(item.quantity * item.price for item in order_items_for_date)
-            labels.insert(0, date_i.strftime('%b %d'))
-            values.insert(0, float(daily_sales))
-    
-    elif period == 'year':
-        # Last 12 months (approximate 30-day months using local boundaries)
-        labels = []
-        values = []
-        for i in range(12):
-            month_start_date = today.replace(day=1) - timedelta(days=30*i)
-            month_start = timezone.make_aware(datetime.combine(month_start_date, time.min), tz)
-            month_end = timezone.make_aware(datetime.combine(month_start_date + timedelta(days=30), time.min), tz)
-            orders_month = SalesOrder.objects.filter(
-                created_at__gte=month_start,
-                created_at__lt=month_end,
-                status='completed'
-            )
-            order_items_month = OrderItem.objects.filter(sales_order__in=orders_month)
-            monthly_sales = sum(item.quantity * item.price for item in order_items_month)
-            labels.insert(0, month_start.strftime('%b %Y'))
-            values.insert(0, float(monthly_sales))
-    
-    else:
-        # Default to week
-        labels = []
-        values = []
-        for i in range(7):
-            date_i = today - timedelta(days=i)
-            start = timezone.make_aware(datetime.combine(date_i, time.min), tz)
-            end = timezone.make_aware(datetime.combine(date_i + timedelta(days=1), time.min), tz)
-            orders_for_date = SalesOrder.objects.filter(
-                created_at__gte=start,
-                created_at__lt=end,
-                status='completed'
-            )
-            order_items_for_date = OrderItem.objects.filter(sales_order__in=orders_for_date)
-            daily_sales = sum(item.quantity * item.price for item in order_items_for_date)
-            labels.insert(0, date_i.strftime('%b %d'))
-            values.insert(0, float(daily_sales))
-    
-    return JsonResponse({
-        'labels': labels,
-        'values': values
-    })
+
+@login_required(login_url='/authentication/login/')
+@permission_required('point_of_sale.view_reports', login_url='/authentication/login/', raise_exception=True)
+def cache_stats_api(request):
+    """Expose dashboard cache hit/miss counters for scraping."""
+    return JsonResponse(cache_stats())
 
 
 @login_required(login_url='/authentication/login/')
 @permission_required('point_of_sale.view_reports', login_url='/authentication/login/', raise_exception=True)
-def dashboard_view(request):
-    today = timezone.localdate()
-    tz = timezone.get_current_timezone()
+def stock_lock_stats_api(request):
+    """Expose retried, recovered and abandoned stock transaction counters for scraping."""
+    return JsonResponse(retry_stats())
 
-    # Local-day boundaries for today, yesterday, and month ranges
-    start_today = timezone.make_aware(datetime.combine(today, time.min), tz)
-    end_today = timezone.make_aware(datetime.combine(today + timedelta(days=1), time.min), tz)
 
-    yesterday = today - timedelta(days=1)
-    start_yesterday = timezone.make_aware(datetime.combine(yesterday, time.min), tz)
-    end_yesterday = start_today
+@login_required(login_url='/authentication/login/')
+@permission_required('point_of_sale.view_reports', login_url='/authentication/login/', raise_exception=True)
+def dashboard_view(request):
+    """Render the dashboard shell; every widget is fetched from dashboard_panel in parallel."""
+    return render(request, 'dashboard/index.html', {'panels': list(PANELS)})
+
 
-    this_month_date = today.replace(day=1)
-    start_this_month = timezone.make_aware(datetime.combine(this_month_date, time.min), tz)
-    # Next month start (handle December rollover roughly with +31 days then replace)
-    next_month_date = (this_month_date + timedelta(days=31)).replace(day=1)
-    start_next_month = timezone.make_aware(datetime.combine(next_month_date, time.min), tz)
+@login_required(login_url='/authentication/login/')
+@permission_required('point_of_sale.view_reports', login_url='/authentication/login/', raise_exception=True)
+def dashboard_panel(request, panel):
+    """Return a single dashboard panel as an HTML fragment.
 
-    last_month_date = (this_month_date - timedelta(days=1)).replace(day=1)
-    start_last_month = timezone.make_aware(datetime.combine(last_month_date, time.min), tz)
+    The ETag is derived from the tenant's dashboard cache generation, so the
+    browser revalidates every time and gets a 304 until the tenant's data changes.
+    """
+    config = PANELS.get(panel)
+    if config is None:
+        raise Http404("Unknown dashboard panel")
 
-    # Today's Sales
-    orders_today = SalesOrder.objects.filter(created_at__gte=start_today, created_at__lt=end_today, status='completed')
-    order_items_today = OrderItem.objects.filter(sales_order__in=orders_today)
-    total_sales_today = sum(item.quantity * item.price for item in order_items_today)
-    
-    # Yesterday's Sales for comparison
-    orders_yesterday = SalesOrder.objects.filter(created_at__gte=start_yesterday, created_at__lt=end_yesterday, status='completed')
-    order_items_yesterday = OrderItem.objects.filter(sales_order__in=orders_yesterday)
-    total_sales_yesterday = sum(item.quantity * item.price for item in order_items_yesterday)
-    
-    # Calculate today's sales trend
-    if total_sales_yesterday > 0:
-        today_sales_trend = ((total_sales_today - total_sales_yesterday) / total_sales_yesterday) * 100
-    else:
-        today_sales_trend = 100 if total_sales_today > 0 else 0
-    
-    # Monthly Sales
-    orders_this_month = SalesOrder.objects.filter(
-        created_at__gte=start_this_month,
-        created_at__lt=start_next_month,
-        status='completed'
-    )
-    order_items_this_month = OrderItem.objects.filter(sales_order__in=orders_this_month)
-    total_sales_this_month = sum(item.quantity * item.price for item in order_items_this_month)
-    
-    # Last month's sales for comparison
-    orders_last_month = SalesOrder.objects.filter(
-        created_at__gte=start_last_month,
-        created_at__lt=start_this_month,
-        status='completed'
-    )
-    order_items_last_month = OrderItem.objects.filter(sales_order__in=orders_last_month)
-    total_sales_last_month = sum(item.quantity * item.price for item in order_items_last_month)
-    
-    # Calculate monthly sales trend
-    if total_sales_last_month > 0:
-        monthly_sales_trend = ((total_sales_this_month - total_sales_last_month) / total_sales_last_month) * 100
-    else:
-        monthly_sales_trend = 100 if total_sales_this_month > 0 else 0
-    
-    # Total Orders
-    total_orders = SalesOrder.objects.filter(status='completed').count()
-    orders_today_count = orders_today.count()
-    
-    # Low Stock Items
-    low_stock_items = Inventory.objects.filter(quantity__lte=5).select_related('product')
-    low_stock_count = low_stock_items.count()
-    
-    # Expiring Soon (<= 90 days)
-    cutoff_date = today + timedelta(days=90)
-    expiring_products = Product.objects.filter(expiry_date__isnull=False, expiry_date__lte=cutoff_date)
-    # Map inventories by product id for quick lookup
-    inventories = Inventory.objects.filter(product__in=expiring_products).select_related('product', 'product__category')
-    inv_map = {inv.product_id: inv for inv in inventories}
-    expiring_soon_items = []
-    for p in expiring_products.select_related('category'):
-        days_left = (p.expiry_date - today).days if p.expiry_date else None
-        expiring_soon_items.append({
-            'product': p,
-            'inventory': inv_map.get(p.id),
-            'days_left': days_left,
-        })
-    expiring_soon_count = len(expiring_soon_items)
-    
-    # Recent Orders (last 10)
-    recent_orders = SalesOrder.objects.filter(status='completed').select_related('customer').order_by('-created_at')[:10]
-    
-    # Sales Trend Data (last 7 days)
-    sales_trend_data = []
-    sales_trend_labels = []
-    for i in range(7):
-        date_i = today - timedelta(days=i)
-        start = timezone.make_aware(datetime.combine(date_i, time.min), tz)
-        end = timezone.make_aware(datetime.combine(date_i + timedelta(days=1), time.min), tz)
-        orders_for_date = SalesOrder.objects.filter(
-            created_at__gte=start,
-            created_at__lt=end,
-            status='completed'
+    started = time.perf_counter()
+    today = timezone.localdate()
+    etag = f'"{panel}-{get_current_tenant()}-{generation()}-{today.isoformat()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        data = get_or_compute(
+            f'panel:{panel}:{today.isoformat()}',
+            lambda: config['builder'](today),
+            timeout=config['cache_timeout'],
         )
-        order_items_for_date = OrderItem.objects.filter(sales_order__in=orders_for_date)
-        daily_sales = sum(item.quantity * item.price for item in order_items_for_date)
-        sales_trend_data.insert(0, float(daily_sales))
-        sales_trend_labels.insert(0, date_i.strftime('%b %d'))
-    
-    # If no sales data, provide sample data for demonstration
-    if not any(sales_trend_data):
-        sales_trend_data = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
-        sales_trend_labels = []
-        for i in range(6, -1, -1):
-            date_i = today - timedelta(days=i)
-            sales_trend_labels.insert(0, date_i.strftime('%b %d'))
+        response = render(request, config['template'], data)
 
-    # Top Selling Products (last 30 days)
-    thirty_days_ago = today - timedelta(days=30)
-    start_30 = timezone.make_aware(datetime.combine(thirty_days_ago, time.min), tz)
-    recent_orders_30_days = SalesOrder.objects.filter(
-        created_at__gte=start_30,
-        status='completed'
-    )
-    order_items_30_days = OrderItem.objects.filter(sales_order__in=recent_orders_30_days)
-    
-    # Group by product and sum quantities
-    product_sales = {}
-    for item in order_items_30_days:
-        product_name = item.product.name
-        if product_name in product_sales:
-            product_sales[product_name] += item.quantity
-        else:
-            product_sales[product_name] = item.quantity
-    
-    # Get top 5 products
-    top_products = sorted(product_sales.items(), key=lambda x: x[1], reverse=True)[:5]
-    
-    # If no product data, provide sample data
-    if not top_products:
-        top_products = [["Sample Product 1", 10], ["Sample Product 2", 8], ["Sample Product 3", 6]]
-    
-    # Category Distribution
-    category_sales = {}
-    for item in order_items_30_days:
-        category_name = item.product.category.name if item.product.category else 'Uncategorized'
-        if category_name in category_sales:
-            category_sales[category_name] += float(item.quantity * item.price)
-        else:
-            category_sales[category_name] = float(item.quantity * item.price)
-    
-    # If no category data, provide sample data
-    if not category_sales:
-        category_sales = {"Electronics": 1500.0, "Clothing": 800.0, "Books": 300.0}
-    
-    # Monthly Sales Data for Chart (last 6 months using local boundaries)
-    monthly_sales_data = []
-    monthly_labels = []
-    for i in range(6):
-        month_start_date = this_month_date - timedelta(days=30*i)
-        month_start = timezone.make_aware(datetime.combine(month_start_date, time.min), tz)
-        month_end = timezone.make_aware(datetime.combine((month_start_date + timedelta(days=31)).replace(day=1), time.min), tz)
-        orders_month = SalesOrder.objects.filter(
-            created_at__gte=month_start,
-            created_at__lt=month_end,
-            status='completed'
-        )
-        order_items_month = OrderItem.objects.filter(sales_order__in=orders_month)
-        monthly_sales = sum(item.quantity * item.price for item in order_items_month)
-        monthly_sales_data.insert(0, float(monthly_sales))
-        monthly_labels.insert(0, month_start.strftime('%b %Y'))
-    
-    # If no monthly data, provide sample data
-    if not any(monthly_sales_data):
-        monthly_sales_data = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
-        monthly_labels = []
-        for i in range(5, -1, -1):
-            month_date = this_month_date - timedelta(days=30*i)
-            monthly_labels.insert(0, month_date.strftime('%b %Y'))
- 
-    
-    context = {
-        # Sales Data
-        'total_sales_today': total_sales_today,
-        'today_sales_trend': round(today_sales_trend, 1),
-        'total_sales_this_month': total_sales_this_month,
-        'monthly_sales_trend': round(monthly_sales_trend, 1),
-        
-        # Orders Data
-        'total_orders': total_orders,
-        'orders_today': orders_today_count,
-        
-        # Inventory Data
-        'low_stock_count': low_stock_count,
-        'low_stock_items': low_stock_items,
-        'expiring_soon_count': expiring_soon_count,
-        'expiring_soon_items': expiring_soon_items,
-        
-        # Recent Data
-        'recent_orders': recent_orders,
-        
-        # # Chart Data - JSON serialized for JavaScript
-        # 'sales_trend_data_json': json.dumps(sales_trend_data, cls=DecimalEncoder),
-        # 'sales_trend_labels_json': json.dumps(sales_trend_labels),
-        # 'top_products_json': json.dumps(top_products, cls=DecimalEncoder),
-        # 'category_sales_json': json.dumps(category_sales, cls=DecimalEncoder),
-        # 'monthly_sales_data_json': json.dumps(monthly_sales_data, cls=DecimalEncoder),
-        # 'monthly_labels_json': json.dumps(monthly_labels),
-        
-        # Additional Stats
-        'total_customers': SalesOrder.objects.filter(status='completed').values('customer').distinct().count(),
-        'total_products': Product.objects.count(),
-        'total_categories': Category.objects.count(),
-    }
-    
-    return render(request, 'dashboard/index.html', context)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    response['Server-Timing'] = f'{panel};dur={elapsed_ms:.1f}'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
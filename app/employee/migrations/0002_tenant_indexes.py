@@ -0,0 +1,21 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employeeassignment',
+            index=models.Index(fields=['tenant_id', 'date'], name='employee_em_tenant__4549de_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeeprofile',
+            index=models.Index(fields=['tenant_id', 'role'], name='employee_em_tenant__d412b5_idx'),
+        ),
+    ]
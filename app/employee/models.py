@@ -15,6 +15,11 @@ class EmployeeProfile(TenantAwareModel):
     role = models.CharField(max_length=10, choices=ROLE_CHOICES)
     phone = models.CharField(max_length=15, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant_id', 'role']),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.get_role_display()}"
 
@@ -35,6 +40,9 @@ class EmployeeAssignment(TenantAwareModel):
 
     class Meta:
         unique_together = ('employee', 'date')
+        indexes = [
+            models.Index(fields=['tenant_id', 'date']),
+        ]
 
     def __str__(self):
         return f"{self.employee.user.get_full_name()} → {self.get_location_display()} on {self.date}"
@@ -19,3 +19,10 @@ class StockMovementAdmin(admin.ModelAdmin):
     list_filter = ('change_type', 'location')
     search_fields = ('product__name',)
     date_hierarchy = 'created_at'
+
+
+@admin.register(models.ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ('file_name', 'tenant_id', 'status', 'rows_processed', 'rows_imported', 'error_count', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('file_name',)
@@ -6,5 +6,5 @@ class InventoryConfig(AppConfig):
     name = 'app.inventory'
     label = 'inventory'
 
-    def ready(self):
-        pass
+    def ready(self):  # pragma: no cover - import side effect
+        from . import signals  # noqa: F401
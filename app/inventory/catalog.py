@@ -0,0 +1,48 @@
+"""Versioned product catalog snapshots and deltas for POS terminals."""
+
+from .models import CatalogVersion, Product, ProductTombstone
+
+CATALOG_FIELDS = ('id', 'name', 'price', 'barcode', 'model')
+PRICE_INDEX = CATALOG_FIELDS.index('price')
+
+
+def catalog_etag(tenant_id, version):
+    return f'"catalog-{tenant_id}-{version}"'
+
+
+def build_catalog(tenant_id, since=None):
+    """Return the catalog for ``tenant_id`` as a compact payload.
+
+    Products are encoded as lists ordered like ``fields``. With ``since`` (a
+    version the client already holds) only products changed after it and the
+    ids deleted after it are returned; otherwise the full catalog is sent.
+    """
+
+    version = CatalogVersion.current(tenant_id)
+    # A client ahead of the server (e.g. after a restore) needs a fresh snapshot.
+    full = not since or since <= 0 or since > version
+
+    products = Product._base_manager.filter(tenant_id=tenant_id)
+    deleted = []
+    if not full:
+        products = products.filter(catalog_version__gt=since)
+        deleted = list(
+            ProductTombstone._base_manager.filter(tenant_id=tenant_id, catalog_version__gt=since)
+            .values_list('product_id', 'catalog_version')
+        )
+
+    rows = []
+    for *values, row_version in products.order_by('id').values_list(*CATALOG_FIELDS, 'catalog_version'):
+        values[PRICE_INDEX] = float(values[PRICE_INDEX])
+        rows.append(values)
+        version = max(version, row_version)
+    for _, row_version in deleted:
+        version = max(version, row_version)
+
+    return {
+        'version': version,
+        'full': full,
+        'fields': list(CATALOG_FIELDS),
+        'products': rows,
+        'deleted': sorted({product_id for product_id, _ in deleted}),
+    }
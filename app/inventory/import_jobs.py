@@ -0,0 +1,162 @@
+"""Background, resumable inventory spreadsheet imports.
+
+An upload is saved to storage and recorded as an :class:`ImportJob`. The job
+streams the file row by row (see ``spreadsheet.iter_rows``) and applies it in
+chunks of ``INVENTORY_IMPORT_CHUNK_SIZE``; each chunk commits together with
+the job's counters, so the job's ``rows_processed`` is always the checkpoint
+of what is in the database. A job that fails part way (a worker restart, a
+database error) can be run again and continues after its last committed
+chunk. With ``INVENTORY_IMPORT_RUNNER = 'background'`` jobs run on a worker
+thread once the request commits; ``'inline'`` runs them in the request.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from django.utils import timezone
+
+from app.core.tenant_middleware import get_current_tenant, set_current_tenant
+
+from . import importer, spreadsheet
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+RUNNER_INLINE = 'inline'
+RUNNER_BACKGROUND = 'background'
+UPLOAD_DIR = 'inventory_imports'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _background_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inventory-import')
+        return _executor
+
+
+def start_job(user, upload):
+    """Store ``upload``, create its ImportJob for the current tenant and schedule it."""
+
+    file_name = os.path.basename(upload.name or '')
+    if not file_name.lower().endswith(spreadsheet.SUPPORTED_EXTENSIONS):
+        raise ValueError("Unsupported file type. Upload a .xlsx or .csv file.")
+    path = default_storage.save(f"{UPLOAD_DIR}/{uuid.uuid4().hex}/{file_name}", upload)
+    job = ImportJob.objects.create(file=path, file_name=file_name, created_by=user)
+    schedule(job.pk)
+    return job
+
+
+def schedule(job_id):
+    """Run the job now (inline) or hand it to the worker thread after the current transaction commits."""
+
+    if getattr(settings, 'INVENTORY_IMPORT_RUNNER', RUNNER_BACKGROUND) == RUNNER_BACKGROUND:
+        transaction.on_commit(lambda: _background_executor().submit(_run_in_worker, job_id))
+    else:
+        run_job(job_id)
+
+
+def _run_in_worker(job_id):
+    try:
+        run_job(job_id)
+    except Exception:
+        logger.exception("Inventory import job %s crashed", job_id)
+    finally:
+        connections.close_all()
+
+
+def run_job(job_id):
+    """Apply a queued or failed job from its checkpoint; returns the job, or None if it was not runnable.
+
+    The job is claimed with a conditional update, so two runners never work
+    on the same job.
+    """
+
+    claimed = ImportJob._base_manager.filter(
+        pk=job_id, status__in=[ImportJob.STATUS_QUEUED, ImportJob.STATUS_FAILED],
+    ).update(status=ImportJob.STATUS_RUNNING, started_at=timezone.now(), finished_at=None, message='')
+    if not claimed:
+        return None
+    job = ImportJob._base_manager.get(pk=job_id)
+
+    previous_tenant = get_current_tenant()
+    set_current_tenant(job.tenant_id)
+    started = time.monotonic()
+    elapsed_before = job.elapsed_seconds
+    try:
+        with default_storage.open(job.file, 'rb') as file:
+            rows = islice(spreadsheet.iter_rows(file, job.file_name), job.rows_processed, None)
+            for chunk in importer.chunked(rows):
+                _apply_chunk(job, chunk, elapsed_before + time.monotonic() - started)
+    except Exception as exc:
+        logger.exception("Inventory import job %s failed after %s rows", job.pk, job.rows_processed)
+        # Only the status changes: the counters stay at the last committed chunk.
+        job.status = ImportJob.STATUS_FAILED
+        job.message = str(exc) or exc.__class__.__name__
+        job.finished_at = timezone.now()
+        job.elapsed_seconds = elapsed_before + time.monotonic() - started
+        ImportJob._base_manager.filter(pk=job.pk).update(
+            status=job.status, message=job.message, finished_at=job.finished_at,
+            elapsed_seconds=job.elapsed_seconds, updated_at=job.finished_at,
+        )
+        return job
+    finally:
+        set_current_tenant(previous_tenant)
+
+    job.status = ImportJob.STATUS_COMPLETED
+    job.finished_at = timezone.now()
+    job.elapsed_seconds = elapsed_before + time.monotonic() - started
+    job.save(update_fields=['status', 'finished_at', 'elapsed_seconds', 'updated_at'])
+    default_storage.delete(job.file)
+    return job
+
+
+def _apply_chunk(job, chunk, elapsed):
+    """Import one chunk of ``(row_number, payload, error)`` and advance the checkpoint in the same transaction."""
+
+    payloads = [payload for _, payload, _ in chunk if payload is not None]
+    errors = [error for _, _, error in chunk if error]
+    with transaction.atomic():
+        imported = importer.import_chunk(payloads, job.tenant_id)
+        ImportJob._base_manager.filter(pk=job.pk).update(
+            rows_processed=job.rows_processed + len(chunk),
+            rows_imported=job.rows_imported + imported,
+            error_count=job.error_count + len(errors),
+            errors=(job.errors + errors)[:ImportJob.MAX_ERRORS],
+            elapsed_seconds=elapsed,
+            updated_at=timezone.now(),
+        )
+    job.rows_processed += len(chunk)
+    job.rows_imported += imported
+    job.error_count += len(errors)
+    job.errors = (job.errors + errors)[:ImportJob.MAX_ERRORS]
+    job.elapsed_seconds = elapsed
+
+
+def status_payload(job):
+    """What the import progress poller shows for ``job``."""
+
+    return {
+        'job_id': job.pk,
+        'status': job.status,
+        'file_name': job.file_name,
+        'rows_processed': job.rows_processed,
+        'rows_imported': job.rows_imported,
+        'error_count': job.error_count,
+        'errors': job.errors[:10],
+        'rows_per_second': job.rows_per_second,
+        'elapsed_seconds': round(job.elapsed_seconds, 2),
+        'message': job.message,
+        'finished': job.is_finished,
+    }
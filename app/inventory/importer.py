@@ -0,0 +1,274 @@
+"""Set-based upsert of inventory spreadsheet rows.
+
+Rows are applied in chunks of ``INVENTORY_IMPORT_CHUNK_SIZE``. Each chunk
+resolves its categories, products, inventory rows and images with one query
+per table and writes them with ``bulk_create``/``bulk_update``, instead of a
+lookup and a save per row. Work that ``Product.save()`` and the post_save
+handlers do per product (catalog version bump, scan cache invalidation,
+storefront listing) is done once per chunk.
+
+Rows are the normalized payloads built by ``spreadsheet.parse_row``; later rows for
+the same product or (product, location) win, as they did row by row.
+"""
+
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from app.core.tenant_middleware import get_current_tenant
+from app.dashboard.cache import invalidate_tenant_on_commit
+from app.storefront.models import StorefrontProduct, StorefrontProductImage
+from app.storefront.signals import create_storefront_listings
+
+from . import scan
+from .models import CatalogVersion, Category, Inventory, InventoryImage, Product
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def chunk_size():
+    return getattr(settings, 'INVENTORY_IMPORT_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def chunked(rows, size=None):
+    """Yield lists of at most ``size`` rows from any iterable, without materializing it."""
+
+    rows = iter(rows)
+    size = size or chunk_size()
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def import_rows(rows, size=None):
+    """Upsert ``rows`` chunk by chunk for the current tenant; returns the number of rows applied."""
+
+    imported = 0
+    for chunk in chunked(rows, size):
+        imported += import_chunk(chunk)
+    return imported
+
+
+def import_chunk(rows, tenant_id=None):
+    """Upsert one chunk of rows in its own transaction (a savepoint inside an outer one)."""
+
+    if not rows:
+        return 0
+    if tenant_id is None:
+        tenant_id = get_current_tenant()
+
+    with transaction.atomic():
+        categories = _resolve_categories({row['category_name'] for row in rows if row['category_name']}, tenant_id)
+        products = _upsert_products(rows, categories, tenant_id)
+        inventories = _upsert_inventory(rows, products, tenant_id)
+        _attach_images(rows, products, inventories, tenant_id)
+        # bulk_create/bulk_update send no post_save, so the dashboard is told here.
+        invalidate_tenant_on_commit(tenant_id)
+    return len(rows)
+
+
+def _resolve_categories(names, tenant_id):
+    """Map lowercase name -> Category, preferring the tenant's own over shared ones; creates the missing."""
+
+    wanted = {}
+    for name in names:
+        wanted.setdefault(name.lower(), name)
+    if not wanted:
+        return {}
+
+    def fetch():
+        qs = Category._base_manager.annotate(lower_name=Lower('name')).filter(lower_name__in=wanted)
+        if tenant_id is not None:
+            qs = qs.filter(Q(tenant_id=tenant_id) | Q(tenant_id__isnull=True))
+        else:
+            qs = qs.filter(tenant_id__isnull=True)
+        found = {}
+        # Shared rows first so the tenant's own category overrides them.
+        for category in sorted(qs, key=lambda c: (c.tenant_id is not None, c.id)):
+            found[category.lower_name] = category
+        return found
+
+    found = fetch()
+    missing = [Category(name=name, tenant_id=tenant_id) for key, name in wanted.items() if key not in found]
+    if missing:
+        # ignore_conflicts: a concurrent import may have just created the same category, in any
+        # letter case (Category is unique on tenant_id, lower(name)); the re-fetch picks it up.
+        Category._base_manager.bulk_create(missing, ignore_conflicts=True)
+        found = fetch()
+    return found
+
+
+def _apply_row(product, row, category):
+    """Copy a row onto an existing product like the row-by-row import did; returns the changed fields."""
+
+    changed = []
+    if product.cost != row['cost']:
+        product.cost = row['cost']
+        changed.append('cost')
+    if product.price != row['price']:
+        product.price = row['price']
+        changed.append('price')
+    if row['description'] and product.description != row['description']:
+        product.description = row['description']
+        changed.append('description')
+    if category and product.category_id != category.id:
+        product.category = category
+        changed.append('category')
+    if row['model']:
+        if product.model != row['model_effective']:
+            product.model = row['model_effective']
+            changed.append('model')
+    elif not product.model:
+        product.model = row['model_effective']
+        changed.append('model')
+    return changed
+
+
+def _upsert_products(rows, categories, tenant_id):
+    """Return lowercase name -> saved Product for every row."""
+
+    names = {row['product_name'].lower() for row in rows}
+    products = {
+        product.lower_name: product
+        for product in Product.objects.annotate(lower_name=Lower('name')).filter(lower_name__in=names).order_by('id')
+    }
+
+    created = {}
+    changed = {}
+    for row in rows:
+        key = row['product_name'].lower()
+        category = categories.get(row['category_name'].lower()) if row['category_name'] else None
+        product = products.get(key)
+        if product is None:
+            products[key] = created[key] = Product(
+                name=row['product_name'],
+                model=row['model_effective'],
+                cost=row['cost'],
+                price=row['price'],
+                description=row['description'],
+                category=category,
+                tenant_id=tenant_id,
+            )
+            continue
+        fields = _apply_row(product, row, category)
+        if fields and key not in created:
+            changed.setdefault(key, set()).update(fields)
+
+    if not created and not changed:
+        return products
+
+    # One catalog version for the whole chunk; terminals fetch it as a single delta.
+    version = CatalogVersion.bump(tenant_id)
+    for product in created.values():
+        product.catalog_version = version
+    Product.objects.bulk_create(created.values(), batch_size=chunk_size())
+    if changed:
+        for key in changed:
+            products[key].catalog_version = version
+        fields = set().union(*changed.values()) | {'catalog_version'}
+        Product._base_manager.bulk_update([products[key] for key in changed], sorted(fields),
+                                          batch_size=chunk_size())
+
+    create_storefront_listings(created.values())
+    scan.invalidate_tenant(tenant_id)
+    transaction.on_commit(lambda: scan.invalidate_tenant(tenant_id))
+    return products
+
+
+def _upsert_inventory(rows, products, tenant_id):
+    """Return (product_id, lowercase location) -> saved Inventory for every row."""
+
+    product_ids = {products[row['product_name'].lower()].pk for row in rows}
+    inventories = {}
+    existing = (Inventory.objects.filter(product_id__in=product_ids)
+                .annotate(lower_location=Lower('location')).order_by('id'))
+    for inventory in existing:
+        inventories.setdefault((inventory.product_id, inventory.lower_location), inventory)
+
+    created = {}
+    changed = {}
+    for row in rows:
+        product = products[row['product_name'].lower()]
+        key = (product.pk, row['location'].lower())
+        inventory = inventories.get(key)
+        if inventory is None:
+            inventories[key] = created[key] = Inventory(
+                product=product, location=row['location'], quantity=row['quantity'], tenant_id=tenant_id,
+            )
+            continue
+        if (inventory.location, inventory.quantity) != (row['location'], row['quantity']):
+            inventory.location = row['location']
+            inventory.quantity = row['quantity']
+            if key not in created:
+                changed[key] = inventory
+
+    Inventory.objects.bulk_create(created.values(), batch_size=chunk_size())
+    if changed:
+        now = timezone.now()
+        for inventory in changed.values():
+            inventory.last_updated = now
+        Inventory._base_manager.bulk_update(changed.values(), ['location', 'quantity', 'last_updated'],
+                                            batch_size=chunk_size())
+    return inventories
+
+
+def _attach_images(rows, products, inventories, tenant_id):
+    """Add the rows' image URLs that are new for their inventory and mirror them to the storefront."""
+
+    wanted = {}
+    for row in rows:
+        if not row.get('image_refs'):
+            continue
+        inventory = inventories[(products[row['product_name'].lower()].pk, row['location'].lower())]
+        urls = wanted.setdefault(inventory.pk, (inventory, []))[1]
+        urls.extend(url for url in row['image_refs'] if url not in urls)
+    if not wanted:
+        return
+
+    seen = set(
+        InventoryImage._base_manager.filter(inventory_id__in=wanted)
+        .values_list('inventory_id', 'image_url')
+    )
+    images = []
+    for inventory_id, (inventory, urls) in wanted.items():
+        for url in urls:
+            if (inventory_id, url) not in seen:
+                seen.add((inventory_id, url))
+                images.append(InventoryImage(inventory=inventory, image_url=url, tenant_id=tenant_id))
+    if not images:
+        return
+    InventoryImage.objects.bulk_create(images, batch_size=chunk_size())
+
+    by_id = {product.pk: product for product in products.values()}
+    listings = {
+        listing.product_id: listing
+        for listing in StorefrontProduct.objects.filter(product_id__in={image.inventory.product_id for image in images})
+    }
+    if not listings:
+        return
+    mirrored = set(
+        StorefrontProductImage.objects.filter(product__in=listings.values()).values_list('product_id', 'image_url')
+    )
+    next_order = dict(
+        StorefrontProductImage.objects.filter(product__in=listings.values())
+        .values('product_id').annotate(last=Max('display_order')).values_list('product_id', 'last')
+    )
+    mirrors = []
+    for image in images:
+        product = by_id[image.inventory.product_id]
+        listing = listings.get(product.pk)
+        if listing is None or (listing.pk, image.image_url) in mirrored:
+            continue
+        mirrored.add((listing.pk, image.image_url))
+        order = next_order.get(listing.pk)
+        next_order[listing.pk] = order = 0 if order is None else order + 1
+        mirrors.append(StorefrontProductImage(
+            product=listing, image_url=image.image_url, display_order=order, alt_text=product.name,
+        ))
+    StorefrontProductImage.objects.bulk_create(mirrors, batch_size=chunk_size())
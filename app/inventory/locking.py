@@ -0,0 +1,131 @@
+"""Deterministic inventory row locking and deadlock-aware transaction retries.
+
+Every code path that locks ``Inventory`` rows goes through :func:`lock_inventory`,
+which always acquires the locks in ``(product_id, location, id)`` order. Two
+transactions touching overlapping products therefore queue behind each other
+instead of deadlocking. Whatever contention remains (lock timeouts, serialization
+failures) is absorbed by :func:`run_with_retry`, which re-runs the whole
+transaction with exponential backoff and records how often that happens.
+"""
+
+import functools
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, connection, transaction
+
+from .models import Inventory
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ATTEMPTS = 3
+DEFAULT_BACKOFF = 0.05
+METRICS_PREFIX = 'stock_lock'
+
+# PostgreSQL SQLSTATEs: serialization_failure, deadlock_detected, lock_not_available.
+RETRYABLE_SQLSTATES = {'40001', '40P01', '55P03'}
+# MySQL error codes: lock wait timeout, deadlock found.
+RETRYABLE_MYSQL_CODES = {1205, 1213}
+
+
+def lock_inventory(product_ids, locations=None, **filters):
+    """Lock and return the inventory rows for ``product_ids`` in a fixed order.
+
+    Must be called inside a transaction. ``locations`` optionally narrows the
+    rows to those locations; extra ``filters`` are applied as-is.
+    """
+
+    queryset = Inventory.objects.select_for_update().filter(product_id__in=product_ids, **filters)
+    if locations is not None:
+        queryset = queryset.filter(location__in=locations)
+    return list(queryset.order_by('product_id', 'location', 'id'))
+
+
+def is_retryable_error(exc):
+    """Return True when ``exc`` is a deadlock, lock timeout or serialization failure."""
+
+    if not isinstance(exc, DatabaseError):
+        return False
+    cause = exc.__cause__ or exc
+    sqlstate = getattr(cause, 'pgcode', None) or getattr(cause, 'sqlstate', None)
+    if sqlstate in RETRYABLE_SQLSTATES:
+        return True
+    args = getattr(cause, 'args', ())
+    return bool(args) and args[0] in RETRYABLE_MYSQL_CODES
+
+
+def _record(name):
+    key = f"{METRICS_PREFIX}:{name}"
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def retry_stats():
+    """Return counters for retried, recovered and abandoned stock transactions.
+
+    Served by the dashboard's ``stock_lock_stats_api`` for scraping.
+    """
+
+    return {
+        name: cache.get(f"{METRICS_PREFIX}:{name}") or 0
+        for name in ('retries', 'recovered', 'exhausted')
+    }
+
+
+def _backoff(attempt):
+    base = getattr(settings, 'STOCK_LOCK_RETRY_BACKOFF', DEFAULT_BACKOFF)
+    delay = base * (2 ** (attempt - 1))
+    # Jitter keeps two terminals that collided from retrying in lockstep.
+    return delay + random.uniform(0, delay)
+
+
+def run_with_retry(func, *args, attempts=None, **kwargs):
+    """Run ``func`` in its own transaction, retrying it on deadlock-type errors.
+
+    The whole transaction is replayed, so ``func`` must not have side effects
+    outside the database. When called inside an outer ``atomic`` block the
+    transaction cannot be replayed, so the error is re-raised immediately.
+    """
+
+    attempts = attempts or getattr(settings, 'STOCK_LOCK_RETRY_ATTEMPTS', DEFAULT_ATTEMPTS)
+    can_retry = not connection.in_atomic_block
+    attempt = 1
+    while True:
+        try:
+            with transaction.atomic():
+                result = func(*args, **kwargs)
+        except DatabaseError as exc:
+            if not (can_retry and is_retryable_error(exc)):
+                raise
+            if attempt >= attempts:
+                exhausted = _record('exhausted')
+                logger.error(
+                    "Giving up on %s after %s attempts (%s stock transactions abandoned so far): %s",
+                    func.__name__, attempt, exhausted, exc,
+                )
+                raise
+            _record('retries')
+            logger.info("Retrying %s after attempt %s failed: %s", func.__name__, attempt, exc)
+            time.sleep(_backoff(attempt))
+            attempt += 1
+            continue
+        if attempt > 1:
+            _record('recovered')
+        return result
+
+
+def retry_on_deadlock(func):
+    """Decorator form of :func:`run_with_retry`; replaces ``transaction.atomic`` on views."""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return run_with_retry(func, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app.inventory.import_jobs import run_job
+from app.inventory.models import ImportJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Run inventory import jobs that did not finish: failed and queued jobs, and running jobs '
+        'whose worker stopped reporting progress (e.g. after a restart). Each job continues '
+        'after its last committed chunk.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_ids', nargs='*', type=int, help='Only these jobs (default: every unfinished job).')
+        parser.add_argument('--stale-minutes', type=int, default=15,
+                            help='Treat running jobs without progress for this long as failed.')
+
+    def handle(self, *args, **options):
+        jobs = ImportJob._base_manager.exclude(status=ImportJob.STATUS_COMPLETED)
+        if options['job_ids']:
+            jobs = jobs.filter(pk__in=options['job_ids'])
+
+        stale_before = timezone.now() - timedelta(minutes=options['stale_minutes'])
+        jobs.filter(status=ImportJob.STATUS_RUNNING, updated_at__lt=stale_before).update(
+            status=ImportJob.STATUS_FAILED, message='Worker stopped; resumed from checkpoint.',
+        )
+
+        for job_id in jobs.order_by('created_at').values_list('pk', flat=True):
+            job = run_job(job_id)
+            if job is None:
+                self.stdout.write(f'job={job_id}: still running, skipped')
+                continue
+            self.stdout.write(
+                f'job={job.pk} {job.file_name}: {job.status}, {job.rows_processed} rows processed, '
+                f'{job.rows_imported} imported, {job.error_count} errors'
+                + (f' ({job.message})' if job.message else '')
+            )
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.9 on 2026-10-18 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_alter_inventoryimage_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.IntegerField(blank=True, editable=False, null=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'catalog_version',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.IntegerField(blank=True, editable=False, null=True)),
+                ('product_id', models.IntegerField()),
+                ('catalog_version', models.PositiveBigIntegerField()),
+            ],
+            options={
+                'db_table': 'product_tombstone',
+            },
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='catalog_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tenant_id', 'catalog_version'], name='product_tenant__2ac46a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producttombstone',
+            index=models.Index(fields=['tenant_id', 'catalog_version'], name='product_tom_tenant__888e8a_idx'),
+        ),
+    ]
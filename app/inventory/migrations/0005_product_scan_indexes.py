@@ -0,0 +1,21 @@
+# Generated by Django 4.2.9 on 2026-10-18 17:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_catalog_versioning'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tenant_id', 'barcode'], name='product_tenant__d3a42b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tenant_id', 'sku'], name='product_tenant__4d57b0_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_import_job'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['tenant_id', '-timestamp'], name='audit_log_tenant__56bf3c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['tenant_id', 'table_name', 'record_id'], name='audit_log_tenant__e029c2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='catalogversion',
+            index=models.Index(fields=['tenant_id'], name='catalog_ver_tenant__fa6300_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='importjob',
+            index=models.Index(fields=['tenant_id', '-created_at'], name='inventory_i_tenant__6bef00_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventory',
+            index=models.Index(fields=['tenant_id', 'product', 'location'], name='inventory_tenant__0ea053_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryimage',
+            index=models.Index(fields=['tenant_id', 'inventory'], name='inventory_i_tenant__b7093a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['tenant_id', 'user', 'is_read', '-created_at'], name='notificatio_tenant__997e70_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tenant_id', 'name'], name='product_tenant__ea6d28_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['tenant_id', '-created_at'], name='product_tenant__38e79f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['tenant_id', '-created_at'], name='stock_movem_tenant__658858_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stockmovement',
+            index=models.Index(fields=['tenant_id', 'product', '-created_at'], name='stock_movem_tenant__ea350c_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:59
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+import django.db.models.functions.text
+
+
+def merge_case_duplicate_categories(apps, schema_editor):
+    """Fold categories that differ only in letter case into the oldest one of their tenant."""
+
+    Category = apps.get_model('inventory', 'Category')
+    Product = apps.get_model('inventory', 'Product')
+
+    keepers = {}
+    duplicates = {}
+    rows = (
+        Category.objects.filter(tenant_id__isnull=False)
+        .annotate(lower_name=Lower('name'))
+        .order_by('id')
+        .values_list('id', 'tenant_id', 'lower_name')
+    )
+    for pk, tenant_id, lower_name in rows:
+        keeper = keepers.setdefault((tenant_id, lower_name), pk)
+        if keeper != pk:
+            duplicates.setdefault(keeper, []).append(pk)
+
+    for keeper, pks in duplicates.items():
+        Product.objects.filter(category_id__in=pks).update(category_id=keeper)
+        Category.objects.filter(pk__in=pks).delete()
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0007_tenant_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='category',
+            unique_together=set(),
+        ),
+        migrations.RunPython(merge_case_duplicate_categories, noop),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(models.F('tenant_id'), django.db.models.functions.text.Lower('name'), name='unique_category_tenant_lower_name'),
+        ),
+    ]
@@ -1,8 +1,10 @@
-from django.db import models
+from django.db import models, transaction
 
 from app.core.models import TenantAwareModel, TenantManager
+from app.core.tenant_middleware import get_current_tenant
 from app.core.storage_backends import StaticStorage, MediaStorage
 from django.db.models import JSONField
+from django.db.models.functions import Lower
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
 
@@ -31,7 +33,13 @@ class Category(TenantAwareModel):
     class Meta:
         verbose_name_plural = "Categories"
         ordering = ['name']
-        unique_together = (('tenant_id', 'name'),)
+        constraints = [
+            # Category names are matched case-insensitively (see the inventory importer).
+            models.UniqueConstraint(
+                'tenant_id', Lower('name'),
+                name="unique_category_tenant_lower_name"
+            )
+        ]
 
     def __str__(self):
         return self.name
@@ -51,6 +59,8 @@ class Product(TenantAwareModel):
     model = models.CharField(max_length=100)
     sku = models.CharField(max_length=100, blank=True, null=True)
     expiry_date = models.DateField(null=True, blank=True)
+    # Tenant catalog version of the last change, used by POS terminals to fetch deltas.
+    catalog_version = models.PositiveBigIntegerField(default=0, editable=False)
 
     # Tenant-aware manager
     objects = TenantManager()
@@ -60,6 +70,61 @@ class Product(TenantAwareModel):
 
     class Meta:
         db_table = 'product'
+        indexes = [
+            models.Index(fields=['tenant_id', 'catalog_version']),
+            models.Index(fields=['tenant_id', 'barcode']),
+            models.Index(fields=['tenant_id', 'sku']),
+            models.Index(fields=['tenant_id', 'name']),
+            models.Index(fields=['tenant_id', '-created_at']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.tenant_id:
+            self.tenant_id = get_current_tenant()
+        # The version row stays locked until commit, so versions become visible in order.
+        with transaction.atomic():
+            self.catalog_version = CatalogVersion.bump(self.tenant_id)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'catalog_version'}
+            super().save(*args, **kwargs)
+
+
+class CatalogVersion(TenantAwareModel):
+    """Per-tenant counter bumped on every product change."""
+    version = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'catalog_version'
+        indexes = [
+            models.Index(fields=['tenant_id']),
+        ]
+
+    @classmethod
+    def current(cls, tenant_id):
+        return cls._base_manager.filter(tenant_id=tenant_id).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls, tenant_id):
+        with transaction.atomic():
+            row = cls._base_manager.select_for_update().filter(tenant_id=tenant_id).first()
+            if not row:
+                row = cls(tenant_id=tenant_id, version=0)
+            row.version += 1
+            row.save()
+            return row.version
+
+
+class ProductTombstone(TenantAwareModel):
+    """Records a deleted product so catalog deltas can tell terminals to drop it."""
+    product_id = models.IntegerField()
+    catalog_version = models.PositiveBigIntegerField()
+
+    class Meta:
+        db_table = 'product_tombstone'
+        indexes = [
+            models.Index(fields=['tenant_id', 'catalog_version']),
+        ]
 
 
 class Inventory(TenantAwareModel):
@@ -73,6 +138,10 @@ class Inventory(TenantAwareModel):
 
     class Meta:
         db_table = 'inventory'
+        # Stock per product and location.
+        indexes = [
+            models.Index(fields=['tenant_id', 'product', 'location']),
+        ]
 
 
 class Notification(TenantAwareModel):
@@ -86,6 +155,10 @@ class Notification(TenantAwareModel):
 
     class Meta:
         db_table = 'notification'
+        # A user's unread notifications, newest first.
+        indexes = [
+            models.Index(fields=['tenant_id', 'user', 'is_read', '-created_at']),
+        ]
 
 
 class AuditLog(TenantAwareModel):
@@ -100,6 +173,11 @@ class AuditLog(TenantAwareModel):
 
     class Meta:
         db_table = 'audit_log'
+        # Newest-first log and the history of one record.
+        indexes = [
+            models.Index(fields=['tenant_id', '-timestamp']),
+            models.Index(fields=['tenant_id', 'table_name', 'record_id']),
+        ]
 
 
 class InventoryImage(TenantAwareModel):
@@ -114,6 +192,9 @@ class InventoryImage(TenantAwareModel):
 
     class Meta:
         db_table = 'inventory_image'
+        indexes = [
+            models.Index(fields=['tenant_id', 'inventory']),
+        ]
 
 
 class StockMovementType(models.TextChoices):
@@ -139,6 +220,66 @@ class StockMovement(TenantAwareModel):
     class Meta:
         db_table = 'stock_movement'
         ordering = ['-created_at']
+        # Newest-first movement log, overall and per product.
+        indexes = [
+            models.Index(fields=['tenant_id', '-created_at']),
+            models.Index(fields=['tenant_id', 'product', '-created_at']),
+        ]
 
     def __str__(self):
         return f"{self.change_type} {self.quantity_change} of {self.product.name} at {self.location}"
+
+
+class ImportJob(TenantAwareModel):
+    """A spreadsheet import applied in the background, chunk by chunk.
+
+    ``rows_processed`` doubles as the checkpoint: it only advances when a
+    chunk has been committed, so a failed job resumes at the first row of
+    the chunk that did not make it.
+    """
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETED, 'Completed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+    MAX_ERRORS = 100
+
+    file = models.CharField(max_length=255, help_text="Storage path of the uploaded spreadsheet")
+    file_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    rows_processed = models.PositiveIntegerField(default=0)
+    rows_imported = models.PositiveIntegerField(default=0)
+    error_count = models.PositiveIntegerField(default=0)
+    errors = JSONField(default=list, blank=True, help_text=f"The first {MAX_ERRORS} row errors")
+    message = models.TextField(blank=True, default='')
+    elapsed_seconds = models.FloatField(default=0)
+    created_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL, related_name='inventory_import_jobs')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'inventory_import_job'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['tenant_id', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"Import {self.file_name} ({self.status})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+
+    @property
+    def rows_per_second(self):
+        if not self.elapsed_seconds:
+            return None
+        return round(self.rows_processed / self.elapsed_seconds, 1)
@@ -0,0 +1,109 @@
+"""Barcode/SKU scan lookups with a bounded, per-tenant in-process LRU cache.
+
+Entries are dropped for a tenant whenever one of its products is saved or
+deleted in this process. Other worker processes do not see that signal, so
+every entry also expires after ``SCAN_CACHE_TTL`` seconds, which bounds how
+long another worker can serve a stale price.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import Product
+
+DEFAULT_CACHE_SIZE = 2048
+DEFAULT_CACHE_TTL = 60
+MAX_CACHED_TENANTS = 256
+
+_lock = threading.Lock()
+# tenant_id -> OrderedDict(code -> (expires_at, summary or None)), least recently used first
+_tenants = OrderedDict()
+
+
+def _cache_size():
+    return getattr(settings, 'SCAN_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+
+
+def _cache_ttl():
+    return getattr(settings, 'SCAN_CACHE_TTL', DEFAULT_CACHE_TTL)
+
+
+def _summary(product):
+    return {
+        'id': product.id,
+        'name': product.name,
+        'price': float(product.price),
+        'barcode': product.barcode,
+        'sku': product.sku,
+        'model': product.model,
+    }
+
+
+def _find(tenant_id, code):
+    """Match ``code`` against barcodes first, then SKUs, using the (tenant_id, ...) indexes."""
+
+    products = Product._base_manager.filter(tenant_id=tenant_id).only(
+        'id', 'name', 'price', 'barcode', 'sku', 'model'
+    )
+    product = products.filter(barcode=code).order_by('id').first()
+    if product is None:
+        product = products.filter(sku=code).order_by('id').first()
+    return _summary(product) if product else None
+
+
+def _cached(tenant_id, code):
+    with _lock:
+        entries = _tenants.get(tenant_id)
+        if entries is None or code not in entries:
+            return False, None
+        expires_at, summary = entries[code]
+        if expires_at < time.monotonic():
+            del entries[code]
+            return False, None
+        entries.move_to_end(code)
+        _tenants.move_to_end(tenant_id)
+        return True, summary
+
+
+def _store(tenant_id, code, summary):
+    with _lock:
+        entries = _tenants.get(tenant_id)
+        if entries is None:
+            entries = _tenants[tenant_id] = OrderedDict()
+            if len(_tenants) > MAX_CACHED_TENANTS:
+                _tenants.popitem(last=False)
+        entries[code] = (time.monotonic() + _cache_ttl(), summary)
+        entries.move_to_end(code)
+        while len(entries) > _cache_size():
+            entries.popitem(last=False)
+
+
+def lookup(tenant_id, code):
+    """Return the product summary scanned as ``code`` for the tenant, or None.
+
+    Unknown codes are cached too, so repeated scans of an unlisted item stay cheap
+    until a product is added.
+    """
+
+    code = (code or '').strip()
+    if not code:
+        return None
+    hit, summary = _cached(tenant_id, code)
+    if hit:
+        return summary
+    summary = _find(tenant_id, code)
+    _store(tenant_id, code, summary)
+    return summary
+
+
+def invalidate_tenant(tenant_id):
+    with _lock:
+        _tenants.pop(tenant_id, None)
+
+
+def clear():
+    with _lock:
+        _tenants.clear()
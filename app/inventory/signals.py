@@ -0,0 +1,31 @@
+"""Signal handlers for inventory app."""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import scan
+from .models import CatalogVersion, Product, ProductTombstone
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    """Leave a tombstone so terminals syncing the catalog drop the product."""
+
+    scan.invalidate_tenant(instance.tenant_id)
+    if instance.tenant_id is None:
+        return
+    ProductTombstone._base_manager.create(
+        tenant_id=instance.tenant_id,
+        product_id=instance.pk,
+        catalog_version=CatalogVersion.bump(instance.tenant_id),
+    )
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, **kwargs):
+    """Drop cached scan results; the barcode, SKU or price may have changed."""
+
+    scan.invalidate_tenant(instance.tenant_id)
+    # Again after commit, in case a concurrent scan cached the pre-commit row meanwhile.
+    transaction.on_commit(lambda: scan.invalidate_tenant(instance.tenant_id))
@@ -0,0 +1,195 @@
+"""Streaming reader for inventory import spreadsheets (.xlsx and .csv).
+
+Rows are yielded one at a time: workbooks are opened in openpyxl's read-only
+mode and CSV files are decoded incrementally, so memory use does not grow
+with the size of the upload.
+"""
+
+import codecs
+import csv
+import re
+from decimal import Decimal, InvalidOperation
+
+import openpyxl
+from django.conf import settings
+
+DEFAULT_FALLBACK_LOCATION = "Warehouse"
+REQUIRED_HEADERS = {"product name", "cost", "price", "location", "quantity"}
+SUPPORTED_EXTENSIONS = ('.xlsx', '.csv')
+
+
+def normalize_header(value):
+    if value is None:
+        return ''
+    return re.sub(r'\s+', ' ', str(value).strip().lower())
+
+
+def _normalize_number(value):
+    if value is None:
+        return None
+    text = str(value).strip()
+    if not text:
+        return None
+    if text.startswith('(') and text.endswith(')'):
+        text = f"-{text[1:-1]}"
+    text = re.sub(r'[\s\u00A0]', '', text)
+    text = text.replace(',', '')
+    text = re.sub(r'[^0-9.\-]', '', text)
+    return text or None
+
+
+def parse_decimal(value):
+    cleaned = _normalize_number(value)
+    if cleaned is None:
+        return None
+    try:
+        return Decimal(cleaned)
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+
+
+def parse_int(value):
+    cleaned = _normalize_number(value)
+    if cleaned is None:
+        return None
+    try:
+        return int(Decimal(cleaned))
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+
+
+def clean_str(value):
+    if value is None:
+        return ''
+    return re.sub(r'\s+', ' ', str(value).strip())
+
+
+def _public_media_base():
+    base = getattr(settings, 'PUBLIC_MEDIA_BASE_URL', '')
+    return base.rstrip('/') if base else ''
+
+
+def build_public_asset_url(value):
+    cleaned = clean_str(value)
+    if not cleaned:
+        return ''
+    lowered = cleaned.lower()
+    if lowered.startswith('http://') or lowered.startswith('https://'):
+        return cleaned
+    base = _public_media_base()
+    if base:
+        return f"{base}/{cleaned.lstrip('/')}"
+    return cleaned
+
+
+def split_image_refs(raw_value):
+    if not raw_value:
+        return []
+    if isinstance(raw_value, (list, tuple)):
+        candidates = raw_value
+    else:
+        candidates = re.split(r'[\n,|]+', str(raw_value))
+    normalized = []
+    for candidate in candidates:
+        url = build_public_asset_url(candidate)
+        if url:
+            normalized.append(url)
+    return normalized
+
+
+def _check_headers(columns):
+    missing_required = sorted([h for h in REQUIRED_HEADERS if h not in columns])
+    if missing_required:
+        raise ValueError(f"Missing required columns: {', '.join(missing_required)}")
+
+
+def _xlsx_rows(file):
+    wb = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header_row = next(rows, None)
+        idx_map = {normalize_header(h): i for i, h in enumerate(header_row or []) if normalize_header(h)}
+        _check_headers(idx_map)
+        for row_idx, row in enumerate(rows, start=2):
+            # Read-only sheets often report trailing rows that only carry formatting.
+            if not row or all(value is None for value in row):
+                continue
+            yield row_idx, {
+                header: row[i] if i < len(row) else None for header, i in idx_map.items()
+            }
+    finally:
+        wb.close()
+
+
+def _csv_rows(file):
+    reader = csv.DictReader(codecs.iterdecode(file, 'utf-8-sig'))
+    if not reader.fieldnames:
+        raise ValueError("CSV is missing headers.")
+    idx_map = {normalize_header(h): h for h in reader.fieldnames}
+    _check_headers(idx_map)
+    for row_idx, row in enumerate(reader, start=2):
+        yield row_idx, {header: row.get(column) for header, column in idx_map.items()}
+
+
+def parse_row(row_idx, raw):
+    """Normalize one raw row; returns ``(payload, None)`` or ``(None, error message)``."""
+
+    product_name = clean_str(raw.get('product name'))
+    model_clean = clean_str(raw.get('model'))
+    category_name = clean_str(raw.get('category'))
+    description = clean_str(raw.get('description'))
+    location = clean_str(raw.get('location')) or DEFAULT_FALLBACK_LOCATION
+    cost = parse_decimal(raw.get('cost'))
+    price = parse_decimal(raw.get('price'))
+    quantity = parse_int(raw.get('quantity'))
+    if quantity is not None and quantity < 0:
+        quantity = 0
+
+    missing_bits = []
+    if not product_name:
+        missing_bits.append('product name')
+    if cost is None:
+        missing_bits.append('cost')
+    if price is None:
+        missing_bits.append('price')
+    if quantity is None:
+        missing_bits.append('quantity')
+    if missing_bits:
+        return None, (
+            f"Row {row_idx}: Missing {', '.join(missing_bits)}. "
+            f"Raw values -> product={raw.get('product name')!r}, model={raw.get('model')!r}, "
+            f"category={raw.get('category')!r}, location={raw.get('location')!r}, "
+            f"cost={raw.get('cost')!r}, price={raw.get('price')!r}, quantity={raw.get('quantity')!r}"
+        )
+
+    return {
+        'product_name': product_name,
+        'model': model_clean,
+        'model_effective': model_clean or product_name,
+        'category_name': category_name,
+        'description': description[:200] if description else '',
+        'location': location,
+        'cost': cost,
+        'price': price,
+        'quantity': quantity,
+        'image_refs': split_image_refs(raw.get('image urls')),
+    }, None
+
+
+def iter_rows(file, file_name):
+    """Yield ``(row_number, payload, error)`` for each data row of an uploaded file.
+
+    Exactly one of ``payload`` and ``error`` is set. Raises ValueError for an
+    unsupported file type or missing required columns.
+    """
+
+    file_name = (file_name or '').lower()
+    if file_name.endswith('.xlsx'):
+        rows = _xlsx_rows(file)
+    elif file_name.endswith('.csv'):
+        rows = _csv_rows(file)
+    else:
+        raise ValueError("Unsupported file type. Upload a .xlsx or .csv file.")
+    for row_idx, raw in rows:
+        payload, error = parse_row(row_idx, raw)
+        yield row_idx, payload, error
@@ -1,17 +1,35 @@
+import csv
+import gzip
+import tempfile
+from decimal import Decimal
 from io import BytesIO
+from unittest import mock
 
 import openpyxl
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import TestCase, override_settings
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from app.core.tenant_middleware import set_current_tenant
 from app.employee.models import EmployeeProfile
-from app.inventory.models import Category, Inventory, Product, InventoryImage
+from app.inventory import import_jobs, importer, scan
+from app.inventory.locking import retry_stats, run_with_retry
+from app.inventory.models import CatalogVersion, Category, ImportJob, Inventory, Product, InventoryImage
+from app.storefront.models import StorefrontProduct
 
 
+@override_settings(INVENTORY_IMPORT_RUNNER='inline')
 class InventoryImportTests(TestCase):
     def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
         self.user = User.objects.create_user(username='importer', password='pass123')
         EmployeeProfile.objects.create(user=self.user, role='manager', tenant_id=101)
         self.client.force_login(self.user)
@@ -112,3 +130,451 @@ class InventoryImportTests(TestCase):
         urls = set(InventoryImage.objects.values_list('image_url', flat=True))
         self.assertIn('https://public-bucket.s3.ap-south-1.amazonaws.com/media/front.jpg', urls)
         self.assertIn('https://static.example.com/back.png', urls)
+
+
+@override_settings(INVENTORY_IMPORT_RUNNER='inline', INVENTORY_IMPORT_CHUNK_SIZE=2)
+class ImportJobTests(TestCase):
+    HEADER = "Product Name,Model,Category,Cost,Price,Description,Location,Quantity,Image URLs\n"
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.user = User.objects.create_user(username='job-importer', password='pass123')
+        EmployeeProfile.objects.create(user=self.user, role='manager', tenant_id=102)
+        self.client.force_login(self.user)
+
+    def _upload(self, rows, name='stock.csv'):
+        content = self.HEADER + ''.join(f"{row}\n" for row in rows)
+        return SimpleUploadedFile(name, content.encode('utf-8'), content_type='text/csv')
+
+    def _rows(self, count):
+        return [f"Item {i},M-{i},Parts,10,15,,Store,{i}," for i in range(count)]
+
+    def test_json_upload_returns_job_and_status_reports_progress(self):
+        response = self.client.post(reverse('inventory:import_inventory'),
+                                    data={'file': self._upload(self._rows(3) + [",,,,,,,,"])},
+                                    HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+        self.assertEqual(response.status_code, 202)
+        data = response.json()
+        job = ImportJob.objects.get(pk=data['job_id'])
+        self.assertEqual(data['status_url'], reverse('inventory:import_job_status', args=[job.pk]))
+
+        status = self.client.get(data['status_url']).json()
+        self.assertEqual(status['status'], 'completed')
+        self.assertTrue(status['finished'])
+        self.assertEqual(status['rows_processed'], 4)
+        self.assertEqual(status['rows_imported'], 3)
+        self.assertEqual(status['error_count'], 1)
+        self.assertIn('Row 5: Missing', status['errors'][0])
+        self.assertIn('rows_per_second', status)
+        self.assertEqual(Product.objects.filter(tenant_id=102).count(), 3)
+
+    def test_failed_job_resumes_after_its_last_committed_chunk(self):
+        real_import_chunk = importer.import_chunk
+        calls = []
+
+        def flaky(rows, tenant_id=None):
+            calls.append(len(rows))
+            if len(calls) == 2:
+                raise RuntimeError('connection lost')
+            return real_import_chunk(rows, tenant_id)
+
+        with mock.patch.object(importer, 'import_chunk', side_effect=flaky):
+            self.client.post(reverse('inventory:import_inventory'), data={'file': self._upload(self._rows(5))})
+        job = ImportJob.objects.get()
+        self.assertEqual(job.status, ImportJob.STATUS_FAILED)
+        self.assertEqual(job.message, 'connection lost')
+        self.assertEqual((job.rows_processed, job.rows_imported), (2, 2))
+        self.assertEqual(Product.objects.count(), 2)
+
+        with mock.patch.object(importer, 'import_chunk', side_effect=flaky):
+            response = self.client.post(reverse('inventory:import_job_resume', args=[job.pk]))
+        self.assertEqual(response.status_code, 202)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.STATUS_COMPLETED)
+        self.assertEqual((job.rows_processed, job.rows_imported), (5, 5))
+        # Rows 1-2 were not applied again: only the three remaining rows were read.
+        self.assertEqual(calls, [2, 2, 2, 1])
+        self.assertEqual(Inventory.objects.get(product__name='Item 4').quantity, 4)
+
+        # A finished job is never claimed again, so a duplicate resume cannot re-apply it.
+        self.assertIsNone(import_jobs.run_job(job.pk))
+        self.assertEqual(len(calls), 4)
+
+    def test_missing_columns_fail_the_job_with_a_message(self):
+        upload = SimpleUploadedFile('bad.csv', b"Product Name,Cost\nWidget,1\n", content_type='text/csv')
+        response = self.client.post(reverse('inventory:import_inventory'), data={'file': upload},
+                                    HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+        status = self.client.get(response.json()['status_url']).json()
+        self.assertEqual(status['status'], 'failed')
+        self.assertIn('Missing required columns', status['message'])
+
+    @override_settings(INVENTORY_IMPORT_RUNNER='background')
+    def test_background_runner_queues_the_job_until_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(reverse('inventory:import_inventory'), data={'file': self._upload(self._rows(1))},
+                                        HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(ImportJob.objects.get().status, ImportJob.STATUS_QUEUED)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_status_of_another_tenants_job_is_not_found(self):
+        job = ImportJob._base_manager.create(file='x.csv', file_name='x.csv', tenant_id=999)
+        response = self.client.get(reverse('inventory:import_job_status', args=[job.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+class InventoryImportEngineTests(TestCase):
+    def setUp(self):
+        set_current_tenant(102)
+        self.addCleanup(set_current_tenant, None)
+
+    def _row(self, name, location='Main', quantity=5, price='15.00', category='Tools', images=()):
+        return {
+            'product_name': name, 'model': '', 'model_effective': name, 'category_name': category,
+            'description': '', 'location': location, 'cost': Decimal('10.00'), 'price': Decimal(price),
+            'quantity': quantity, 'image_refs': list(images),
+        }
+
+    def _import_queries(self, count, offset=0):
+        rows = [self._row(f'Part {offset + i}', images=[f'https://cdn.example.com/{offset + i}.jpg'])
+                for i in range(count)]
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(importer.import_rows(rows, size=100), count)
+        return len(ctx.captured_queries)
+
+    def test_upserts_products_inventory_and_listings_in_bulk(self):
+        existing = Product.objects.create(name='Hammer', cost=Decimal('1.00'), price=Decimal('2.00'), model='H')
+        Inventory.objects.create(product=existing, location='main', quantity=1)
+        other = Product.objects.create(name='Other', cost=Decimal('1.00'), price=Decimal('2.00'), model='O')
+        StorefrontProduct.objects.filter(product=other).update(slug='saw')
+        version_before = CatalogVersion.current(102)
+
+        importer.import_rows([
+            self._row('hammer', location='Main', quantity=7),
+            self._row('Saw', quantity=3),
+            self._row('Saw', quantity=4, price='18.00'),
+            self._row('Saw', location='Back', quantity=2, price='18.00'),
+        ])
+
+        existing.refresh_from_db()
+        self.assertEqual((existing.price, existing.category.name), (Decimal('15.00'), 'Tools'))
+        self.assertEqual(Inventory.objects.get(product=existing).quantity, 7)
+        saw = Product.objects.get(name='Saw')
+        self.assertEqual(saw.price, Decimal('18.00'))
+        self.assertEqual(dict(Inventory.objects.filter(product=saw).values_list('location', 'quantity')),
+                         {'Main': 4, 'Back': 2})
+        self.assertEqual(saw.storefront_listing.slug, 'saw-1')
+        self.assertEqual(CatalogVersion.current(102), version_before + 1)
+        self.assertEqual((saw.catalog_version, existing.catalog_version), (version_before + 1, version_before + 1))
+        self.assertEqual(Category.objects.filter(name='Tools').count(), 1)
+
+    def test_category_created_concurrently_in_another_case_is_reused(self):
+        bulk_create = Category._base_manager.bulk_create
+
+        def race(categories, **kwargs):
+            # Another import commits the same category between our lookup and insert.
+            Category._base_manager.create(name='TOOLS', tenant_id=102)
+            return bulk_create(categories, **kwargs)
+
+        with mock.patch.object(Category._base_manager, 'bulk_create', side_effect=race):
+            importer.import_rows([self._row('Wrench', category='Tools')])
+
+        self.assertEqual(list(Category.objects.values_list('name', flat=True)), ['TOOLS'])
+        self.assertEqual(Product.objects.get(name='Wrench').category.name, 'TOOLS')
+
+    def test_query_count_is_flat_in_row_count(self):
+        self._import_queries(1, offset=100)  # creates the shared category
+        self.assertEqual(self._import_queries(10), self._import_queries(40, offset=10))
+
+    def test_images_are_attached_once_and_mirrored_to_the_storefront(self):
+        urls = ['https://cdn.example.com/a.jpg', 'https://cdn.example.com/b.jpg']
+        importer.import_rows([self._row('Drill', images=urls[:1])])
+        importer.import_rows([self._row('Drill', images=urls)])
+
+        listing = Product.objects.get(name='Drill').storefront_listing
+        self.assertEqual(InventoryImage.objects.count(), 2)
+        self.assertEqual(list(listing.images.values_list('image_url', 'display_order')), [(urls[0], 0), (urls[1], 1)])
+
+
+class InventoryExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='exporter', password='pass123')
+        EmployeeProfile.objects.create(user=self.user, role='manager', tenant_id=103)
+        self.client.force_login(self.user)
+        set_current_tenant(103)
+        self.addCleanup(set_current_tenant, None)
+        tools = Category.objects.create(name='Tools')
+        for i, (name, category) in enumerate([('Anvil', tools), ('Bolt', None)]):
+            product = Product.objects.create(name=name, model=f'M-{i}', category=category,
+                                             cost=Decimal('1.50'), price=Decimal('2.50'))
+            Inventory.objects.create(product=product, location='Main', quantity=10 + i)
+        set_current_tenant(104)
+        foreign = Product.objects.create(name='Foreign', cost=Decimal('1'), price=Decimal('2'))
+        Inventory.objects.create(product=foreign, location='Main', quantity=1)
+        set_current_tenant(None)
+
+    def _export(self, **params):
+        response = self.client.get(reverse('inventory:export_inventory'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def _csv_rows(self, content):
+        return list(csv.reader(content.decode('utf-8-sig').splitlines()))
+
+    def test_csv_export_streams_joined_rows_for_the_tenant(self):
+        response, content = self._export(format='csv')
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename=inventory.csv')
+        rows = self._csv_rows(content)
+        self.assertEqual(rows[0][:3], ['Product Name', 'Model', 'Category'])
+        self.assertEqual(rows[1:], [
+            ['Anvil', 'M-0', 'Tools', '1.50', '2.50', '', 'Main', '10'],
+            ['Bolt', 'M-1', '', '1.50', '2.50', '', 'Main', '11'],
+        ])
+
+    def test_gzip_csv_export_decompresses_to_the_plain_csv(self):
+        _, plain = self._export(format='csv')
+        response, compressed = self._export(format='csv', gzip='1')
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(gzip.decompress(compressed), plain)
+
+    def test_xlsx_export_uses_a_write_only_workbook(self):
+        _, content = self._export()
+
+        wb = openpyxl.load_workbook(BytesIO(content))
+        rows = list(wb.active.iter_rows(values_only=True))
+        self.assertEqual(wb.active.title, 'Inventory')
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][:3], ('Anvil', 'M-0', 'Tools'))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        with CaptureQueriesContext(connection) as small:
+            self._export(format='csv')
+        set_current_tenant(103)
+        for i in range(30):
+            product = Product.objects.create(name=f'Extra {i}', cost=Decimal('1'), price=Decimal('2'),
+                                             category=Category.objects.get(name='Tools'))
+            Inventory.objects.create(product=product, location='Main', quantity=i)
+        set_current_tenant(None)
+        with CaptureQueriesContext(connection) as large:
+            _, content = self._export(format='csv')
+
+        self.assertEqual(len(self._csv_rows(content)), 33)
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+
+    def test_unknown_format_is_rejected(self):
+        response = self.client.get(reverse('inventory:export_inventory'), {'format': 'pdf'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ItemListViewTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='lister', password='pass123')
+        EmployeeProfile.objects.create(user=self.user, role='manager', tenant_id=105)
+        self.client.force_login(self.user)
+        set_current_tenant(105)
+        self.addCleanup(set_current_tenant, None)
+        self.tools = Category.objects.create(name='Tools')
+        self.hammer = self._product('Hammer', price='10.00', stock={'Main': 4, 'Back': 6}, category=self.tools)
+        self.nail = self._product('Nail', price='0.50', stock={'Main': 3})
+        self._product('Saw', price='25.00', stock={})
+        InventoryImage.objects.create(inventory=self.hammer.inventory_set.get(location='Main'),
+                                      image_url='https://cdn.example.com/hammer.jpg')
+        set_current_tenant(106)
+        self._product('Foreign', price='99.00', stock={'Main': 1})
+        set_current_tenant(None)
+
+    def _product(self, name, price, stock, category=None):
+        product = Product.objects.create(name=name, price=Decimal(price), cost=Decimal('0.10'), category=category)
+        for location, quantity in stock.items():
+            Inventory.objects.create(product=product, location=location, quantity=quantity)
+        return product
+
+    def _list(self, **params):
+        response = self.client.get(reverse('inventory:item_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context
+
+    def test_stock_images_and_totals_come_from_sql(self):
+        context = self._list()
+
+        rows = {product.name: product for product in context['products']}
+        self.assertEqual(list(rows), ['Hammer', 'Nail', 'Saw'])
+        self.assertEqual((rows['Hammer'].stock, rows['Nail'].stock, rows['Saw'].stock), (10, 3, 0))
+        self.assertEqual(rows['Hammer'].image_url, 'https://cdn.example.com/hammer.jpg')
+        self.assertIsNone(rows['Saw'].image_url)
+        self.assertEqual(context['total_items'], 3)
+        self.assertEqual(context['total_value'], Decimal('101.50'))
+        self.assertEqual(context['low_stock_count'], 2)
+
+    def test_search_filters_and_sorting(self):
+        self.assertEqual([p.name for p in self._list(q='ham')['products']], ['Hammer'])
+        self.assertEqual([p.name for p in self._list(stock='low_stock')['products']], ['Nail'])
+        self.assertEqual([p.name for p in self._list(stock='out_of_stock')['products']], ['Saw'])
+        self.assertEqual([p.name for p in self._list(category=self.tools.pk)['products']], ['Hammer'])
+        self.assertEqual([p.name for p in self._list(min_price='5', max_price='nan')['products']], ['Hammer', 'Saw'])
+        self.assertEqual([p.name for p in self._list(sort='-stock')['products']], ['Hammer', 'Nail', 'Saw'])
+        self.assertEqual([p.name for p in self._list(sort='-price')['products']], ['Saw', 'Hammer', 'Nail'])
+
+        context = self._list(stock='low_stock', sort='bogus')
+        self.assertEqual(context['total_items'], 1)
+        self.assertEqual(context['filters']['sort'], 'name')
+        self.assertIn('stock=low_stock', context['filter_query'])
+
+    def test_pages_and_query_count_do_not_grow_with_the_catalog(self):
+        with CaptureQueriesContext(connection) as small:
+            self._list()
+        set_current_tenant(105)
+        for i in range(30):
+            self._product(f'Bulk {i:02d}', price='1.00', stock={'Main': i, 'Back': 1})
+        set_current_tenant(None)
+        with CaptureQueriesContext(connection) as large:
+            context = self._list(page=2)
+
+        self.assertEqual(len(large.captured_queries), len(small.captured_queries))
+        self.assertEqual(context['products'].paginator.num_pages, 2)
+        self.assertEqual(len(context['products']), 33 - 24)
+
+
+class StockLockRetryTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _deadlock(self):
+        cause = Exception('deadlock detected')
+        cause.pgcode = '40P01'
+        error = OperationalError('deadlock detected')
+        error.__cause__ = cause
+        return error
+
+    @override_settings(STOCK_LOCK_RETRY_BACKOFF=0)
+    def test_deadlock_is_retried_and_counted(self):
+        calls = []
+
+        def checkout():
+            calls.append(1)
+            if len(calls) == 1:
+                raise self._deadlock()
+            return 'done'
+
+        self.assertEqual(run_with_retry(checkout), 'done')
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(retry_stats(), {'retries': 1, 'recovered': 1, 'exhausted': 0})
+
+    @override_settings(STOCK_LOCK_RETRY_BACKOFF=0, STOCK_LOCK_RETRY_ATTEMPTS=2)
+    def test_gives_up_after_configured_attempts(self):
+        def checkout():
+            raise self._deadlock()
+
+        with self.assertRaises(OperationalError), self.assertLogs('app.inventory.locking', 'ERROR') as logs:
+            run_with_retry(checkout)
+        self.assertEqual(retry_stats(), {'retries': 1, 'recovered': 0, 'exhausted': 1})
+        self.assertIn('Giving up on checkout after 2 attempts (1 stock transactions abandoned so far)', logs.output[0])
+
+        user = User.objects.create_superuser(username='ops', password='pass123', email='ops@example.com')
+        EmployeeProfile.objects.create(user=user, role='manager', tenant_id=1)
+        self.client.force_login(user)
+        response = self.client.get(reverse('dashboard:stock_lock_stats_api'))
+        self.assertEqual(response.json(), {'retries': 1, 'recovered': 0, 'exhausted': 1})
+
+    def test_other_database_errors_are_not_retried(self):
+        calls = []
+
+        def checkout():
+            calls.append(1)
+            raise OperationalError('no such table')
+
+        with self.assertRaises(OperationalError):
+            run_with_retry(checkout)
+        self.assertEqual(len(calls), 1)
+
+
+class CatalogSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='cashier', password='pass123')
+        EmployeeProfile.objects.create(user=self.user, role='salesman', tenant_id=102)
+        self.client.force_login(self.user)
+        set_current_tenant(102)
+        self.addCleanup(set_current_tenant, None)
+        self.pen = Product.objects.create(name='Pen', cost=Decimal('1'), price=Decimal('2.50'), model='P', barcode='111')
+        self.ink = Product.objects.create(name='Ink', cost=Decimal('1'), price=Decimal('4.00'), model='I')
+
+    def _fetch(self, **kwargs):
+        return self.client.get(reverse('inventory:catalog_sync'), **kwargs)
+
+    def test_full_snapshot_is_compact_and_versioned(self):
+        response = self._fetch()
+        data = response.json()
+        self.assertTrue(data['full'])
+        self.assertEqual(data['version'], 2)
+        self.assertEqual(data['fields'], ['id', 'name', 'price', 'barcode', 'model'])
+        self.assertEqual(data['products'][0], [self.pen.id, 'Pen', 2.5, '111', 'P'])
+        self.assertEqual(response['ETag'], '"catalog-102-2"')
+
+    def test_delta_returns_changes_and_deletions_since_version(self):
+        self.pen.price = Decimal('3.00')
+        self.pen.save()
+        ink_id = self.ink.id
+        self.ink.delete()
+
+        data = self._fetch(data={'since': 2}).json()
+        self.assertFalse(data['full'])
+        self.assertEqual(data['version'], 4)
+        self.assertEqual([row[0] for row in data['products']], [self.pen.id])
+        self.assertEqual(data['deleted'], [ink_id])
+
+    def test_unchanged_catalog_returns_not_modified(self):
+        etag = self._fetch()['ETag']
+        self.assertEqual(self._fetch(data={'since': 2}, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Product.objects.create(name='Pad', cost=Decimal('1'), price=Decimal('1'), model='D')
+        self.assertEqual(self._fetch(data={'since': 2}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ScanLookupTests(TestCase):
+    def setUp(self):
+        scan.clear()
+        self.addCleanup(scan.clear)
+        self.user = User.objects.create_user(username='scanner', password='pass123')
+        EmployeeProfile.objects.create(user=self.user, role='salesman', tenant_id=103)
+        self.client.force_login(self.user)
+        set_current_tenant(103)
+        self.addCleanup(set_current_tenant, None)
+        self.product = Product.objects.create(
+            name='Tea', cost=Decimal('1'), price=Decimal('5.00'), model='T', barcode='8901', sku='TEA-1'
+        )
+
+    def _scan(self, code):
+        return self.client.get(reverse('inventory:scan_lookup'), {'code': code})
+
+    def test_matches_barcode_then_sku(self):
+        self.assertEqual(self._scan('8901').json()['id'], self.product.id)
+        self.assertEqual(self._scan('TEA-1').json()['name'], 'Tea')
+        self.assertEqual(self._scan('nope').status_code, 404)
+
+    def test_repeat_scans_are_served_from_cache_until_product_changes(self):
+        self.assertEqual(scan.lookup(103, '8901')['price'], 5.0)
+        with self.assertNumQueries(0):
+            scan.lookup(103, '8901')
+
+        self.product.price = Decimal('6.00')
+        self.product.save()
+        self.assertEqual(scan.lookup(103, '8901')['price'], 6.0)
+
+    @override_settings(SCAN_CACHE_SIZE=2)
+    def test_cache_is_bounded_per_tenant(self):
+        for code in ('a', 'b', 'c'):
+            scan.lookup(103, code)
+        with self.assertNumQueries(0):
+            scan.lookup(103, 'c')
+        with self.assertNumQueries(2):
+            scan.lookup(103, 'a')
@@ -15,9 +15,13 @@ urlpatterns = [
     path('upload/<int:product_id>/', views.upload_images, name='upload_images'),
     path('export_inventory/', views.export_inventory, name='export_inventory'),
     path('import_inventory/', views.import_inventory, name='import_inventory'),
+    path('import_jobs/<int:job_id>/', views.import_job_status, name='import_job_status'),
+    path('import_jobs/<int:job_id>/resume/', views.import_job_resume, name='import_job_resume'),
     path('download_template/', views.download_template, name='download_template'),
     path('categories/', views.category_list, name='category_list'),
     path('categories/add/', views.add_category, name='add_category'),
     path('categories/<int:pk>/edit/', views.edit_category, name='edit_category'),
     path('categories/<int:pk>/delete/', views.delete_category, name='delete_category'),
+    path('api/catalog/', views.catalog_sync, name='catalog_sync'),
+    path('api/scan/', views.scan_lookup, name='scan_lookup'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,5 +1,3 @@
-import csv
-import re
 import openpyxl
 from django.conf import settings
 from django.core.files.storage import default_storage
@@ -11,105 +9,52 @@ from app.inventory.forms import (
     InventoryForm,
     CategoryForm,
 )
-from app.inventory.models import Inventory, InventoryImage, Category
+from app.inventory import export, import_jobs, scan
+from app.inventory.catalog import build_catalog, catalog_etag
+from app.inventory.models import CatalogVersion, Inventory, InventoryImage, Category, ImportJob
+from app.inventory.spreadsheet import clean_str, split_image_refs
 from app.storefront.models import StorefrontProductImage
 from app.core.s3_uploader import upload_fileobj, S3UploadError
 from django.contrib.auth.decorators import login_required
 from app.core.decorators import role_required
-from django.http import HttpResponse, JsonResponse
-from decimal import Decimal
-from decimal import InvalidOperation
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from decimal import Decimal, InvalidOperation
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib import messages
 from .models import Product, Inventory
-from django.db import connection, reset_queries, transaction
-from django.db.models import F, Q
-from django.db.models.functions import Lower
+from django.db import connection, reset_queries
+from django.core.paginator import Paginator
+from django.db.models import Count, DecimalField, F, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
 from app.core.tenant_middleware import get_current_tenant
 
 
-def _wants_json(request):
-    return request.headers.get('x-requested-with') == 'XMLHttpRequest' or 'application/json' in request.headers.get('accept', '')
-
-
-def _normalize_header(value):
-    if value is None:
-        return ''
-    return re.sub(r'\s+', ' ', str(value).strip().lower())
+ITEM_PAGE_SIZE = 24
+LOW_STOCK_THRESHOLD = 5
+ITEM_SORTS = {
+    'name': ('name', 'id'),
+    '-name': ('-name', '-id'),
+    'price': ('price', 'id'),
+    '-price': ('-price', '-id'),
+    'stock': ('stock', 'id'),
+    '-stock': ('-stock', '-id'),
+    'newest': ('-created_at', '-id'),
+}
+ITEM_SORT_CHOICES = [
+    ('name', 'Name (A-Z)'),
+    ('-name', 'Name (Z-A)'),
+    ('price', 'Price (low to high)'),
+    ('-price', 'Price (high to low)'),
+    ('stock', 'Stock (low to high)'),
+    ('-stock', 'Stock (high to low)'),
+    ('newest', 'Newest first'),
+]
 
 
-def _parse_decimal(value):
-    cleaned = _normalize_number(value)
-    if cleaned is None:
-        return None
-    try:
-        return Decimal(cleaned)
-    except (InvalidOperation, ValueError, TypeError):
-        return None
-
-
-def _parse_int(value):
-    cleaned = _normalize_number(value)
-    if cleaned is None:
-        return None
-    try:
-        return int(Decimal(cleaned))
-    except (InvalidOperation, ValueError, TypeError):
-        return None
-
-
-def _normalize_number(value):
-    if value is None:
-        return None
-    text = str(value).strip()
-    if not text:
-        return None
-    if text.startswith('(') and text.endswith(')'):
-        text = f"-{text[1:-1]}"
-    text = re.sub(r'[\s\u00A0]', '', text)
-    text = text.replace(',', '')
-    text = re.sub(r'[^0-9.\-]', '', text)
-    return text or None
-
-
-def _clean_str(value):
-    if value is None:
-        return ''
-    return re.sub(r'\s+', ' ', str(value).strip())
-
-
-def _public_media_base():
-    base = getattr(settings, 'PUBLIC_MEDIA_BASE_URL', '')
-    return base.rstrip('/') if base else ''
-
-
-def _build_public_asset_url(value):
-    cleaned = _clean_str(value)
-    if not cleaned:
-        return ''
-    lowered = cleaned.lower()
-    if lowered.startswith('http://') or lowered.startswith('https://'):
-        return cleaned
-    base = _public_media_base()
-    if base:
-        return f"{base}/{cleaned.lstrip('/')}"
-    return cleaned
-
-
-def _split_image_refs(raw_value):
-    if not raw_value:
-        return []
-    if isinstance(raw_value, (list, tuple)):
-        candidates = raw_value
-    else:
-        candidates = re.split(r'[\n,|]+', str(raw_value))
-    normalized = []
-    for candidate in candidates:
-        url = _build_public_asset_url(candidate)
-        if url:
-            normalized.append(url)
-    return normalized
+def _wants_json(request):
+    return request.headers.get('x-requested-with') == 'XMLHttpRequest' or 'application/json' in request.headers.get('accept', '')
 
 
 def _save_uploaded_inventory_files(inventory, uploads):
@@ -170,7 +115,7 @@ def _mirror_inventory_image_to_storefront(inventory_image):
 
 
 def _resolve_category(category_name):
-    normalized = _clean_str(category_name)
+    normalized = clean_str(category_name)
     if not normalized:
         return None
 
@@ -193,133 +138,6 @@ def _resolve_category(category_name):
     return category
 
 
-DEFAULT_FALLBACK_LOCATION = "Warehouse"
-
-
-def _prefetch_categories(category_names):
-    """
-    Return dict mapping lowercase category name -> Category instance for the current tenant (plus shared NULL tenant).
-    """
-    normalized = {name.lower(): name for name in category_names if name}
-    if not normalized:
-        return {}
-
-    tenant_id = get_current_tenant()
-    qs = Category._base_manager.annotate(lower_name=Lower('name'))
-
-    if tenant_id is not None:
-        qs = qs.filter(Q(tenant_id=tenant_id) | Q(tenant_id__isnull=True))
-    else:
-        qs = qs.filter(tenant_id__isnull=True)
-
-    qs = qs.filter(lower_name__in=normalized.keys())
-    return {obj.lower_name: obj for obj in qs}
-
-
-def _prefetch_products(product_names):
-    """
-    Return dict mapping lowercase product name -> Product instance for current tenant.
-    """
-    normalized = {name.lower(): name for name in product_names if name}
-    if not normalized:
-        return {}
-
-    qs = Product.objects.annotate(lower_name=Lower('name')).filter(lower_name__in=normalized.keys())
-    return {obj.lower_name: obj for obj in qs}
-
-
-def _process_inventory_rows(rows):
-    """
-    Given a list of normalized row payloads, upsert products/inventory while minimizing queries.
-    """
-    if not rows:
-        return 0
-
-    category_names = {row['category_name'] for row in rows if row['category_name']}
-    product_names = {row['product_name'] for row in rows}
-
-    category_cache = _prefetch_categories(category_names)
-    product_cache = _prefetch_products(product_names)
-    inventory_cache = {}
-
-    imported = 0
-    for row in rows:
-        category_obj = None
-        if row['category_name']:
-            key = row['category_name'].lower()
-            category_obj = category_cache.get(key)
-            if category_obj is None:
-                category_obj = Category(name=row['category_name'])
-                category_obj.save()
-                category_cache[key] = category_obj
-
-        prod_key = row['product_name'].lower()
-        product = product_cache.get(prod_key)
-        if product is None:
-            product = Product.objects.create(
-                name=row['product_name'],
-                model=row['model_effective'],
-                cost=row['cost'],
-                price=row['price'],
-                description=row['description'],
-                category=category_obj,
-            )
-            product_cache[prod_key] = product
-        else:
-            updated_fields = []
-            if product.cost != row['cost']:
-                product.cost = row['cost']
-                updated_fields.append('cost')
-            if product.price != row['price']:
-                product.price = row['price']
-                updated_fields.append('price')
-            if row['description'] and product.description != row['description']:
-                product.description = row['description']
-                updated_fields.append('description')
-            if category_obj and product.category_id != category_obj.id:
-                product.category = category_obj
-                updated_fields.append('category')
-            if row['model']:
-                if product.model != row['model_effective']:
-                    product.model = row['model_effective']
-                    updated_fields.append('model')
-            elif not getattr(product, 'model', None):
-                product.model = row['model_effective']
-                updated_fields.append('model')
-
-            if updated_fields:
-                product.save(update_fields=updated_fields)
-
-        inv_key = (product.id, row['location'].lower())
-        inventory = inventory_cache.get(inv_key)
-        if inventory is None:
-            inventory = Inventory.objects.filter(product=product, location=row['location']).first()
-            inventory_cache[inv_key] = inventory
-
-        if inventory:
-            update_fields = []
-            if inventory.location != row['location']:
-                inventory.location = row['location']
-                update_fields.append('location')
-            if inventory.quantity != row['quantity']:
-                inventory.quantity = row['quantity']
-                update_fields.append('quantity')
-            if update_fields:
-                inventory.save(update_fields=update_fields)
-        else:
-            inventory = Inventory.objects.create(
-                product=product,
-                location=row['location'],
-                quantity=row['quantity'],
-            )
-            inventory_cache[inv_key] = inventory
-
-        if row.get('image_refs'):
-            _attach_image_urls(inventory, row['image_refs'])
-
-        imported += 1
-
-    return imported
 
 @login_required(login_url='/authentication/login/')
 @role_required(allowed_roles=['admin', 'manager'])
@@ -355,7 +173,7 @@ def create_or_edit_product_info(request, product_id=None):
                 inventory.save()
 
                 uploads = image_form.cleaned_data.get('images')
-                manual_urls = _split_image_refs(image_form.cleaned_data.get('image_urls'))
+                manual_urls = split_image_refs(image_form.cleaned_data.get('image_urls'))
                 uploaded_count = 0
                 url_count = 0
                 if uploads:
@@ -392,57 +210,96 @@ def create_or_edit_product_info(request, product_id=None):
 
     return render(request, 'inventory/page/product_upload_page.html', context)
 
+
+def _product_stock():
+    """Total quantity of a product over all locations, as a correlated subquery."""
+
+    per_product = (
+        Inventory.objects.filter(product=OuterRef('pk')).order_by()
+        .values('product').annotate(total=Sum('quantity')).values('total')
+    )
+    return Coalesce(Subquery(per_product, output_field=IntegerField()), 0)
+
+
+def _product_image():
+    """URL of a product's first inventory image, as a correlated subquery."""
+
+    return Subquery(
+        InventoryImage.objects.filter(inventory__product=OuterRef('pk')).exclude(image_url='')
+        .order_by('id').values('image_url')[:1]
+    )
+
+
 @login_required(login_url='/authentication/login/')
 def item_list_view(request):
-    products = Product.objects.all()
-    inventory_data = Inventory.objects.all()
-
-    product_images = {}
-    image_qs = (
-        InventoryImage.objects.filter(inventory__product__in=products)
-        .order_by('inventory__product_id', 'id')
-        .values('inventory__product_id', 'image_url')
-    )
-    for entry in image_qs:
-        pid = entry['inventory__product_id']
-        if pid not in product_images and entry['image_url']:
-            product_images[pid] = entry['image_url']
-
-    # Create a mapping of product to stock
-    product_inventory = {}
-    for inventory in inventory_data:
-        product_id = inventory.product.id
-        if product_id in product_inventory:
-            product_inventory[product_id] += inventory.quantity
+    """List products a page at a time with their stock, searched, filtered and sorted in SQL."""
+
+    filters = {
+        'q': request.GET.get('q', '').strip(),
+        'category': request.GET.get('category', ''),
+        'min_price': request.GET.get('min_price', '').strip(),
+        'max_price': request.GET.get('max_price', '').strip(),
+        'stock': request.GET.get('stock', ''),
+        'sort': request.GET.get('sort', ''),
+    }
+
+    products = Product.objects.annotate(stock=_product_stock())
+    if filters['q']:
+        products = products.filter(
+            Q(name__icontains=filters['q']) | Q(model__icontains=filters['q']) | Q(sku__iexact=filters['q'])
+        )
+    if filters['category'].isdigit():
+        products = products.filter(category_id=int(filters['category']))
+    else:
+        filters['category'] = ''
+    for key, lookup in (('min_price', 'price__gte'), ('max_price', 'price__lte')):
+        try:
+            value = Decimal(filters[key])
+        except (InvalidOperation, ValueError):
+            value = None
+        if value is not None and value.is_finite():
+            products = products.filter(**{lookup: value})
         else:
-            product_inventory[product_id] = inventory.quantity
-
-    # Add stock data to products
-    product_list = [
-        {
-            'id': product.id,
-            'name': product.name,
-            'category': product.category,
-            'cost': product.cost,
-            'price': product.price,
-            'stock': product_inventory.get(product.id, 0),
-            'image_url': product_images.get(product.id),
-        }
-        for product in products
-    ]
-
-    # Compute total inventory value = sum(price * stock)
-    total_value = sum(
-        Decimal(str(item['price'])) * Decimal(item['stock'])
-        for item in product_list
-    ) if product_list else Decimal('0.00')
-
-    low_stock_count = sum(1 for item in product_list if (item.get('stock') or 0) <= 5)
+            filters[key] = ''
+    if filters['stock'] == 'in_stock':
+        products = products.filter(stock__gt=LOW_STOCK_THRESHOLD)
+    elif filters['stock'] == 'low_stock':
+        products = products.filter(stock__gt=0, stock__lte=LOW_STOCK_THRESHOLD)
+    elif filters['stock'] == 'out_of_stock':
+        products = products.filter(stock__lte=0)
+    else:
+        filters['stock'] = ''
+    if filters['sort'] not in ITEM_SORTS:
+        filters['sort'] = 'name'
+
+    # One pass over the filtered products for the headline numbers; the count doubles as the paginator's.
+    stats = products.aggregate(
+        total_items=Count('id'),
+        total_value=Sum(F('price') * F('stock'), output_field=DecimalField(), default=Decimal('0.00')),
+        low_stock_count=Count('id', filter=Q(stock__lte=LOW_STOCK_THRESHOLD)),
+    )
+
+    paginator = Paginator(
+        products.select_related('category').annotate(image_url=_product_image()).order_by(*ITEM_SORTS[filters['sort']]),
+        ITEM_PAGE_SIZE,
+    )
+    paginator.count = stats['total_items']
+    page = paginator.get_page(request.GET.get('page'))
+
+    query = request.GET.copy()
+    query.pop('page', None)
+
     context = {
-        'products': product_list,
-        'total_items': products.count(),
-        'total_value': total_value,
-        'low_stock_count': low_stock_count,
+        'products': page,
+        'page_range': paginator.get_elided_page_range(page.number),
+        'total_items': stats['total_items'],
+        'total_value': stats['total_value'],
+        'low_stock_count': stats['low_stock_count'],
+        'low_stock_threshold': LOW_STOCK_THRESHOLD,
+        'categories': Category.objects.order_by('name'),
+        'filters': filters,
+        'sort_choices': ITEM_SORT_CHOICES,
+        'filter_query': query.urlencode(),
     }
     return render(request, 'inventory/page/item_list_page.html', context)
 
@@ -485,41 +342,31 @@ def upload_images(request, product_id):
 
 @login_required(login_url='/authentication/login/')
 def export_inventory(request):
-    # Create a workbook and select active worksheet
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Inventory"
-
-    # Add header row
-    headers = [
-        "Product Name", "Model", "Category", "Cost", "Price",
-        "Description", "Location", "Quantity",
-    ]
-    ws.append(headers)
-
-    # Query inventory and product data
-    inventory_items = Inventory.objects.select_related('product').all()
-
-    # Populate rows
-    for item in inventory_items:
-        ws.append([
-            item.product.name,
-            item.product.model or "",
-            item.product.category.name if item.product.category else "",
-            item.product.cost,
-            item.product.price,
-            item.product.description,
-            item.location,
-            item.quantity,
-        ])
-
-    # Create response with content type for Excel
-    response = HttpResponse(
+    """Download the inventory as ``?format=xlsx`` (default) or ``csv``; ``&gzip=1`` compresses a CSV."""
+
+    export_format = request.GET.get('format', 'xlsx').lower()
+    queryset = export.export_queryset()
+
+    if export_format == 'csv':
+        chunks = export.csv_chunks(queryset)
+        file_name = 'inventory.csv'
+        content_type = 'text/csv; charset=utf-8'
+        if request.GET.get('gzip') in ('1', 'true', 'yes'):
+            chunks = export.gzip_chunks(chunks)
+            file_name += '.gz'
+            content_type = 'application/gzip'
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename={file_name}'
+        return response
+
+    if export_format != 'xlsx':
+        return HttpResponse("Unsupported export format. Use xlsx or csv.", status=400)
+    return FileResponse(
+        export.write_xlsx(queryset),
+        as_attachment=True,
+        filename='inventory.xlsx',
         content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
     )
-    response['Content-Disposition'] = 'attachment; filename=inventory.xlsx'
-    wb.save(response)
-    return response
 
 
 @login_required(login_url='/authentication/login/')
@@ -530,165 +377,9 @@ def import_inventory(request):
         messages.error(request, "No file selected or invalid request.")
         return redirect('inventory:item_list')
 
-    file = request.FILES['file']
-    file_name = (file.name or '').lower()
     wants_json = _wants_json(request)
-
-    headers = [
-        "product name", "model", "category", "cost", "price", "description", "location", "quantity", "image urls"
-    ]
-    required_headers = {"product name", "cost", "price", "location", "quantity"}
-    seen_header_map = {}
-    imported_lines = 0
-    errors = []
-    row_payloads = []
-
     try:
-        with transaction.atomic():
-            if file_name.endswith('.xlsx'):
-                wb = openpyxl.load_workbook(file, data_only=True)
-                ws = wb.active
-
-                header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
-                idx_map = {_normalize_header(h): i for i, h in enumerate(header_row or []) if _normalize_header(h)}
-                seen_header_map = idx_map
-
-                missing_required = sorted([h for h in required_headers if h not in idx_map])
-                if missing_required:
-                    msg = f"Missing required columns: {', '.join(missing_required)}"
-                    raise ValueError(msg)
-
-                for row_idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-                    if not row:
-                        continue
-
-                    raw_product = row[idx_map.get('product name')] if idx_map.get('product name') is not None else None
-                    raw_model = row[idx_map.get('model')] if idx_map.get('model') is not None else None
-                    raw_category = row[idx_map.get('category')] if idx_map.get('category') is not None else None
-                    raw_description = row[idx_map.get('description')] if idx_map.get('description') is not None else None
-                    raw_location = row[idx_map.get('location')] if idx_map.get('location') is not None else None
-                    cost_val = row[idx_map.get('cost')] if idx_map.get('cost') is not None else None
-                    price_val = row[idx_map.get('price')] if idx_map.get('price') is not None else None
-                    quantity_val = row[idx_map.get('quantity')] if idx_map.get('quantity') is not None else None
-                    raw_images = row[idx_map.get('image urls')] if idx_map.get('image urls') is not None else None
-
-                    product_name = _clean_str(raw_product)
-                    model_clean = _clean_str(raw_model)
-                    model_effective = model_clean or product_name
-                    category_name = _clean_str(raw_category)
-                    description = _clean_str(raw_description)
-                    location = _clean_str(raw_location) or DEFAULT_FALLBACK_LOCATION
-
-                    cost = _parse_decimal(cost_val)
-                    price = _parse_decimal(price_val)
-                    quantity = _parse_int(quantity_val)
-                    if quantity is not None and quantity < 0:
-                        quantity = 0
-                    image_refs = _split_image_refs(raw_images)
-
-                    missing_bits = []
-                    if not product_name:
-                        missing_bits.append('product name')
-                    if cost is None:
-                        missing_bits.append('cost')
-                    if price is None:
-                        missing_bits.append('price')
-                    if quantity is None:
-                        missing_bits.append('quantity')
-                    if missing_bits:
-                        errors.append(
-                            f"Row {row_idx}: Missing {', '.join(missing_bits)}. "
-                            f"Raw values -> product={raw_product!r}, model={raw_model!r}, "
-                            f"category={raw_category!r}, location={raw_location!r}, "
-                            f"cost={cost_val!r}, price={price_val!r}, quantity={quantity_val!r}"
-                        )
-                        continue
-
-                    row_payloads.append({
-                        'product_name': product_name,
-                        'model': model_clean,
-                        'model_effective': model_effective,
-                        'category_name': category_name,
-                        'description': description[:200] if description else '',
-                        'location': location,
-                        'cost': cost,
-                        'price': price,
-                        'quantity': quantity,
-                        'image_refs': image_refs,
-                    })
-
-            elif file_name.endswith('.csv'):
-                # Minimal CSV support: use the same headers as the xlsx template.
-                decoded = file.read().decode('utf-8-sig')
-                reader = csv.DictReader(decoded.splitlines())
-                if not reader.fieldnames:
-                    raise ValueError("CSV is missing headers.")
-
-                idx_map = {_normalize_header(h): h for h in reader.fieldnames}
-                missing_required = sorted([h for h in required_headers if h not in idx_map])
-                if missing_required:
-                    msg = f"Missing required columns: {', '.join(missing_required)}"
-                    raise ValueError(msg)
-
-                for row_idx, row in enumerate(reader, start=2):
-                    raw_product = row.get(idx_map.get('product name'))
-                    raw_model = row.get(idx_map.get('model'))
-                    raw_location = row.get(idx_map.get('location'))
-                    raw_category = row.get(idx_map.get('category'))
-                    raw_description = row.get(idx_map.get('description'))
-                    raw_cost = row.get(idx_map.get('cost'))
-                    raw_price = row.get(idx_map.get('price'))
-                    raw_quantity = row.get(idx_map.get('quantity'))
-                    raw_images = row.get(idx_map.get('image urls'))
-
-                    product_name = _clean_str(raw_product)
-                    model_clean = _clean_str(raw_model)
-                    location = _clean_str(raw_location) or DEFAULT_FALLBACK_LOCATION
-                    category_name = _clean_str(raw_category)
-                    description = _clean_str(raw_description)
-                    cost = _parse_decimal(raw_cost)
-                    price = _parse_decimal(raw_price)
-                    quantity = _parse_int(raw_quantity)
-                    if quantity is not None and quantity < 0:
-                        quantity = 0
-                    image_refs = _split_image_refs(raw_images)
-
-                    missing_bits = []
-                    if not product_name:
-                        missing_bits.append('product name')
-                    if cost is None:
-                        missing_bits.append('cost')
-                    if price is None:
-                        missing_bits.append('price')
-                    if quantity is None:
-                        missing_bits.append('quantity')
-
-                    if missing_bits:
-                        errors.append(
-                            f"Row {row_idx}: Missing {', '.join(missing_bits)}. "
-                            f"Raw values -> product={raw_product!r}, model={raw_model!r}, "
-                            f"category={raw_category!r}, location={raw_location!r}, "
-                            f"cost={raw_cost!r}, price={raw_price!r}, quantity={raw_quantity!r}"
-                        )
-                        continue
-
-                    row_payloads.append({
-                        'product_name': product_name,
-                        'model': model_clean,
-                        'model_effective': (model_clean or product_name),
-                        'category_name': category_name,
-                        'description': description[:200] if description else '',
-                        'location': location,
-                        'cost': cost,
-                        'price': price,
-                        'quantity': quantity,
-                        'image_refs': image_refs,
-                    })
-            else:
-                raise ValueError("Unsupported file type. Upload a .xlsx or .csv file.")
-
-            imported_lines = _process_inventory_rows(row_payloads)
-
+        job = import_jobs.start_job(request.user, request.FILES['file'])
     except Exception as e:
         if wants_json:
             return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
@@ -697,23 +388,45 @@ def import_inventory(request):
 
     if wants_json:
         return JsonResponse({
-            'status': 'ok',
-            'imported_lines': imported_lines,
-            'error_count': len(errors),
-            'errors': errors[:10],
-        })
-
-    if errors:
-        sample = " | ".join(errors[:3])
+            'status': 'accepted',
+            'job_id': job.pk,
+            'status_url': reverse('inventory:import_job_status', args=[job.pk]),
+        }, status=202)
+
+    job.refresh_from_db()
+    if job.status == ImportJob.STATUS_FAILED:
+        messages.error(request, f"Error during import: {job.message}")
+    elif not job.is_finished:
+        messages.info(request, f"Import of {job.file_name} started. Inventory will update as rows are applied.")
+    elif job.error_count:
+        sample = " | ".join(job.errors[:3])
         messages.warning(
             request,
-            f"Imported with {len(errors)} row errors. Successfully imported {imported_lines} lines. Sample issues: {sample}"
+            f"Imported with {job.error_count} row errors. Successfully imported {job.rows_imported} lines. Sample issues: {sample}"
         )
     else:
-        messages.success(request, f"Inventory imported successfully. Imported {imported_lines} lines.")
+        messages.success(request, f"Inventory imported successfully. Imported {job.rows_imported} lines.")
     return redirect('inventory:item_list')
 
 
+@login_required(login_url='/authentication/login/')
+def import_job_status(request, job_id):
+    job = get_object_or_404(ImportJob, pk=job_id)
+    return JsonResponse(import_jobs.status_payload(job))
+
+
+@login_required(login_url='/authentication/login/')
+def import_job_resume(request, job_id):
+    if request.method != "POST":
+        return JsonResponse({'status': 'error', 'message': 'POST required.'}, status=405)
+    job = get_object_or_404(ImportJob, pk=job_id)
+    if job.status != ImportJob.STATUS_FAILED:
+        return JsonResponse({'status': 'error', 'message': f"Job is {job.status}; only failed jobs can be resumed."}, status=409)
+    import_jobs.schedule(job.pk)
+    job.refresh_from_db()
+    return JsonResponse(import_jobs.status_payload(job), status=202)
+
+
 @login_required(login_url='/authentication/login/')
 def download_template(request):
     wb = openpyxl.Workbook()
@@ -793,3 +506,37 @@ def delete_category(request, pk):
         except Exception as e:
             messages.error(request, 'Cannot delete category. It has associated products.')
     return redirect('inventory:category_list')
+
+
+@login_required(login_url='/authentication/login/')
+def catalog_sync(request):
+    """Product catalog for POS screens: full snapshot, or changes since ``?since=<version>``.
+
+    Responds 304 when the client's ``If-None-Match`` already names the current
+    catalog version.
+    """
+    tenant_id = get_current_tenant()
+    etag = catalog_etag(tenant_id, CatalogVersion.current(tenant_id))
+    if_none_match = [tag.strip().removeprefix('W/') for tag in request.headers.get('If-None-Match', '').split(',')]
+    if etag in if_none_match:
+        response = HttpResponse(status=304)
+    else:
+        try:
+            since = int(request.GET.get('since') or 0)
+        except ValueError:
+            since = 0
+        payload = build_catalog(tenant_id, since=since)
+        response = JsonResponse(payload)
+        etag = catalog_etag(tenant_id, payload['version'])
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@login_required(login_url='/authentication/login/')
+def scan_lookup(request):
+    """Resolve a scanned barcode or SKU (``?code=``) to the product to add to the cart."""
+    product = scan.lookup(get_current_tenant(), request.GET.get('code'))
+    if product is None:
+        return JsonResponse({'error': 'Product not found'}, status=404)
+    return JsonResponse(product)
@@ -0,0 +1,261 @@
+"""Fast path for paid-in-full point-of-sale checkouts."""
+
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from app.customers.models import Customer
+from app.customers.signals import record_paid_invoice
+from app.inventory.locking import lock_inventory, run_with_retry
+from app.inventory.models import Product
+
+from . import summary_deltas, summary_queue
+from .models import CheckoutIdempotencyKey, Invoice, OrderItem, Payment, SalesOrder
+
+
+# Queries of one cash sale inside the caller's transaction, in 'locked' numbering
+# mode, once the tenant's walk-in customer, counters, daily rollup and the user's
+# employee profile exist: whatever the number of cart lines.
+CASH_SALE_QUERIES = 26
+
+
+class InvalidCheckoutItem(ValueError):
+    """Raised when a cart line references an unknown product or carries bad numbers."""
+
+
+def walk_in_customer():
+    """Return the tenant's shared Walk-in Customer (static code "001"), creating it if needed."""
+
+    customer = Customer.objects.filter(name='Walk-in Customer', city='Walk-in', contact='001').first()
+    if not customer:
+        customer = Customer.objects.create(
+            name='Walk-in Customer',
+            city='Walk-in',
+            customer_type='C',
+            contact='001',  # static code
+            email='',
+            shop=''
+        )
+    return customer
+
+
+def _parse_items(items):
+    lines = []
+    for it in items:
+        try:
+            lines.append((int(it['product_id']), int(it['quantity']), it.get('price')))
+        except (KeyError, TypeError, ValueError):
+            raise InvalidCheckoutItem("Invalid item in payload")
+    return lines
+
+
+def quick_checkout(user, items, payment_method='cash', *, products=None, customer=None, locked_inventory=None):
+    """Create a completed, invoiced and fully paid walk-in sale.
+
+    Products are fetched with one ``in_bulk`` query and order lines are
+    bulk-inserted, then handed to ``finalize_order`` instead of being read back.
+    Saving the payment adds it to the invoice's stored totals with one UPDATE,
+    without re-aggregating payments, and both customer ledger entries are written
+    together afterwards. Product sales summaries get one delta or queued refresh
+    per product. Must be called inside a transaction. Returns
+    ``(sales_order, invoice)``.
+
+    Batch callers may pass already loaded ``products`` (an ``in_bulk`` mapping)
+    and the walk-in ``customer`` to share those lookups across sales, and the
+    inventory rows they locked as ``locked_inventory`` so the stock is checked
+    and deducted from those rows without another aggregate or lock.
+    """
+
+    lines = _parse_items(items)
+    if products is None:
+        products = Product.objects.in_bulk({product_id for product_id, _, _ in lines})
+
+    sales_order = SalesOrder.objects.create(
+        customer=customer or walk_in_customer(),
+        customer_type='walk_in',
+        employee=getattr(user, 'employee_profile', None),
+        status='draft'
+    )
+
+    order_items = []
+    for product_id, quantity, price in lines:
+        product = products.get(product_id)
+        if product is None:
+            raise InvalidCheckoutItem("Invalid item in payload")
+        try:
+            price = Decimal(str(price if price is not None else product.price))
+        except InvalidOperation:
+            raise InvalidCheckoutItem("Invalid item in payload")
+        if quantity <= 0:
+            raise InvalidCheckoutItem("Invalid item in payload")
+        order_items.append(OrderItem(
+            sales_order=sales_order,
+            product=product,
+            quantity=quantity,
+            price=price,
+            total_price=quantity * price,
+            tenant_id=sales_order.tenant_id,
+        ))
+    OrderItem.objects.bulk_create(order_items)
+
+    # Finalize order: updates cached_total and deducts inventory + logs StockMovement
+    sales_order.finalize_order(items=order_items, locked_inventory=locked_inventory)
+
+    invoice = Invoice(
+        sales_order=sales_order,
+        total_invoice_amount=sales_order.cached_total,
+        created_by=user,
+    )
+    invoice._ledger_recorded = True
+    invoice.save(force_insert=True)
+    # Saving the payment records it on the invoice, which marks it paid.
+    payment = Payment(
+        invoice=invoice,
+        amount=sales_order.cached_total,
+        payment_method=payment_method,
+        received_by=user
+    )
+    payment._ledger_recorded = True
+    payment.save(force_insert=True)
+    record_paid_invoice(invoice, payment)
+
+    # bulk_create skips the OrderItem signals, so the summaries are updated here.
+    if summary_deltas.enabled():
+        summary_deltas.order_items_added(sales_order, order_items)
+    else:
+        for product_id in {product_id for product_id, _, _ in lines}:
+            summary_queue.mark_dirty(sales_order.tenant_id, product_id, sales_order.created_at)
+    return sales_order, invoice
+
+
+def _checkout_result(sales_order, invoice):
+    return {
+        "order_number": sales_order.order_number,
+        "invoice_number": invoice.invoice_number,
+        "total": float(sales_order.cached_total),
+        "status": "paid",
+    }
+
+
+def _restore(snapshot):
+    for inv, quantity, last_updated in snapshot:
+        inv.quantity = quantity
+        inv.last_updated = last_updated
+
+
+def _process_chunk(user, sales, products, customer):
+    """Check out one chunk of uploaded sales inside a single transaction.
+
+    Inventory for every product in the chunk is locked up front in one query
+    and each sale checks and deducts its stock from those locked rows, so the
+    chunk makes no further availability or lock queries however many sales it
+    holds; a sale that cannot be fulfilled is rejected before it is written.
+    Each sale runs in its own savepoint so one failure does not undo the others.
+    """
+
+    product_ids = {int(it['product_id']) for sale in sales for it in sale['items']}
+    locked = lock_inventory(product_ids, quantity__gt=0)
+
+    results = {}
+    for sale in sales:
+        key = sale['idempotency_key']
+        required = {}
+        for it in sale['items']:
+            required[int(it['product_id'])] = required.get(int(it['product_id']), 0) + int(it['quantity'])
+        if any(pid not in products for pid in required):
+            results[key] = {"status": "error", "error": "Invalid item in payload"}
+            continue
+        available = {}
+        for inv in locked:
+            if inv.product_id in required:
+                available[inv.product_id] = available.get(inv.product_id, 0) + max(inv.quantity, 0)
+        short = [pid for pid, qty in required.items() if available.get(pid, 0) < qty]
+        if short:
+            results[key] = {"status": "error", "error": f"Not enough stock for {products[short[0]].name}"}
+            continue
+
+        # A rolled back savepoint does not undo the deductions made on the locked rows in memory.
+        before = [(inv, inv.quantity, inv.last_updated) for inv in locked if inv.product_id in required]
+        try:
+            with transaction.atomic():
+                sales_order, invoice = quick_checkout(
+                    user, sale['items'], sale.get('payment_method', 'cash'),
+                    products=products, customer=customer, locked_inventory=locked,
+                )
+                response = _checkout_result(sales_order, invoice)
+                CheckoutIdempotencyKey.objects.create(key=key, sales_order=sales_order, response=response)
+        except IntegrityError:
+            _restore(before)
+            # A concurrent upload of the same sale won the race for the key.
+            stored = CheckoutIdempotencyKey.objects.filter(key=key).first()
+            results[key] = (dict(stored.response, status="duplicate") if stored
+                            else {"status": "error", "error": "Could not record sale"})
+            continue
+        except (InvalidCheckoutItem, ValidationError) as e:
+            _restore(before)
+            message = e.messages[0] if isinstance(e, ValidationError) else str(e)
+            results[key] = {"status": "error", "error": message}
+            continue
+        results[key] = dict(response, status="created")
+    return results
+
+
+def checkout_batch(user, sales, chunk_size=None):
+    """Check out a batch of offline sales, each identified by a client ``idempotency_key``.
+
+    Keys seen before (in an earlier upload or earlier in this batch) return the
+    stored result with ``status`` ``"duplicate"`` instead of creating a second
+    sale. New sales are processed in transactions of ``chunk_size`` sales
+    (``CHECKOUT_BATCH_CHUNK_SIZE``), each retried on deadlocks. Returns one
+    result dict per submitted sale, in order.
+    """
+
+    chunk_size = chunk_size or getattr(settings, 'CHECKOUT_BATCH_CHUNK_SIZE', 25)
+    results = [None] * len(sales)
+    pending = {}
+    for index, sale in enumerate(sales):
+        key = str(sale.get('idempotency_key') or '').strip()
+        if not key or len(key) > 64:
+            results[index] = {"idempotency_key": key, "status": "error", "error": "Missing or invalid idempotency_key"}
+            continue
+        try:
+            _parse_items(sale.get('items') or [])
+        except InvalidCheckoutItem as e:
+            results[index] = {"idempotency_key": key, "status": "error", "error": str(e)}
+            continue
+        if not sale.get('items'):
+            results[index] = {"idempotency_key": key, "status": "error", "error": "No items provided"}
+            continue
+        pending.setdefault(key, {'sale': dict(sale, idempotency_key=key), 'indexes': []})['indexes'].append(index)
+
+    stored = {
+        row.key: row.response
+        for row in CheckoutIdempotencyKey.objects.filter(key__in=pending)
+    }
+    new_sales = []
+    for key, entry in pending.items():
+        if key in stored:
+            for index in entry['indexes']:
+                results[index] = dict(stored[key], idempotency_key=key, status="duplicate")
+        else:
+            new_sales.append(entry)
+
+    if new_sales:
+        product_ids = {int(it['product_id']) for entry in new_sales for it in entry['sale']['items']}
+        products = Product.objects.in_bulk(product_ids)
+        customer = walk_in_customer()
+        for start in range(0, len(new_sales), chunk_size):
+            chunk = new_sales[start:start + chunk_size]
+            outcome = run_with_retry(_process_chunk, user, [entry['sale'] for entry in chunk], products, customer)
+            for entry in chunk:
+                key = entry['sale']['idempotency_key']
+                first, *repeats = entry['indexes']
+                results[first] = dict(outcome[key], idempotency_key=key)
+                for index in repeats:
+                    repeat = dict(outcome[key], idempotency_key=key)
+                    if repeat['status'] == 'created':
+                        repeat['status'] = 'duplicate'
+                    results[index] = repeat
+    return results
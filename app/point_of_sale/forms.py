@@ -145,19 +145,8 @@ class RefundForm(forms.ModelForm):
         
         # Set initial values if provided
         if self.invoice:
-            # Calculate available amount for refund
-            total_paid = self.invoice.payments.filter(type='payment').aggregate(
-                total=models.Sum('amount')
-            )['total'] or 0
-            
-            total_refunded = self.invoice.payments.filter(type='refund').aggregate(
-                total=models.Sum('amount')
-            )['total'] or 0
-            
-            available_for_refund = total_paid - total_refunded
-            
-            # Set max value for amount field
-            self.fields['amount'].widget.attrs['max'] = str(available_for_refund)
+            # Set max value for amount field to the net amount still paid
+            self.fields['amount'].widget.attrs['max'] = str(self.invoice.net_paid)
 
     def clean_amount(self):
         amount = self.cleaned_data.get('amount')
@@ -166,18 +155,8 @@ class RefundForm(forms.ModelForm):
             raise forms.ValidationError("Refund amount must be greater than zero.")
         
         if self.invoice:
-            # Get total paid amount (excluding previous refunds)
-            total_paid = self.invoice.payments.filter(type='payment').aggregate(
-                total=models.Sum('amount')
-            )['total'] or 0
-            
-            # Get total refunded amount
-            total_refunded = self.invoice.payments.filter(type='refund').aggregate(
-                total=models.Sum('amount')
-            )['total'] or 0
-            
-            # Available amount for refund
-            available_for_refund = total_paid - total_refunded
+            # Available amount for refund (payments minus previous refunds)
+            available_for_refund = self.invoice.net_paid
             if amount > available_for_refund:
                 raise forms.ValidationError(
                     f"Refund amount cannot exceed the available amount (₹{available_for_refund:.2f})."
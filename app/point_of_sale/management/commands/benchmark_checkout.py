@@ -0,0 +1,100 @@
+import statistics
+import time
+
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from app.core.models import Company
+from app.core.tenant_middleware import set_current_tenant
+from app.customers.models import Customer, CustomerFinancialSnapshot, CustomerLedger
+from app.employee.models import EmployeeProfile
+from app.inventory.models import Inventory, Product, StockMovement
+from app.point_of_sale import checkout
+from app.point_of_sale.models import (
+    InvoiceNumberSequence,
+    OrderNumberSequence,
+    ProductSalesSummary,
+    SalesOrder,
+    TenantDailySales,
+)
+
+
+def _percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure p50/p99 latency and query count of the quick checkout service for cash sales. '
+        'Runs against a throwaway retail tenant and removes its data afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sales', type=int, default=200, help='Checkouts to time.')
+        parser.add_argument('--lines', type=int, default=5, help='Cart lines per checkout.')
+        parser.add_argument('--tenant', type=int, default=990002, help='Tenant/company id used for the run.')
+
+    def handle(self, *args, **options):
+        tenant_id = options['tenant']
+        if Company.objects.filter(id=tenant_id).exists():
+            raise CommandError(f'Company {tenant_id} already exists; pick an unused --tenant.')
+
+        set_current_tenant(tenant_id)
+        try:
+            user, cart = self._setup(tenant_id, options['lines'], options['sales'])
+            # The first sale creates the walk-in customer and counter rows; keep it out of the timings.
+            with transaction.atomic():
+                checkout.quick_checkout(user, cart)
+
+            latencies = []
+            queries = []
+            for _ in range(options['sales']):
+                started = time.perf_counter()
+                with transaction.atomic():
+                    # The budget covers the sale itself, not the commit and post-commit summary refreshes.
+                    with CaptureQueriesContext(connection) as ctx:
+                        checkout.quick_checkout(user, cart)
+                latencies.append((time.perf_counter() - started) * 1000)
+                queries.append(len(ctx.captured_queries))
+        finally:
+            self._cleanup(tenant_id)
+            set_current_tenant(None)
+
+        self.stdout.write(
+            f"{options['sales']} cash sales x {options['lines']} lines: "
+            f"p50={_percentile(latencies, 50):.2f}ms p99={_percentile(latencies, 99):.2f}ms "
+            f"mean={statistics.mean(latencies):.2f}ms queries/sale={max(queries)} "
+            f"(budget {checkout.CASH_SALE_QUERIES})"
+        )
+        if max(queries) > checkout.CASH_SALE_QUERIES:
+            raise CommandError(
+                f'A cash sale took {max(queries)} queries, over the budget of {checkout.CASH_SALE_QUERIES}.'
+            )
+
+    def _setup(self, tenant_id, lines, sales):
+        Company.objects.create(id=tenant_id, name=f'Checkout benchmark {tenant_id}', company_type='retail')
+        user = User.objects.create_user(username=f'checkout-benchmark-{tenant_id}')
+        # Loaded once, as the tenant middleware does for every request.
+        EmployeeProfile.objects.create(user=user, role='salesman', tenant_id=tenant_id)
+        cart = []
+        for i in range(lines):
+            product = Product.objects.create(name=f'Benchmark item {i}', cost=Decimal('1.00'),
+                                             price=Decimal('2.50'), model='BENCH')
+            Inventory.objects.create(product=product, location='Benchmark', quantity=(sales + 1) * 2)
+            cart.append({'product_id': product.id, 'quantity': 2})
+        return user, cart
+
+    def _cleanup(self, tenant_id):
+        for model in (SalesOrder, StockMovement, ProductSalesSummary, TenantDailySales,
+                      OrderNumberSequence, InvoiceNumberSequence, Inventory, Product,
+                      # Deleting ledger rows re-saves the snapshot, so snapshots go after them.
+                      CustomerLedger, CustomerFinancialSnapshot, Customer):
+            model._base_manager.filter(tenant_id=tenant_id).delete()
+        User.objects.filter(username=f'checkout-benchmark-{tenant_id}').delete()
+        Company.objects.filter(id=tenant_id).delete()
@@ -0,0 +1,88 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from app.point_of_sale import numbering
+from app.point_of_sale.models import OrderNumberSequence
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare order numbers allocated per second by each DOCUMENT_NUMBERING_MODE '
+        'under concurrent checkouts. Uses a throwaway tenant id and cleans up afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=400, help='Numbers to allocate per mode.')
+        parser.add_argument('--workers', type=int, default=8, help='Concurrent checkout threads.')
+        parser.add_argument('--hold-ms', type=float, default=5.0,
+                            help='Simulated checkout work done after numbering, inside the transaction.')
+        parser.add_argument('--modes', default='locked,block,sequence')
+        parser.add_argument('--tenant', type=int, default=990001, help='Tenant id used for the run.')
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite':
+            raise CommandError('SQLite serializes all writers; run the benchmark against PostgreSQL or MySQL.')
+
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        for mode in modes:
+            if mode not in (numbering.MODE_LOCKED, numbering.MODE_BLOCK, numbering.MODE_SEQUENCE):
+                raise CommandError(f'Unknown numbering mode: {mode}')
+
+        baseline = None
+        for mode in modes:
+            rate, numbers = self._run(mode, options)
+            duplicates = len(numbers) - len(set(numbers))
+            gaps = (max(numbers) - min(numbers) + 1 - len(set(numbers))) if numbers else 0
+            baseline = baseline or rate
+            self.stdout.write(
+                f"{mode:>8}: {rate:8.1f} orders/sec  ({rate / baseline:.2f}x)  "
+                f"duplicates={duplicates} gaps={gaps}"
+            )
+            if duplicates:
+                self.stdout.write(self.style.ERROR(f'{mode} handed out duplicate numbers'))
+
+    def _run(self, mode, options):
+        tenant_id = options['tenant']
+        per_worker = max(1, options['orders'] // options['workers'])
+        hold = options['hold_ms'] / 1000.0
+        numbers = []
+        numbers_lock = threading.Lock()
+        errors = []
+
+        def checkout_worker():
+            try:
+                for _ in range(per_worker):
+                    with transaction.atomic():
+                        number = numbering.next_value(OrderNumberSequence, tenant_id, mode=mode)
+                        time.sleep(hold)
+                    with numbers_lock:
+                        numbers.append(number)
+            except Exception as exc:  # pragma: no cover - surfaced below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        self._cleanup(tenant_id)
+        threads = [threading.Thread(target=checkout_worker) for _ in range(options['workers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        self._cleanup(tenant_id)
+
+        if errors:
+            raise CommandError(f'{mode} run failed: {errors[0]}')
+        return len(numbers) / elapsed, numbers
+
+    def _cleanup(self, tenant_id):
+        numbering.reset_blocks()
+        OrderNumberSequence._base_manager.filter(tenant_id=tenant_id).delete()
+        if connection.vendor == 'postgresql':
+            name = connection.ops.quote_name(f"{OrderNumberSequence._meta.db_table}_{tenant_id}")
+            with connection.cursor() as cursor:
+                cursor.execute(f"DROP SEQUENCE IF EXISTS {name}")
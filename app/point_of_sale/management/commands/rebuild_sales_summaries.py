@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Min
+from django.utils import timezone
+
+from app.point_of_sale.models import SalesOrder
+from app.point_of_sale.services import (
+    SUMMARY_PERIODS,
+    rebuild_product_sales_summaries,
+    reconcile_product_sales_summaries,
+    summary_periods,
+)
+
+
+def _months(start, end):
+    month = start.replace(day=1)
+    while month <= end:
+        next_month = (month + timedelta(days=32)).replace(day=1)
+        yield max(month, start), min(next_month - timedelta(days=1), end)
+        month = next_month
+
+
+def _years(start, end):
+    for year in range(start.year, end.year + 1):
+        yield max(date(year, 1, 1), start), min(date(year, 12, 31), end)
+
+
+def _chunk_key(chunk):
+    tenant_id, start, _, periods = chunk
+    return (tenant_id, start.isoformat(), '+'.join(periods))
+
+
+def _init_worker():
+    # Spawned workers start without Django; forked ones must not reuse the parent's sockets.
+    django.setup()
+    connections.close_all()
+
+
+def _run_chunk(tenant_id, start, end, periods, dry_run):
+    """Rebuild (or diff) one tenant-month or tenant-year; runs in a worker process."""
+
+    try:
+        if dry_run:
+            return reconcile_product_sales_summaries(start, end, tenant_id=tenant_id, periods=periods, fix=False)
+        return rebuild_product_sales_summaries(tenant_id, start, end, periods=periods)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild ProductSalesSummary rows from order items with one grouped aggregate per tenant, '
+        'month and period (yearly rows per tenant and year), across a process pool. Completed '
+        'chunks are checkpointed so an interrupted run resumes where it stopped; --dry-run '
+        'prints the differences instead of writing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', type=int, action='append',
+                            help='Tenant to rebuild (repeatable). Defaults to every tenant with orders.')
+        parser.add_argument('--start', type=date.fromisoformat, help='First day (YYYY-MM-DD). Defaults to the oldest order.')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last day (YYYY-MM-DD). Defaults to today.')
+        parser.add_argument('--period', choices=SUMMARY_PERIODS,
+                            help='Only rebuild this period. Defaults to every maintained period.')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes; 1 runs the chunks in this process.')
+        parser.add_argument('--checkpoint', help='Progress file used to resume. Defaults to a file in the temp dir.')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and rebuild every chunk.')
+        parser.add_argument('--dry-run', action='store_true', help='Print the diff against stored rows, write nothing.')
+
+    def handle(self, *args, **options):
+        periods = [options['period']] if options['period'] else summary_periods()
+        monthly_periods = tuple(period for period in periods if period != 'yearly')
+        orders = SalesOrder._base_manager.all()
+        if options['tenant']:
+            orders = orders.filter(tenant_id__in=options['tenant'])
+        tenants = options['tenant'] or sorted(
+            orders.exclude(tenant_id=None).values_list('tenant_id', flat=True).distinct().order_by()
+        )
+        start = options['start']
+        if start is None:
+            oldest = orders.aggregate(oldest=Min('created_at'))['oldest']
+            start = timezone.localtime(oldest).date() if oldest else timezone.localdate()
+        end = options['end'] or timezone.localdate()
+        if start > end:
+            raise CommandError('--start must not be after --end.')
+
+        # Yearly rows span many months, so they get their own chunks instead of being
+        # rewritten (and raced for) by every month of the year.
+        chunks = [(tenant_id, month_start, month_end, monthly_periods) for tenant_id in tenants
+                  for month_start, month_end in _months(start, end) if monthly_periods]
+        if 'yearly' in periods:
+            chunks += [(tenant_id, year_start, year_end, ('yearly',)) for tenant_id in tenants
+                       for year_start, year_end in _years(start, end)]
+        checkpoint = options['checkpoint'] or os.path.join(
+            tempfile.gettempdir(),
+            f"sales-summary-rebuild-{'-'.join(map(str, tenants)) or 'none'}-{start}-{end}-{'-'.join(periods)}.json",
+        )
+        done = set()
+        if not options['dry_run'] and not options['restart'] and os.path.exists(checkpoint):
+            with open(checkpoint) as fh:
+                done = {tuple(chunk) for chunk in json.load(fh)['done']}
+            self.stdout.write(f'Resuming from {checkpoint}: {len(done)} chunks already rebuilt.')
+        pending = [chunk for chunk in chunks if _chunk_key(chunk) not in done]
+
+        started = time.monotonic()
+        total = len(chunks)
+        completed = total - len(pending)
+        for chunk, result in self._run(pending, options):
+            completed += 1
+            tenant_id, chunk_start, _, chunk_periods = chunk
+            label = f"[{completed}/{total}] tenant {tenant_id} from {chunk_start} ({'+'.join(chunk_periods)})"
+            if options['dry_run']:
+                self.stdout.write(f'{label}: {len(result)} differences')
+                for entry in result:
+                    self.stdout.write(
+                        f"  product={entry['product_id']} {entry['period']} {entry['period_start']}..{entry['period_end']}: "
+                        f"stored={entry['actual']} rebuilt={entry['expected']}"
+                    )
+                continue
+            done.add(_chunk_key(chunk))
+            with open(checkpoint, 'w') as fh:
+                json.dump({'done': sorted(done)}, fh)
+            self.stdout.write(f'{label}: {result} rows ({time.monotonic() - started:.1f}s)')
+
+        if not options['dry_run'] and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(f'{total} chunks processed in {time.monotonic() - started:.1f}s.')
+
+    def _run(self, chunks, options):
+        if options['workers'] > 1 and connection.vendor == 'sqlite':
+            self.stdout.write('SQLite allows a single writer; running the chunks in this process.')
+            options['workers'] = 1
+        if options['workers'] <= 1:
+            for chunk in chunks:
+                yield chunk, _run_chunk(*chunk, options['dry_run'])
+            return
+
+        # Children must open their own connections rather than share the parent's.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+            futures = {pool.submit(_run_chunk, *chunk, options['dry_run']): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app.point_of_sale.services import reconcile_product_sales_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute product sales summaries for recent periods, report rows that drifted from '
+        'the order items and repair them. Meant to run periodically (e.g. nightly from cron) '
+        "when PRODUCT_SALES_SUMMARY_MODE is 'delta'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=2, help='Days back from today to check.')
+        parser.add_argument('--tenant', type=int, help='Only check this tenant.')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without repairing it.')
+
+    def handle(self, *args, **options):
+        end = timezone.localdate()
+        start = end - timedelta(days=max(options['days'] - 1, 0))
+        drift = reconcile_product_sales_summaries(
+            start, end, tenant_id=options['tenant'], fix=not options['dry_run'],
+        )
+
+        for entry in drift:
+            self.stdout.write(
+                f"tenant={entry['tenant_id']} product={entry['product_id']} {entry['period']} {entry['period_start']}: "
+                f"expected={entry['expected']} stored={entry['actual']}"
+            )
+        action = 'found' if options['dry_run'] else 'repaired'
+        self.stdout.write(f'{len(drift)} drifted summaries {action} between {start} and {end}.')
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.9 on 2026-10-18 17:40
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_tenant_daily_sales(apps, schema_editor):
+    SalesOrder = apps.get_model('point_of_sale', 'SalesOrder')
+    OrderItem = apps.get_model('point_of_sale', 'OrderItem')
+    TenantDailySales = apps.get_model('point_of_sale', 'TenantDailySales')
+
+    tz = timezone.get_current_timezone()
+    order_rows = (
+        SalesOrder.objects.filter(status='completed', tenant_id__isnull=False)
+        .annotate(day=TruncDate('created_at', tzinfo=tz))
+        .values('tenant_id', 'day')
+        .annotate(total_orders=Count('id'), total_customers=Count('customer', distinct=True))
+    )
+    item_rows = (
+        OrderItem.objects.filter(sales_order__status='completed', sales_order__tenant_id__isnull=False)
+        .annotate(day=TruncDate('sales_order__created_at', tzinfo=tz))
+        .values('sales_order__tenant_id', 'day')
+        .annotate(
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum(ExpressionWrapper(
+                F('quantity') * F('price'),
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            )),
+        )
+    )
+    item_map = {(row['sales_order__tenant_id'], row['day']): row for row in item_rows}
+
+    rollups = []
+    for row in order_rows:
+        items = item_map.get((row['tenant_id'], row['day']), {})
+        rollups.append(TenantDailySales(
+            tenant_id=row['tenant_id'],
+            date=row['day'],
+            total_revenue=items.get('total_revenue') or Decimal('0.00'),
+            total_orders=row['total_orders'],
+            total_quantity=items.get('total_quantity') or 0,
+            total_customers=row['total_customers'],
+        ))
+    TenantDailySales.objects.bulk_create(rollups, batch_size=1000)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('point_of_sale', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantDailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.IntegerField(blank=True, editable=False, null=True)),
+                ('date', models.DateField()),
+                ('total_revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('total_orders', models.PositiveIntegerField(default=0)),
+                ('total_quantity', models.PositiveIntegerField(default=0)),
+                ('total_customers', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'tenant_daily_sales',
+                'ordering': ['-date'],
+                'unique_together': {('tenant_id', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_tenant_daily_sales, noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.9 on 2026-10-18 17:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('point_of_sale', '0002_tenantdailysales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckoutIdempotencyKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tenant_id', models.IntegerField(blank=True, editable=False, null=True)),
+                ('key', models.CharField(max_length=64)),
+                ('response', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sales_order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='idempotency_keys', to='point_of_sale.salesorder')),
+            ],
+            options={
+                'db_table': 'checkout_idempotency_key',
+                'unique_together': {('tenant_id', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:09
+
+import calendar
+
+from django.db import migrations, models
+from django.db.models import Count, DateField, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+
+
+def rebuild_daily_summaries(apps, tenant_ids):
+    """Recompute the daily rows of ``tenant_ids`` from their order items, as rebuild_sales_summaries does."""
+
+    OrderItem = apps.get_model('point_of_sale', 'OrderItem')
+    ProductSalesSummary = apps.get_model('point_of_sale', 'ProductSalesSummary')
+
+    revenue_expression = ExpressionWrapper(
+        F('quantity') * F('price'),
+        output_field=DecimalField(max_digits=15, decimal_places=2),
+    )
+    rows = (
+        OrderItem.objects.filter(tenant_id__in=tenant_ids)
+        .annotate(day=TruncDate('sales_order__created_at', output_field=DateField()))
+        .values('tenant_id', 'product_id', 'day')
+        .annotate(
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum(revenue_expression),
+            total_orders=Count('sales_order', distinct=True),
+        )
+        .order_by()
+    )
+    ProductSalesSummary.objects.bulk_create([
+        ProductSalesSummary(
+            tenant_id=row['tenant_id'],
+            product_id=row['product_id'],
+            period='daily',
+            period_start=row['day'],
+            period_end=row['day'],
+            total_quantity=row['total_quantity'] or 0,
+            total_revenue=row['total_revenue'] or 0,
+            total_orders=row['total_orders'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+def label_and_roll_up_summaries(apps, schema_editor):
+    ProductSalesSummary = apps.get_model('point_of_sale', 'ProductSalesSummary')
+
+    # Rows built under PRODUCT_SALES_SUMMARY_PERIOD='monthly' span a whole month.
+    ProductSalesSummary.objects.exclude(period_start=F('period_end')).update(period='monthly')
+
+    # Those tenants have no daily rows to roll up, and their monthly rows cannot be
+    # split into days, so both periods are rebuilt from their order items.
+    tenants = set(ProductSalesSummary.objects.filter(period='monthly').values_list('tenant_id', flat=True))
+    tenants -= set(ProductSalesSummary.objects.filter(period='daily').values_list('tenant_id', flat=True))
+    if tenants:
+        ProductSalesSummary.objects.filter(tenant_id__in=tenants).delete()
+        rebuild_daily_summaries(apps, tenants)
+
+    rows = (
+        ProductSalesSummary.objects.filter(period='daily')
+        .annotate(month=TruncMonth('period_start'))
+        .values('tenant_id', 'product_id', 'month')
+        .annotate(
+            total_quantity=Sum('total_quantity'),
+            total_revenue=Sum('total_revenue'),
+            total_orders=Sum('total_orders'),
+        )
+        .order_by()
+    )
+    monthly = []
+    for row in rows:
+        month = row['month']
+        monthly.append(ProductSalesSummary(
+            tenant_id=row['tenant_id'],
+            product_id=row['product_id'],
+            period='monthly',
+            period_start=month,
+            period_end=month.replace(day=calendar.monthrange(month.year, month.month)[1]),
+            total_quantity=row['total_quantity'],
+            total_revenue=row['total_revenue'],
+            total_orders=row['total_orders'],
+        ))
+    ProductSalesSummary.objects.bulk_create(monthly, batch_size=1000, ignore_conflicts=True)
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('point_of_sale', '0003_checkoutidempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productsalessummary',
+            name='period',
+            field=models.CharField(choices=[('daily', 'Daily'), ('monthly', 'Monthly'), ('yearly', 'Yearly')], default='daily', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='productsalessummary',
+            index=models.Index(fields=['tenant_id', 'period', 'period_start'], name='product_sal_tenant__c4b573_idx'),
+        ),
+        migrations.RunPython(label_and_roll_up_summaries, noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('point_of_sale', '0004_product_sales_summary_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salesorder',
+            index=models.Index(fields=['tenant_id', '-created_at', '-id'], name='sales_order_tenant__2e9470_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesorder',
+            index=models.Index(fields=['tenant_id', 'status', '-created_at', '-id'], name='sales_order_tenant__8f3028_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesorder',
+            index=models.Index(fields=['tenant_id', 'customer', '-created_at', '-id'], name='sales_order_tenant__ca38c2_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:15
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_payment_totals(apps, schema_editor):
+    Invoice = apps.get_model('point_of_sale', 'Invoice')
+    Payment = apps.get_model('point_of_sale', 'Payment')
+
+    def total(payment_type):
+        sums = (
+            Payment.objects.filter(invoice=OuterRef('pk'), type=payment_type)
+            .order_by().values('invoice').annotate(total=Sum('amount')).values('total')
+        )
+        return Coalesce(Subquery(sums), Value(Decimal('0.00')), output_field=models.DecimalField())
+
+    Invoice.objects.update(total_paid=total('payment'), total_refunded=total('refund'))
+    Invoice.objects.update(cached_paid_amount=F('total_paid') - F('total_refunded'))
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('point_of_sale', '0005_sales_order_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='total_paid',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='total_refunded',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15),
+        ),
+        migrations.RunPython(backfill_payment_totals, noop),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['tenant_id', '-date', '-id'], name='invoice_tenant__e68d54_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['tenant_id', 'payment_status', '-date', '-id'], name='invoice_tenant__33f10e_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('point_of_sale', '0006_invoice_payment_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoicenumbersequence',
+            index=models.Index(fields=['tenant_id'], name='invoice_num_tenant__c3d02e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['tenant_id', 'sales_order'], name='order_item_tenant__39609c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['tenant_id', 'product'], name='order_item_tenant__d20920_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ordernumbersequence',
+            index=models.Index(fields=['tenant_id'], name='order_numbe_tenant__291cd5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['tenant_id', '-date'], name='payment_tenant__bbce61_idx'),
+        ),
+    ]
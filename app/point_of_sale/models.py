@@ -2,14 +2,20 @@ from decimal import Decimal
 
 from django.core.exceptions import ValidationError
 from django.db import models, transaction
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual
+from django.utils import timezone
 
 from app.core.models import TenantAwareModel
+from app.core.tenant_context import get_tenant_context
 from app.employee.models import EmployeeProfile
+from app.inventory.locking import lock_inventory
 from app.inventory.models import Inventory, Product, StockMovement, StockMovementType
 from app.customers.models import Customer
 from django.contrib.auth.models import User
 from app.core.tenant_middleware import get_current_tenant
 
+from .numbering import next_value
+
 ORDER_STATUS_CHOICES = [
     ('draft', 'Draft'),
     ('in_transit', 'In Transit'),
@@ -37,18 +43,19 @@ class SalesOrder(TenantAwareModel):
     def total_price(self):
         return sum(item.total_price for item in self.items.all())
 
-    def finalize_order(self):
+    def finalize_order(self, items=None, locked_inventory=None):
         """Finalize order.
         - Retail: deduct inventory now and log SALE.
         - Wholesale: requires in_transit first; on finalize, log SALE records with zero quantity (audit), no inventory change.
+
+        Callers that just created the order's items (with their products) may pass
+        them as ``items`` so they are not read back, and callers already holding
+        the inventory locks may pass the locked rows as ``locked_inventory``.
         """
         if self.status == 'completed':
             raise ValidationError("Order is already completed.")
 
-        # Determine company type lazily to avoid circular imports
-        from app.core.models import Company
-        company = Company.objects.filter(id=self.tenant_id).first()
-        is_wholesale = bool(company and company.company_type == 'wholesale')
+        is_wholesale = get_tenant_context(self.tenant_id).is_wholesale
 
         with transaction.atomic():
             if is_wholesale:
@@ -60,9 +67,9 @@ class SalesOrder(TenantAwareModel):
                     related_sales_order=self,
                     change_type=StockMovementType.SALE_IN_TRANSIT,
                 )
-                for mv in transit_moves:
-                    StockMovement.objects.create(
-                        product=mv.product,
+                StockMovement.objects.bulk_create([
+                    StockMovement(
+                        product_id=mv.product_id,
                         location=mv.location,
                         change_type=StockMovementType.SALE,
                         quantity_change=0,
@@ -70,96 +77,231 @@ class SalesOrder(TenantAwareModel):
                         tenant_id=self.tenant_id,
                         note=f"Finalized from in-transit for SO {self.order_number or self.id}"
                     )
+                    for mv in transit_moves
+                ])
 
                 self.cached_total = self.total_price
                 self.status = 'completed'
                 self.save()
+                self.refresh_daily_sales()
                 return
 
             # Retail flow: validate and deduct now
-            # Validate inventory availability across ALL locations for each item
-            for item in self.items.select_related('product').all():
-                total_available = (Inventory.objects
-                                   .filter(product=item.product)
-                                   .aggregate(total=models.Sum('quantity'))['total'] or 0)
-                if total_available < item.quantity:
-                    raise ValidationError(f"Not enough stock for {item.product.name}")
-
-            for item in self.items.select_related('product').all():
-                qty_to_deduct = item.quantity
-                inventories = list(Inventory.objects.select_for_update()
-                                   .filter(product=item.product, quantity__gt=0)
-                                   .order_by('-quantity'))
-                for inv in inventories:
-                    if qty_to_deduct <= 0:
-                        break
-                    deduct = min(inv.quantity, qty_to_deduct)
-                    inv.quantity -= deduct
-                    inv.save()
-                    qty_to_deduct -= deduct
-                    StockMovement.objects.create(
-                        product=item.product,
-                        location=inv.location,
-                        change_type=StockMovementType.SALE,
-                        quantity_change=-(deduct),
-                        related_sales_order=self,
-                        tenant_id=self.tenant_id,
-                        note=f"SO {self.order_number or self.id} finalized"
-                    )
-                if qty_to_deduct > 0:
-                    raise ValidationError(f"Insufficient stock while deducting for {item.product.name}")
-
-            self.cached_total = self.total_price
+            items = self._deduct_stock(
+                StockMovementType.SALE,
+                f"SO {self.order_number or self.id} finalized",
+                items,
+                locked_inventory,
+            )
+
+            self.cached_total = sum(item.total_price for item in items)
             self.status = 'completed'
             self.save()
+            self.refresh_daily_sales()
 
     def mark_in_transit(self):
         """Wholesale flow: deduct inventory now and log SALE_IN_TRANSIT, set status to in_transit."""
         if self.status not in ['draft']:
             raise ValidationError("Only draft orders can be moved to In Transit.")
 
-        from app.core.models import Company
-        company = Company.objects.filter(id=self.tenant_id).first()
-        is_wholesale = bool(company and company.company_type == 'wholesale')
-        if not is_wholesale:
+        if not get_tenant_context(self.tenant_id).is_wholesale:
             raise ValidationError("In Transit status is only applicable to wholesale.")
 
         with transaction.atomic():
-            # Validate inventory availability across ALL locations for each item
-            for item in self.items.select_related('product').all():
-                total_available = (Inventory.objects
-                                   .filter(product=item.product)
-                                   .aggregate(total=models.Sum('quantity'))['total'] or 0)
-                if total_available < item.quantity:
-                    raise ValidationError(f"Not enough stock for {item.product.name}")
-
-            for item in self.items.select_related('product').all():
-                qty_to_deduct = item.quantity
-                inventories = list(Inventory.objects.select_for_update()
-                                   .filter(product=item.product, quantity__gt=0)
-                                   .order_by('-quantity'))
-                for inv in inventories:
-                    if qty_to_deduct <= 0:
-                        break
-                    deduct = min(inv.quantity, qty_to_deduct)
-                    inv.quantity -= deduct
-                    inv.save()
-                    qty_to_deduct -= deduct
-                    StockMovement.objects.create(
-                        product=item.product,
-                        location=inv.location,
-                        change_type=StockMovementType.SALE_IN_TRANSIT,
-                        quantity_change=-(deduct),
-                        related_sales_order=self,
-                        tenant_id=self.tenant_id,
-                        note=f"SO {self.order_number or self.id} moved to in-transit"
-                    )
-                if qty_to_deduct > 0:
-                    raise ValidationError(f"Insufficient stock while deducting for {item.product.name}")
+            items = self._deduct_stock(
+                StockMovementType.SALE_IN_TRANSIT,
+                f"SO {self.order_number or self.id} moved to in-transit",
+            )
 
-            self.cached_total = self.total_price
+            self.cached_total = sum(item.total_price for item in items)
             self.status = 'in_transit'
             self.save()
+            # An edited order may leave the completed rollup when it goes back to transit.
+            self.refresh_daily_sales()
+
+    def _deduct_stock(self, change_type, note, items=None, locked_inventory=None):
+        """Validate and deduct stock for every line with a fixed number of queries.
+
+        Returns the order items that were deducted (loaded unless ``items`` is given).
+        """
+        if items is None:
+            items = list(self.items.select_related('product'))
+        required = {}
+        products = {}
+        for item in items:
+            required[item.product_id] = required.get(item.product_id, 0) + item.quantity
+            products[item.product_id] = item.product
+        self._deduct_quantities(required, change_type, note, products, locked_inventory)
+        return items
+
+    def _deduct_quantities(self, required, change_type, note, products=None, locked_inventory=None):
+        """Deduct ``{product_id: quantity}`` from inventory and log the movements.
+
+        One grouped aggregate checks availability across all locations, one
+        ``select_for_update`` locks every candidate inventory row in
+        (product_id, location) order, then the deductions and their
+        StockMovement audit rows are written in bulk.
+
+        ``locked_inventory`` is a list of rows the caller already locked in this
+        transaction (for several orders at once); availability is then read from
+        those rows and no query is made until the writes. The rows are updated in
+        place.
+        """
+        if not required:
+            return
+
+        def name(product_id):
+            if products and product_id in products:
+                return products[product_id].name
+            return Product.objects.filter(pk=product_id).values_list('name', flat=True).first()
+
+        if locked_inventory is not None:
+            locked = [inv for inv in locked_inventory if inv.product_id in required and inv.quantity > 0]
+            available = {}
+            for inv in locked:
+                available[inv.product_id] = available.get(inv.product_id, 0) + inv.quantity
+        else:
+            available = dict(
+                Inventory.objects.filter(product_id__in=required)
+                .values('product_id')
+                .annotate(total=models.Sum('quantity'))
+                .values_list('product_id', 'total')
+            )
+        for product_id, quantity in required.items():
+            if (available.get(product_id) or 0) < quantity:
+                raise ValidationError(f"Not enough stock for {name(product_id)}")
+
+        if locked_inventory is None:
+            locked = lock_inventory(required, quantity__gt=0)
+        # Locks are taken in a fixed order; stock is still drawn from the largest location first.
+        inventories = sorted(locked, key=lambda inv: (inv.product_id, -inv.quantity, inv.id))
+
+        now = timezone.now()
+        updated = []
+        movements = []
+        remaining = dict(required)
+        for inv in inventories:
+            qty_to_deduct = remaining[inv.product_id]
+            if qty_to_deduct <= 0:
+                continue
+            deduct = min(inv.quantity, qty_to_deduct)
+            inv.quantity -= deduct
+            inv.last_updated = now
+            updated.append(inv)
+            remaining[inv.product_id] = qty_to_deduct - deduct
+            movements.append(StockMovement(
+                product_id=inv.product_id,
+                location=inv.location,
+                change_type=change_type,
+                quantity_change=-(deduct),
+                related_sales_order=self,
+                tenant_id=self.tenant_id,
+                note=note,
+            ))
+
+        for product_id, qty_left in remaining.items():
+            if qty_left > 0:
+                raise ValidationError(f"Insufficient stock while deducting for {name(product_id)}")
+
+        Inventory.objects.bulk_update(updated, ['quantity', 'last_updated'])
+        StockMovement.objects.bulk_create(movements)
+
+    def reverse_stock_deductions(self):
+        """Put back the stock deducted for this order's current items."""
+        to_reverse = {}
+        for it in self.items.all():
+            to_reverse[it.product_id] = to_reverse.get(it.product_id, 0) + int(it.quantity)
+        self._restore_quantities(to_reverse, f"Reversal for editing SO {self.order_number or self.id}")
+
+    def _restore_quantities(self, to_reverse, note):
+        """Return ``{product_id: quantity}`` of previously deducted stock to inventory.
+
+        Prior SALE (or SALE_IN_TRANSIT for wholesale) movements are walked from
+        latest to oldest; the inventory rows they touched are locked in
+        (product_id, location) order and an ADJUSTMENT is logged per movement.
+        """
+        to_reverse = {product_id: qty for product_id, qty in to_reverse.items() if qty > 0}
+        if not to_reverse:
+            return
+
+        # If order is completed but has in-transit movements, reverse those (wholesale flow).
+        change_type = StockMovementType.SALE_IN_TRANSIT if (
+            self.status == 'in_transit' or
+            StockMovement.objects.filter(related_sales_order=self,
+                                         change_type=StockMovementType.SALE_IN_TRANSIT).exists()
+        ) else StockMovementType.SALE
+
+        prior_moves = (StockMovement.objects.select_for_update()
+                       .filter(related_sales_order=self, change_type=change_type,
+                               product_id__in=to_reverse)
+                       .order_by('-created_at', '-id'))
+        restore = {}
+        movements = []
+        for mv in prior_moves:
+            remaining = to_reverse.get(mv.product_id, 0)
+            if remaining <= 0:
+                continue
+            qty_to_add = min(-int(mv.quantity_change), remaining)  # SALE is negative
+            if qty_to_add <= 0:
+                continue
+            key = (mv.product_id, mv.location)
+            restore[key] = restore.get(key, 0) + qty_to_add
+            movements.append(StockMovement(
+                product_id=mv.product_id,
+                location=mv.location,
+                change_type=StockMovementType.ADJUSTMENT,
+                quantity_change=qty_to_add,
+                related_sales_order=self,
+                tenant_id=self.tenant_id,
+                note=note,
+            ))
+            to_reverse[mv.product_id] = remaining - qty_to_add
+            if all(qty <= 0 for qty in to_reverse.values()):
+                break
+        if not restore:
+            return
+
+        inventories = {}
+        for inv in lock_inventory({product_id for product_id, _ in restore},
+                                  locations={location for _, location in restore}):
+            inventories.setdefault((inv.product_id, inv.location), inv)
+
+        now = timezone.now()
+        updated = []
+        for key in sorted(restore):
+            inv = inventories.get(key)
+            if inv is None:
+                product_id, location = key
+                Inventory.objects.create(product_id=product_id, location=location,
+                                         quantity=restore[key], tenant_id=self.tenant_id)
+                continue
+            inv.quantity += restore[key]
+            inv.last_updated = now
+            updated.append(inv)
+        Inventory.objects.bulk_update(updated, ['quantity', 'last_updated'])
+        StockMovement.objects.bulk_create(movements)
+
+    def adjust_stock(self, deltas, change_type, note):
+        """Apply net per-product quantity changes to stock that is already deducted.
+
+        Positive deltas are deducted and logged as ``change_type``; negative ones
+        are returned to the locations they were taken from and logged as
+        ADJUSTMENT. Products with a zero delta are not touched.
+        """
+        deltas = {product_id: delta for product_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        # Lock every affected product up front, in the usual order, so restoring one
+        # product and deducting another cannot interleave with another edit.
+        lock_inventory(deltas)
+        self._restore_quantities({product_id: -delta for product_id, delta in deltas.items() if delta < 0}, note)
+        self._deduct_quantities({product_id: delta for product_id, delta in deltas.items() if delta > 0},
+                                change_type, note)
+
+    def refresh_daily_sales(self):
+        """Recompute the TenantDailySales row for the day this order belongs to."""
+        from .services import refresh_tenant_daily_sales
+        refresh_tenant_daily_sales(self.tenant_id, self.created_at)
 
     def __str__(self):
         return f"Order #{self.id} - {self.customer.name or 'Walk-in Customer'}"
@@ -170,6 +312,12 @@ class SalesOrder(TenantAwareModel):
         permissions = [
             ("view_reports", "Can view analytics and reports"),
         ]
+        # Newest-first keyset pages of the order list, unfiltered or by status/customer.
+        indexes = [
+            models.Index(fields=['tenant_id', '-created_at', '-id']),
+            models.Index(fields=['tenant_id', 'status', '-created_at', '-id']),
+            models.Index(fields=['tenant_id', 'customer', '-created_at', '-id']),
+        ]
 
     def save(self, *args, **kwargs):
         # Ensure tenant_id is present before generating order number
@@ -186,19 +334,16 @@ class OrderNumberSequence(TenantAwareModel):
 
     class Meta:
         db_table = 'order_number_sequence'
+        indexes = [
+            models.Index(fields=['tenant_id']),
+        ]
 
     @classmethod
     def next_number(cls, tenant_id):
         if not tenant_id:
             # Fallback to 1 if tenant unknown; still avoids global collisions
             return f"SO-{1:05d}"
-        with transaction.atomic():
-            seq = cls._base_manager.select_for_update().filter(tenant_id=tenant_id).first()
-            if not seq:
-                seq = cls(tenant_id=tenant_id, last_number=0)
-            seq.last_number += 1
-            seq.save()
-            return f"SO-{seq.last_number:05d}"
+        return f"SO-{next_value(cls, tenant_id):05d}"
 
 
 class InvoiceNumberSequence(TenantAwareModel):
@@ -207,19 +352,16 @@ class InvoiceNumberSequence(TenantAwareModel):
 
     class Meta:
         db_table = 'invoice_number_sequence'
+        indexes = [
+            models.Index(fields=['tenant_id']),
+        ]
 
     @classmethod
     def next_number(cls, tenant_id):
         if not tenant_id:
             # Fallback to 1 if tenant unknown; still avoids global collisions
             return f"INV-{1:05d}"
-        with transaction.atomic():
-            seq = cls._base_manager.select_for_update().filter(tenant_id=tenant_id).first()
-            if not seq:
-                seq = cls(tenant_id=tenant_id, last_number=0)
-            seq.last_number += 1
-            seq.save()
-            return f"INV-{seq.last_number:05d}"
+        return f"INV-{next_value(cls, tenant_id):05d}"
 
 
 class OrderItem(TenantAwareModel):
@@ -241,12 +383,28 @@ class OrderItem(TenantAwareModel):
 
     class Meta:
         db_table = 'order_item'
+        # Items of an order, and a product's sales.
+        indexes = [
+            models.Index(fields=['tenant_id', 'sales_order']),
+            models.Index(fields=['tenant_id', 'product']),
+        ]
 
 
 class ProductSalesSummary(TenantAwareModel):
-    """Denormalized rollup of product sales for quick dashboard queries."""
+    """Denormalized rollup of product sales for quick dashboard queries.
+
+    Daily rows are always kept; monthly and yearly rows are derived from them
+    when enabled in ``PRODUCT_SALES_SUMMARY_ROLLUPS``.
+    """
+
+    PERIOD_CHOICES = [
+        ('daily', 'Daily'),
+        ('monthly', 'Monthly'),
+        ('yearly', 'Yearly'),
+    ]
 
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='sales_summaries')
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES, default='daily')
     period_start = models.DateField()
     period_end = models.DateField()
     total_quantity = models.PositiveIntegerField(default=0)
@@ -260,12 +418,31 @@ class ProductSalesSummary(TenantAwareModel):
         indexes = [
             models.Index(fields=['period_start', 'period_end']),
             models.Index(fields=['-total_quantity']),
+            models.Index(fields=['tenant_id', 'period', 'period_start']),
         ]
 
     def __str__(self):
         return f"{self.product} [{self.period_start} - {self.period_end}]"
 
 
+class TenantDailySales(TenantAwareModel):
+    """Per-tenant daily rollup of completed sales, kept current as orders complete."""
+
+    date = models.DateField()
+    total_revenue = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal('0.00'))
+    total_orders = models.PositiveIntegerField(default=0)
+    total_quantity = models.PositiveIntegerField(default=0)
+    total_customers = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = 'tenant_daily_sales'
+        ordering = ['-date']
+        unique_together = (('tenant_id', 'date'),)
+
+    def __str__(self):
+        return f"Sales for tenant {self.tenant_id} on {self.date}"
+
+
 class Invoice(TenantAwareModel):
     PAYMENT_STATUS_CHOICE = [
         ('unpaid', 'Unpaid'),
@@ -278,47 +455,73 @@ class Invoice(TenantAwareModel):
     payment_status = models.CharField(max_length=20, choices=PAYMENT_STATUS_CHOICE, default='unpaid')
     invoice_number = models.CharField(max_length=20, blank=True, null=True)
     cached_paid_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Running sums of the invoice's payments and refunds, kept current by Payment.save().
+    total_paid = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    total_refunded = models.DecimalField(max_digits=15, decimal_places=2, default=0)
     total_invoice_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='invoices_created')
     notes = models.TextField(blank=True, null=True)
 
+    @property
+    def net_paid(self):
+        return self.total_paid - self.total_refunded
+
+    @property
+    def has_refunds(self):
+        return self.total_refunded > 0
+
     def paid_amount(self):
-        total_payments = self.payments.filter(type='payment').aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        
-        total_refunds = self.payments.filter(type='refund').aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        
-        return total_payments - total_refunds
+        return self.net_paid
+
+    def _status_for(self, net_paid):
+        total_price = self.sales_order.cached_total
+        if net_paid >= total_price:
+            return 'paid'
+        if net_paid > 0:
+            return 'partially_paid'
+        return 'unpaid'
+
+    def record_payment(self, payment):
+        """Add a newly created payment or refund to the stored totals with a single UPDATE.
+
+        The increments are applied in SQL, so concurrent payments on the same
+        invoice cannot overwrite each other.
+        """
+
+        amount = payment.amount
+        paid, refunded = (Decimal('0'), amount) if payment.type == 'refund' else (amount, Decimal('0'))
+        net_after = models.F('total_paid') + paid - models.F('total_refunded') - refunded
+        total_price = self.sales_order.cached_total
+        Invoice._base_manager.filter(pk=self.pk).update(
+            total_paid=models.F('total_paid') + paid,
+            total_refunded=models.F('total_refunded') + refunded,
+            cached_paid_amount=net_after,
+            payment_status=models.Case(
+                models.When(GreaterThanOrEqual(net_after, total_price), then=models.Value('paid')),
+                models.When(GreaterThan(net_after, 0), then=models.Value('partially_paid')),
+                default=models.Value('unpaid'),
+            ),
+        )
+        self.total_paid += paid
+        self.total_refunded += refunded
+        self.cached_paid_amount = self.net_paid
+        self.payment_status = self._status_for(self.net_paid)
 
     def update_cached_paid_amount(self):
-        total_paid = self.paid_amount()
-        self.cached_paid_amount = total_paid
+        """Recompute the payment totals from the payments with one conditional aggregate."""
+
+        totals = self.payments.aggregate(
+            paid=models.Sum('amount', filter=models.Q(type='payment'), default=Decimal('0')),
+            refunded=models.Sum('amount', filter=models.Q(type='refund'), default=Decimal('0')),
+        )
+        self.total_paid = totals['paid']
+        self.total_refunded = totals['refunded']
+        self.cached_paid_amount = self.net_paid
         self.update_payment_status()
         self.save()
 
     def update_payment_status(self):
-        total_price = self.sales_order.cached_total
-        
-        # Calculate net paid amount (payments - refunds)
-        total_payments = self.payments.filter(type='payment').aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        
-        total_refunds = self.payments.filter(type='refund').aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        
-        net_paid_amount = total_payments - total_refunds
-        
-        if net_paid_amount >= total_price:
-            self.payment_status = 'paid'
-        elif net_paid_amount > 0:
-            self.payment_status = 'partially_paid'
-        else:
-            self.payment_status = 'unpaid'
+        self.payment_status = self._status_for(self.net_paid)
 
     def __str__(self):
         return f"Invoice #{self.invoice_number or self.id}"
@@ -326,6 +529,11 @@ class Invoice(TenantAwareModel):
     class Meta:
         db_table = 'invoice'
         unique_together = (('tenant_id', 'invoice_number'),)
+        # Newest-first keyset pages of the invoice list, unfiltered or by payment status.
+        indexes = [
+            models.Index(fields=['tenant_id', '-date', '-id']),
+            models.Index(fields=['tenant_id', 'payment_status', '-date', '-id']),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.tenant_id:
@@ -360,8 +568,35 @@ class Payment(TenantAwareModel):
     type = models.CharField(max_length=10, choices=PAYMENT_TYPE_CHOICES, default='payment')
     received_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='payments_received')
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                self.invoice.record_payment(self)
+
     def __str__(self):
         return f"Payment of {self.amount} for Invoice {self.invoice.invoice_number or self.invoice.id}"
 
     class Meta:
         db_table = 'payment'
+        indexes = [
+            models.Index(fields=['tenant_id', '-date']),
+        ]
+
+
+class CheckoutIdempotencyKey(TenantAwareModel):
+    """Client-generated key of an uploaded sale, so replayed uploads return the original result."""
+
+    key = models.CharField(max_length=64)
+    sales_order = models.ForeignKey(SalesOrder, on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='idempotency_keys')
+    response = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'checkout_idempotency_key'
+        unique_together = (('tenant_id', 'key'),)
+
+    def __str__(self):
+        return f"Checkout key {self.key}"
@@ -0,0 +1,153 @@
+"""Per-tenant document number allocation for sales orders and invoices.
+
+``DOCUMENT_NUMBERING_MODE`` selects the strategy:
+
+* ``locked`` (default): lock the tenant's counter row for every number. Numbers
+  are gapless, but every checkout in a tenant waits on that row until its
+  transaction commits.
+* ``block``: each worker process reserves ``DOCUMENT_NUMBERING_BLOCK_SIZE``
+  numbers at a time and hands them out from memory, so the counter row is
+  locked once per block. Numbers stay unique but may be issued out of order
+  across workers, and up to a block of numbers is skipped when a worker exits.
+* ``sequence``: use a PostgreSQL sequence per tenant and counter table.
+  ``nextval`` never blocks, and a rolled-back checkout leaves a gap. Other
+  database backends fall back to ``block``.
+
+Switching between ``sequence`` and the counter modes is safe once every worker
+runs the new mode: each process moves the counter row past the sequence (or
+the sequence past the counter) the first time it numbers for a tenant.
+"""
+
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+MODE_LOCKED = 'locked'
+MODE_BLOCK = 'block'
+MODE_SEQUENCE = 'sequence'
+
+DEFAULT_BLOCK_SIZE = 20
+
+_lock = threading.Lock()
+# (counter table, tenant_id) -> [next number to hand out, last reserved number]
+_blocks = {}
+# Sequences created (and caught up with the counter) in committed transactions.
+_known_sequences = set()
+# Counters caught up with their tenant's sequence in committed transactions.
+_synced_counters = set()
+
+
+def _mode():
+    return getattr(settings, 'DOCUMENT_NUMBERING_MODE', MODE_LOCKED)
+
+
+def _block_size():
+    return max(1, int(getattr(settings, 'DOCUMENT_NUMBERING_BLOCK_SIZE', DEFAULT_BLOCK_SIZE)))
+
+
+def _sequence_name(counter_model, tenant_id):
+    return f"{counter_model._meta.db_table}_{int(tenant_id)}"
+
+
+def _issued_by_sequence(cursor, counter_model, tenant_id):
+    """Last number handed out by the tenant's PostgreSQL sequence, or 0 if there is none."""
+
+    name = _sequence_name(counter_model, tenant_id)
+    cursor.execute("SELECT to_regclass(%s)", [connection.ops.quote_name(name)])
+    if cursor.fetchone()[0] is None:
+        return 0
+    cursor.execute(f"SELECT last_value, is_called FROM {connection.ops.quote_name(name)}")
+    last_value, is_called = cursor.fetchone()
+    return last_value if is_called else last_value - 1
+
+
+def _advance(counter_model, tenant_id, step):
+    """Move the tenant's counter forward by ``step`` under a row lock and return its new value."""
+
+    # No savepoint: nothing here is caught, and a failure aborts the caller's transaction anyway.
+    with transaction.atomic(savepoint=False):
+        seq = counter_model._base_manager.select_for_update().filter(tenant_id=tenant_id).first()
+        if not seq:
+            seq = counter_model(tenant_id=tenant_id, last_number=0)
+        key = (counter_model._meta.db_table, tenant_id)
+        if connection.vendor == 'postgresql' and key not in _synced_counters:
+            # Numbers issued while the tenant was in sequence mode never reached the counter.
+            with connection.cursor() as cursor:
+                seq.last_number = max(seq.last_number, _issued_by_sequence(cursor, counter_model, tenant_id))
+            transaction.on_commit(lambda: _synced_counters.add(key))
+        seq.last_number += step
+        seq.save()
+        return seq.last_number
+
+
+def _block_next(counter_model, tenant_id):
+    key = (counter_model._meta.db_table, tenant_id)
+    with _lock:
+        block = _blocks.get(key)
+        if block and block[0] <= block[1]:
+            number = block[0]
+            block[0] += 1
+            return number
+
+    size = _block_size()
+    end = _advance(counter_model, tenant_id, size)
+    start = end - size + 1
+    if start < end:
+        def publish():
+            with _lock:
+                _blocks[key] = [start + 1, end]
+
+        # The rest of the block only becomes shared once the reservation commits; if the
+        # surrounding transaction rolls back, the counter rolls back with it.
+        transaction.on_commit(publish)
+    return start
+
+
+def _sequence_next(counter_model, tenant_id):
+    name = _sequence_name(counter_model, tenant_id)
+    quoted = connection.ops.quote_name(name)
+    with connection.cursor() as cursor:
+        if name not in _known_sequences:
+            last_number = (
+                counter_model._base_manager.filter(tenant_id=tenant_id)
+                .values_list('last_number', flat=True).first()
+            ) or 0
+            try:
+                with transaction.atomic():
+                    cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS {quoted} START WITH {int(last_number) + 1}")
+            except IntegrityError:
+                # Another worker created it concurrently (IF NOT EXISTS is not race-free).
+                pass
+            # Numbers issued by the counter modes since the sequence was created must not repeat.
+            cursor.execute(
+                f"SELECT setval(%s, %s) FROM {quoted} WHERE last_value < %s",
+                [quoted, int(last_number), int(last_number)],
+            )
+            # Remembered only once the CREATE has committed; a rollback drops the sequence too.
+            transaction.on_commit(lambda: _known_sequences.add(name))
+        cursor.execute("SELECT nextval(%s)", [quoted])
+        return cursor.fetchone()[0]
+
+
+def next_value(counter_model, tenant_id, mode=None):
+    """Return the next number for ``tenant_id`` from ``counter_model``.
+
+    ``mode`` defaults to ``DOCUMENT_NUMBERING_MODE``.
+    """
+
+    mode = mode or _mode()
+    if mode == MODE_SEQUENCE and connection.vendor == 'postgresql':
+        return _sequence_next(counter_model, tenant_id)
+    if mode in (MODE_BLOCK, MODE_SEQUENCE):
+        return _block_next(counter_model, tenant_id)
+    return _advance(counter_model, tenant_id, 1)
+
+
+def reset_blocks():
+    """Forget numbers reserved by this process (the unused ones become gaps)."""
+
+    with _lock:
+        _blocks.clear()
+        _known_sequences.clear()
+        _synced_counters.clear()
@@ -0,0 +1,112 @@
+"""Apply an edited set of order lines to an existing sales order by diffing it."""
+
+from decimal import Decimal, InvalidOperation
+
+from app.core.tenant_context import get_tenant_context
+from app.inventory.models import Product, StockMovementType
+
+from .models import OrderItem
+
+
+def parse_lines(data, prefix='items'):
+    """Read ``(product_id, quantity, price)`` lines from the edit form's POST data.
+
+    Incomplete rows are skipped like the form always did; rows with bad
+    numbers or unknown products are returned in ``errors`` instead.
+    """
+
+    lines = []
+    errors = []
+    for i in range(int(data.get(f'{prefix}-TOTAL_FORMS', 0) or 0)):
+        product_id = data.get(f'{prefix}-{i}-product')
+        quantity = data.get(f'{prefix}-{i}-quantity')
+        price = data.get(f'{prefix}-{i}-price')
+        if not (product_id and quantity and price):
+            continue
+        try:
+            lines.append((int(product_id), int(quantity), Decimal(price).quantize(Decimal('0.01'))))
+        except (ValueError, InvalidOperation) as e:
+            errors.append(f"Error updating item: {e}")
+
+    known = Product.objects.filter(id__in={product_id for product_id, _, _ in lines}).in_bulk()
+    for product_id, _, _ in lines:
+        if product_id not in known:
+            errors.append(f"Error updating item: Product {product_id} does not exist.")
+    return [line for line in lines if line[0] in known], errors
+
+
+def reconcile_lines(sales_order, lines):
+    """Make the order's items match ``lines``, writing only what changed.
+
+    Existing items are paired with submitted lines of the same product in
+    order; unchanged pairs are left alone, changed ones are updated in place,
+    and leftovers are inserted or deleted. Returns the net quantity change per
+    product, omitting products whose quantity did not change.
+    """
+
+    existing = {}
+    for item in sales_order.items.order_by('id'):
+        existing.setdefault(item.product_id, []).append(item)
+
+    deltas = {}
+    to_delete = []
+    for product_id, quantity, price in lines:
+        items = existing.get(product_id)
+        if items:
+            item = items.pop(0)
+            if (item.quantity, item.price) != (quantity, price):
+                deltas[product_id] = deltas.get(product_id, 0) + quantity - item.quantity
+                item.quantity, item.price = quantity, price
+                item.save(update_fields=['quantity', 'price', 'total_price'])
+            continue
+        OrderItem.objects.create(sales_order=sales_order, product_id=product_id, quantity=quantity, price=price,
+                                 tenant_id=sales_order.tenant_id)
+        deltas[product_id] = deltas.get(product_id, 0) + quantity
+
+    for items in existing.values():
+        for item in items:
+            to_delete.append(item.pk)
+            deltas[item.product_id] = deltas.get(item.product_id, 0) - item.quantity
+    if to_delete:
+        OrderItem.objects.filter(pk__in=to_delete).delete()
+    return {product_id: delta for product_id, delta in deltas.items() if delta}
+
+
+def edit_order(sales_order, lines, *, set_in_transit=False):
+    """Apply edited ``lines`` to ``sales_order`` and move it to its next status.
+
+    Retail orders end up completed; wholesale orders end up in transit when
+    ``set_in_transit`` is given and as a draft otherwise. When the stock was
+    already deducted and stays deducted, only the net per-product changes are
+    deducted or put back; otherwise the old lines are reversed or the new ones
+    deducted in full. Must be called inside a transaction. Returns the new status.
+    """
+
+    is_wholesale = get_tenant_context(sales_order.tenant_id).is_wholesale
+    if is_wholesale:
+        target = 'in_transit' if set_in_transit else 'draft'
+    else:
+        target = 'completed'
+    deducted = sales_order.status in ('completed', 'in_transit')
+
+    if deducted and target == 'draft':
+        sales_order.reverse_stock_deductions()
+        sales_order.status = 'draft'
+
+    deltas = reconcile_lines(sales_order, lines)
+
+    if deducted and target != 'draft':
+        change_type = StockMovementType.SALE_IN_TRANSIT if is_wholesale else StockMovementType.SALE
+        sales_order.adjust_stock(deltas, change_type, f"SO {sales_order.order_number or sales_order.id} edited")
+        sales_order.status = target
+    elif target == 'in_transit':
+        sales_order.mark_in_transit()
+        return target
+    elif target == 'completed':
+        sales_order.finalize_order()
+        return target
+
+    sales_order.cached_total = sales_order.total_price
+    sales_order.save()
+    sales_order.refresh_daily_sales()
+    return target
@@ -1,25 +1,46 @@
 """Utility services for point_of_sale domain."""
 
 import calendar
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 
 from django.conf import settings
-from django.db.models import Count, DecimalField, ExpressionWrapper, F, IntegerField, Sum, Value
-from django.db.models.functions import Coalesce
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DateField, DecimalField, ExpressionWrapper, F, IntegerField, Q, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncDate, TruncMonth, TruncYear
+from django.utils import timezone
 
-from .models import OrderItem, ProductSalesSummary
+from app.dashboard.cache import invalidate_tenant_on_commit
+
+from .models import OrderItem, ProductSalesSummary, SalesOrder, TenantDailySales
+
+
+SUMMARY_PERIODS = ('daily', 'monthly', 'yearly')
+
+
+def summary_periods():
+    """Return the maintained summary periods, finest first: daily plus the configured rollups."""
+
+    rollups = getattr(settings, 'PRODUCT_SALES_SUMMARY_ROLLUPS', ('monthly',))
+    return ['daily'] + [period for period in SUMMARY_PERIODS[1:] if period in rollups]
 
 
 def _resolve_period_bounds(order_datetime, period: str):
-    """Return (period_start_date, period_end_date) for the configured summary period."""
+    """Return (period_start_date, period_end_date) for the given summary period."""
 
     if order_datetime is None:
         return None, None
 
     # Always operate on the naive/local date so summaries stay aligned with business calendar.
-    order_date = order_datetime.date()
+    if timezone.is_aware(order_datetime):
+        order_date = timezone.localtime(order_datetime).date()
+    else:
+        order_date = order_datetime.date()
 
-    if period == 'monthly':
+    if period == 'yearly':
+        period_start = order_date.replace(month=1, day=1)
+        period_end = order_date.replace(month=12, day=31)
+    elif period == 'monthly':
         period_start = order_date.replace(day=1)
         last_day = calendar.monthrange(order_date.year, order_date.month)[1]
         period_end = order_date.replace(day=last_day)
@@ -30,79 +51,364 @@ def _resolve_period_bounds(order_datetime, period: str):
     return period_start, period_end
 
 
-def refresh_product_sales_summary(product, order_datetime, tenant_id, *, period: str | None = None):
-    """Recalculate the denormalized sales summary for a product and period."""
+def _day_bounds(day, period):
+    return _resolve_period_bounds(datetime.combine(day, time.min), period)
 
-    if product is None or order_datetime is None or tenant_id is None:
-        return
 
-    period = period or getattr(settings, 'PRODUCT_SALES_SUMMARY_PERIOD', 'daily')
-    period_start, period_end = _resolve_period_bounds(order_datetime, period)
+def _write_summaries(tenant_id, product_ids, period, period_start, period_end, rows):
+    """Upsert one period's ``rows`` and drop the rows of ``product_ids`` that have no sales left."""
 
-    if period_start is None or period_end is None:
-        return
+    summaries = [
+        ProductSalesSummary(
+            tenant_id=tenant_id,
+            product_id=row['product_id'],
+            period=period,
+            period_start=period_start,
+            period_end=period_end,
+            total_quantity=row['total_quantity'] or 0,
+            total_revenue=row['total_revenue'] or Decimal('0.00'),
+            total_orders=row['total_orders'] or 0,
+        )
+        for row in rows
+    ]
+    if summaries:
+        ProductSalesSummary._base_manager.bulk_create(
+            summaries,
+            update_conflicts=True,
+            unique_fields=['tenant_id', 'product', 'period_start', 'period_end'],
+            update_fields=['total_quantity', 'total_revenue', 'total_orders'],
+        )
 
-    if period == 'monthly':
-        date_filter = {
-            'sales_order__created_at__date__range': (period_start, period_end)
-        }
-    else:
-        date_filter = {'sales_order__created_at__date': period_start}
+    sold = {summary.product_id for summary in summaries}
+    if product_ids - sold:
+        ProductSalesSummary._base_manager.filter(
+            tenant_id=tenant_id,
+            product_id__in=product_ids - sold,
+            period_start=period_start,
+            period_end=period_end,
+        ).delete()
 
-    base_qs = OrderItem._base_manager.filter(
-        tenant_id=tenant_id,
-        product=product,
-        **date_filter,
-    )
 
+def _recompute_from_items(product_ids, tenant_id, period, period_start, period_end):
     revenue_expression = ExpressionWrapper(
         F('quantity') * F('price'),
         output_field=DecimalField(max_digits=15, decimal_places=2),
     )
-
-    summary_data = base_qs.aggregate(
-        total_quantity=Coalesce(
-            Sum('quantity'),
-            Value(0),
-            output_field=IntegerField(),
-        ),
-        total_revenue=Coalesce(
-            Sum(revenue_expression),
-            Value(Decimal('0.00')),
-            output_field=DecimalField(max_digits=15, decimal_places=2),
-        ),
-        total_orders=Coalesce(
-            Count('sales_order', distinct=True),
-            Value(0),
-            output_field=IntegerField(),
-        ),
-        item_count=Coalesce(
-            Count('id'),
-            Value(0),
-            output_field=IntegerField(),
-        ),
+    rows = (
+        OrderItem._base_manager.filter(
+            tenant_id=tenant_id,
+            product_id__in=product_ids,
+            sales_order__created_at__date__range=(period_start, period_end),
+        )
+        .values('product_id')
+        .annotate(
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum(revenue_expression),
+            total_orders=Count('sales_order', distinct=True),
+        )
+        .order_by()
     )
+    _write_summaries(tenant_id, product_ids, period, period_start, period_end, rows)
+
 
-    if summary_data['item_count'] == 0:
+def _roll_up(product_ids, tenant_id, finer, period, period_start, period_end):
+    # An order falls in exactly one finer bucket, so summing the distinct order counts stays exact.
+    rows = (
         ProductSalesSummary._base_manager.filter(
             tenant_id=tenant_id,
-            product=product,
-            period_start=period_start,
-            period_end=period_end,
-        ).delete()
+            product_id__in=product_ids,
+            period=finer,
+            period_start__range=(period_start, period_end),
+        )
+        .values('product_id')
+        .annotate(
+            total_quantity=Sum('total_quantity'),
+            total_revenue=Sum('total_revenue'),
+            total_orders=Sum('total_orders'),
+        )
+        .order_by()
+    )
+    _write_summaries(tenant_id, product_ids, period, period_start, period_end, rows)
+
+
+def refresh_product_sales_summary(product, order_datetime, tenant_id, *, period: str | None = None):
+    """Recalculate the denormalized sales summaries for a product."""
+
+    if product is None:
+        return
+    refresh_product_sales_summaries([product.pk], order_datetime, tenant_id, period=period)
+
+
+def refresh_product_sales_summaries(product_ids, order_datetime, tenant_id, *, period: str | None = None):
+    """Recalculate the summaries of several products with a fixed number of queries per period.
+
+    The daily rows are recomputed from the order items in one grouped
+    aggregate and written with a single upsert; each configured rollup is then
+    derived from the level below it (monthly from daily, yearly from monthly).
+    Products left without sales lose their rows. With ``period`` only that
+    level is recomputed, straight from the order items.
+    """
+
+    product_ids = set(product_ids)
+    if not product_ids or order_datetime is None or tenant_id is None:
         return
 
-    ProductSalesSummary._base_manager.update_or_create(
-        tenant_id=tenant_id,
-        product=product,
-        period_start=period_start,
-        period_end=period_end,
-        defaults={
-            'total_quantity': summary_data['total_quantity'],
-            'total_revenue': summary_data['total_revenue'],
-            'total_orders': summary_data['total_orders'],
-        },
+    if period:
+        _recompute_from_items(product_ids, tenant_id, period, *_resolve_period_bounds(order_datetime, period))
+        return
+
+    periods = summary_periods()
+    _recompute_from_items(product_ids, tenant_id, periods[0], *_resolve_period_bounds(order_datetime, periods[0]))
+    for finer, coarser in zip(periods, periods[1:]):
+        _roll_up(product_ids, tenant_id, finer, coarser, *_resolve_period_bounds(order_datetime, coarser))
+
+
+def apply_product_sales_deltas(tenant_id, order_datetime, deltas, *, period: str | None = None):
+    """Add ``{product_id: (quantity, revenue, orders)}`` deltas to the summaries containing ``order_datetime``.
+
+    Existing rows are adjusted in place with ``F()`` expressions, so concurrent
+    sales never overwrite each other's totals; missing rows are inserted. Rows
+    left without orders are removed, as a full recompute would do. Every
+    maintained period is updated unless ``period`` picks one.
+    """
+
+    if tenant_id is None or order_datetime is None:
+        return
+
+    for level in [period] if period else summary_periods():
+        period_start, period_end = _resolve_period_bounds(order_datetime, level)
+        rows = ProductSalesSummary._base_manager.filter(
+            tenant_id=tenant_id, period_start=period_start, period_end=period_end,
+        )
+
+        emptied = []
+        for product_id, (quantity, revenue, orders) in deltas.items():
+            if not (quantity or revenue or orders):
+                continue
+            changes = {
+                'total_quantity': Greatest(F('total_quantity') + quantity, Value(0)),
+                'total_revenue': F('total_revenue') + revenue,
+                'total_orders': Greatest(F('total_orders') + orders, Value(0)),
+            }
+            if rows.filter(product_id=product_id).update(**changes):
+                if orders < 0:
+                    emptied.append(product_id)
+                continue
+            if orders <= 0:
+                # Nothing to subtract from; reconciliation reports the drift.
+                continue
+            try:
+                with transaction.atomic():
+                    ProductSalesSummary._base_manager.create(
+                        tenant_id=tenant_id,
+                        product_id=product_id,
+                        period=level,
+                        period_start=period_start,
+                        period_end=period_end,
+                        total_quantity=quantity,
+                        total_revenue=revenue,
+                        total_orders=orders,
+                    )
+            except IntegrityError:
+                # A concurrent sale inserted the row first.
+                rows.filter(product_id=product_id).update(**changes)
+
+        if emptied:
+            rows.filter(product_id__in=emptied, total_orders=0).delete()
+
+    # Queryset updates send no signals.
+    invalidate_tenant_on_commit(tenant_id)
+
+
+def plan_summary_buckets(start, end, periods=None):
+    """Cover ``start``..``end`` (dates) with the coarsest complete summary buckets.
+
+    Returns ``[(period, bucket_start, bucket_end), ...]`` in date order: whole
+    years and months lying inside the range (for the rollups that are kept)
+    and single days at the ragged edges. A one-year window therefore reads
+    about a dozen rows per product instead of 365.
+    """
+
+    periods = periods or summary_periods()
+    buckets = []
+    day = start
+    while day <= end:
+        for period in reversed(periods):
+            bucket_start, bucket_end = _day_bounds(day, period)
+            if bucket_start == day and bucket_end <= end:
+                break
+        else:
+            bucket_start = bucket_end = day
+            period = 'daily'
+        buckets.append((period, bucket_start, bucket_end))
+        day = bucket_end + timedelta(days=1)
+    return buckets
+
+
+def summaries_covering(start, end, queryset=None, periods=None):
+    """Return the ProductSalesSummary rows that add up to exactly ``start``..``end``.
+
+    The range is split by :func:`plan_summary_buckets`; consecutive days are
+    merged into ranges so the filter stays a handful of conditions.
+    """
+
+    queryset = ProductSalesSummary.objects.all() if queryset is None else queryset
+    condition = Q()
+    days = []
+    coarse = {}
+    for period, bucket_start, bucket_end in plan_summary_buckets(start, end, periods):
+        if period != 'daily':
+            coarse.setdefault(period, []).append(bucket_start)
+        elif days and days[-1][1] + timedelta(days=1) == bucket_start:
+            days[-1][1] = bucket_start
+        else:
+            days.append([bucket_start, bucket_start])
+    for first, last in days:
+        condition |= Q(period='daily', period_start__range=(first, last))
+    for period, starts in coarse.items():
+        condition |= Q(period=period, period_start__in=starts)
+    return queryset.filter(condition) if condition else queryset.none()
+
+
+def _summary_range(start, end, period):
+    """Widen ``start``..``end`` (dates) to whole summary periods."""
+
+    start, _ = _day_bounds(start, period)
+    _, end = _day_bounds(end, period)
+    return start, end
+
+
+def _expected_product_sales(start, end, tenant_id, period):
+    """Return ``{(tenant_id, product_id, period_start, period_end): (quantity, revenue, orders)}``.
+
+    Totals come from one grouped aggregate over the order items of ``start``..``end``.
+    """
+
+    bucket = {'yearly': TruncYear, 'monthly': TruncMonth}.get(period, TruncDate)
+    revenue_expression = ExpressionWrapper(
+        F('quantity') * F('price'),
+        output_field=DecimalField(max_digits=15, decimal_places=2),
+    )
+    items = OrderItem._base_manager.filter(sales_order__created_at__date__range=(start, end))
+    if tenant_id is not None:
+        items = items.filter(tenant_id=tenant_id)
+
+    expected = {}
+    rows = (
+        items.annotate(period_start=bucket('sales_order__created_at', output_field=DateField()))
+        .values('tenant_id', 'product_id', 'period_start')
+        .annotate(
+            total_quantity=Sum('quantity'),
+            total_revenue=Sum(revenue_expression),
+            total_orders=Count('sales_order', distinct=True),
+        )
+        .order_by()
     )
+    for row in rows:
+        period_start, period_end = _day_bounds(row['period_start'], period)
+        key = (row['tenant_id'], row['product_id'], period_start, period_end)
+        expected[key] = (row['total_quantity'] or 0, row['total_revenue'] or Decimal('0.00'), row['total_orders'])
+    return expected
+
+
+def reconcile_product_sales_summaries(start, end, *, tenant_id=None, periods=None, fix=True):
+    """Recompute the summaries of every period overlapping ``start``..``end`` and report drift.
+
+    Returns one dict per product and period whose stored totals differ from the
+    order items (``expected``/``actual`` are ``(quantity, revenue, orders)``,
+    ``actual`` is None for a missing row and ``expected`` None for a stale one).
+    Every maintained period is checked unless ``periods`` narrows it. With
+    ``fix`` the stored rows are corrected.
+    """
+
+    drift = []
+    for period in periods or summary_periods():
+        period_start, period_end = _summary_range(start, end, period)
+        expected = _expected_product_sales(period_start, period_end, tenant_id, period)
+
+        summaries = ProductSalesSummary._base_manager.filter(
+            period=period, period_start__range=(period_start, period_end),
+        )
+        if tenant_id is not None:
+            summaries = summaries.filter(tenant_id=tenant_id)
+        actual = {
+            (row.tenant_id, row.product_id, row.period_start, row.period_end): row
+            for row in summaries
+        }
+
+        for key in sorted(expected.keys() | actual.keys(), key=lambda key: (key[0] or 0, key[2], key[1])):
+            row = actual.get(key)
+            stored = (row.total_quantity, row.total_revenue, row.total_orders) if row else None
+            if stored != expected.get(key):
+                tenant, product_id, bucket_start, bucket_end = key
+                drift.append({
+                    'tenant_id': tenant,
+                    'product_id': product_id,
+                    'period': period,
+                    'period_start': bucket_start,
+                    'period_end': bucket_end,
+                    'expected': expected.get(key),
+                    'actual': stored,
+                    'row': row,
+                })
+
+    if fix and drift:
+        with transaction.atomic():
+            for entry in drift:
+                if entry['expected'] is None:
+                    entry['row'].delete()
+                    continue
+                quantity, revenue, orders = entry['expected']
+                ProductSalesSummary._base_manager.update_or_create(
+                    tenant_id=entry['tenant_id'],
+                    product_id=entry['product_id'],
+                    period_start=entry['period_start'],
+                    period_end=entry['period_end'],
+                    defaults={
+                        'period': entry['period'],
+                        'total_quantity': quantity,
+                        'total_revenue': revenue,
+                        'total_orders': orders,
+                    },
+                )
+    for entry in drift:
+        del entry['row']
+    return drift
+
+
+def rebuild_product_sales_summaries(tenant_id, start, end, *, periods=None, batch_size=1000):
+    """Replace the tenant's summaries for ``start``..``end`` with totals recomputed from order items.
+
+    For each period (every maintained one unless ``periods`` narrows it) the
+    rows starting in the widened range are deleted and re-inserted from one
+    grouped aggregate, all in one transaction, so the rebuild can safely be
+    repeated. Returns the rows written.
+    """
+
+    written = 0
+    with transaction.atomic():
+        for period in periods or summary_periods():
+            period_start, period_end = _summary_range(start, end, period)
+            summaries = [
+                ProductSalesSummary(
+                    tenant_id=tenant,
+                    product_id=product_id,
+                    period=period,
+                    period_start=bucket_start,
+                    period_end=bucket_end,
+                    total_quantity=quantity,
+                    total_revenue=revenue,
+                    total_orders=orders,
+                )
+                for (tenant, product_id, bucket_start, bucket_end), (quantity, revenue, orders)
+                in _expected_product_sales(period_start, period_end, tenant_id, period).items()
+            ]
+            ProductSalesSummary._base_manager.filter(
+                tenant_id=tenant_id, period=period, period_start__range=(period_start, period_end),
+            ).delete()
+            ProductSalesSummary._base_manager.bulk_create(summaries, batch_size=batch_size)
+            written += len(summaries)
+    return written
 
 
 def refresh_product_sales_summary_for_order_item(order_item, *, period: str | None = None):
@@ -124,3 +430,79 @@ def refresh_product_sales_summary_for_order_item(order_item, *, period: str | No
         tenant_id,
         period=period,
     )
+
+
+def _lock_daily_sales(tenant_id, day):
+    """Lock the tenant's TenantDailySales row for ``day``, creating it first if needed."""
+
+    rows = TenantDailySales._base_manager.select_for_update().filter(tenant_id=tenant_id, date=day)
+    row = rows.first()
+    if row is None:
+        try:
+            with transaction.atomic():
+                return TenantDailySales._base_manager.create(tenant_id=tenant_id, date=day)
+        except IntegrityError:
+            # A concurrent transaction created it; wait for its lock below.
+            row = rows.get()
+    return row
+
+
+def refresh_tenant_daily_sales(tenant_id, order_datetime):
+    """Recalculate the TenantDailySales row for the tenant's local day containing ``order_datetime``.
+
+    Only that single day's completed orders are scanned, so the cost is bounded by the
+    day's volume rather than the tenant's history. The row is locked before the day
+    is aggregated: a concurrent transaction completing an order on the same day
+    waits, then aggregates after this one commits and sees its order, so the last
+    writer never stores a total that misses the other's sale.
+    """
+
+    if tenant_id is None or order_datetime is None:
+        return
+
+    if timezone.is_aware(order_datetime):
+        day = timezone.localtime(order_datetime).date()
+    else:
+        day = order_datetime.date()
+
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, time.min), tz)
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min), tz)
+
+    with transaction.atomic(savepoint=False):
+        row = _lock_daily_sales(tenant_id, day)
+
+        orders = SalesOrder._base_manager.filter(
+            tenant_id=tenant_id,
+            status='completed',
+            created_at__gte=start,
+            created_at__lt=end,
+        )
+        order_data = orders.aggregate(
+            total_orders=Count('id'),
+            total_customers=Count('customer', distinct=True),
+        )
+
+        if order_data['total_orders'] == 0:
+            TenantDailySales._base_manager.filter(pk=row.pk).delete()
+            return
+
+        revenue_expression = ExpressionWrapper(
+            F('quantity') * F('price'),
+            output_field=DecimalField(max_digits=15, decimal_places=2),
+        )
+        item_data = OrderItem._base_manager.filter(sales_order__in=orders).aggregate(
+            total_quantity=Coalesce(Sum('quantity'), Value(0), output_field=IntegerField()),
+            total_revenue=Coalesce(
+                Sum(revenue_expression),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=15, decimal_places=2),
+            ),
+        )
+
+        TenantDailySales._base_manager.filter(pk=row.pk).update(
+            total_revenue=item_data['total_revenue'],
+            total_orders=order_data['total_orders'],
+            total_quantity=item_data['total_quantity'],
+            total_customers=order_data['total_customers'],
+        )
@@ -1,73 +1,67 @@
 """Signal handlers for point_of_sale app."""
 
-from django.conf import settings
-from django.db.models.signals import post_delete, post_save, pre_save
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 
-from .models import OrderItem
-from .services import (
-    refresh_product_sales_summary,
-    refresh_product_sales_summary_for_order_item,
-)
+from . import summary_deltas, summary_queue
+from .models import OrderItem, SalesOrder
+from .services import refresh_tenant_daily_sales
 
-SUMMARY_PERIOD = getattr(settings, 'PRODUCT_SALES_SUMMARY_PERIOD', 'daily')
 
+def _remember(instance):
+    # Read from __dict__ so deferred fields are not fetched; they stay None (unknown).
+    values = instance.__dict__
+    instance._original_product_id = values.get('product_id')
+    instance._original_sales_order_id = values.get('sales_order_id')
+    instance._original_quantity = values.get('quantity')
+    instance._original_price = values.get('price')
 
-@receiver(pre_save, sender=OrderItem)
-def _cache_original_order_item_state(sender, instance, **kwargs):
-    """Keep the original product/order period so summaries stay consistent after edits."""
 
-    if not instance.pk:
-        instance._original_product = None
-        instance._original_order_created_at = None
-        instance._original_tenant_id = None
-        return
-
-    try:
-        original = sender._base_manager.select_related('sales_order', 'product').get(pk=instance.pk)
-    except sender.DoesNotExist:
-        instance._original_product = None
-        instance._original_order_created_at = None
-        instance._original_tenant_id = None
-        return
+@receiver(post_init, sender=OrderItem)
+def _remember_original_order_item_state(sender, instance, **kwargs):
+    """Keep the loaded values so an edit can update the summaries it moved between."""
 
-    instance._original_product = original.product
-    instance._original_order_created_at = getattr(original.sales_order, 'created_at', None)
-    instance._original_tenant_id = original.tenant_id or getattr(original.sales_order, 'tenant_id', None)
+    _remember(instance)
 
 
 @receiver(post_save, sender=OrderItem)
 def order_item_saved(sender, instance, created, **kwargs):  # noqa: D401 - succinct hook doc
-    """Refresh summary rows whenever an order item is inserted or updated."""
+    """Update or queue a summary refresh whenever an order item is inserted or updated."""
 
-    refresh_product_sales_summary_for_order_item(instance, period=SUMMARY_PERIOD)
+    if summary_deltas.enabled():
+        summary_deltas.item_saved(instance, created)
+        _remember(instance)
+        return
 
-    original_product = getattr(instance, '_original_product', None)
-    original_created_at = getattr(instance, '_original_order_created_at', None)
-    original_tenant_id = getattr(instance, '_original_tenant_id', None)
+    tenant_id = instance.tenant_id
+    order_created_at = summary_queue.order_datetime(instance)
+    summary_queue.mark_dirty(tenant_id, instance.product_id, order_created_at)
 
-    if (
-        original_product
-        and original_created_at
-        and (
-            original_product != instance.product
-            or original_created_at != getattr(instance.sales_order, 'created_at', None)
-        )
+    original_product_id = instance._original_product_id
+    original_sales_order_id = instance._original_sales_order_id
+    if not created and original_sales_order_id is not None and (
+        original_product_id != instance.product_id or original_sales_order_id != instance.sales_order_id
     ):
-        refresh_product_sales_summary(
-            original_product,
-            original_created_at,
-            original_tenant_id,
-            period=SUMMARY_PERIOD,
+        summary_queue.mark_dirty(
+            tenant_id, original_product_id, summary_queue.order_created_at(original_sales_order_id)
         )
 
-    for attr in ('_original_product', '_original_order_created_at', '_original_tenant_id'):
-        if hasattr(instance, attr):
-            delattr(instance, attr)
+    _remember(instance)
 
 
 @receiver(post_delete, sender=OrderItem)
 def order_item_deleted(sender, instance, **kwargs):
-    """Ensure summary rows shrink appropriately when order items are removed."""
+    """Shrink summary rows when order items are removed."""
+
+    if summary_deltas.enabled():
+        summary_deltas.item_deleted(instance, kwargs.get('origin'))
+        return
+    summary_queue.mark_dirty(instance.tenant_id, instance.product_id, summary_queue.order_datetime(instance))
+
+
+@receiver(post_delete, sender=SalesOrder)
+def sales_order_deleted(sender, instance, **kwargs):
+    """Drop a deleted completed order from the tenant's daily sales rollup."""
 
-    refresh_product_sales_summary_for_order_item(instance, period=SUMMARY_PERIOD)
+    if instance.status == 'completed':
+        refresh_tenant_daily_sales(instance.tenant_id, instance.created_at)
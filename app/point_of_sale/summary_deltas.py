@@ -0,0 +1,129 @@
+"""Incremental (delta) maintenance of ProductSalesSummary rows.
+
+With ``PRODUCT_SALES_SUMMARY_MODE = 'delta'`` each order item change adds or
+subtracts its own quantity and revenue inside the same transaction instead of
+re-aggregating the whole product period. ``total_orders`` counts distinct
+orders, so it only moves when the first item of a product enters an order or
+the last one leaves it. ``reconcile_product_sales_summaries`` (run by the
+``reconcile_sales_summaries`` command) recomputes and repairs any drift.
+"""
+
+import threading
+from decimal import Decimal
+
+from django.conf import settings
+
+from . import summary_queue
+from .models import OrderItem
+from .services import apply_product_sales_deltas
+
+MODE_RECOMPUTE = 'recompute'
+MODE_DELTA = 'delta'
+
+_state = threading.local()
+
+
+def enabled():
+    return getattr(settings, 'PRODUCT_SALES_SUMMARY_MODE', MODE_RECOMPUTE) == MODE_DELTA
+
+
+def _counted_out(origin):
+    """The (sales_order_id, product_id) pairs already counted out by the ``origin`` deletion.
+
+    A cascade deletes every sibling item before the first post_delete handler
+    runs, so within one ``delete()`` call only the first sibling may decrement
+    ``total_orders``. The pairs are kept for the latest deletion only; a new
+    ``delete()`` (after a commit or a rollback alike) starts from an empty set.
+    """
+
+    if getattr(_state, 'origin', None) is not origin:
+        _state.origin = origin
+        _state.counted = set()
+    return _state.counted
+
+
+def reset():
+    """Forget the pairs counted out by the latest deletion (for tests)."""
+
+    _state.origin = None
+    _state.counted = set()
+
+
+def _shares_order(sales_order_id, product_id, exclude_pk):
+    return OrderItem._base_manager.filter(
+        sales_order_id=sales_order_id, product_id=product_id,
+    ).exclude(pk=exclude_pk).exists()
+
+
+def _add(tenant_id, created_at, sales_order_id, product_id, quantity, price, pk):
+    orders = 0 if _shares_order(sales_order_id, product_id, pk) else 1
+    apply_product_sales_deltas(tenant_id, created_at, {product_id: (quantity, quantity * price, orders)})
+
+
+def _remove(tenant_id, created_at, sales_order_id, product_id, quantity, price, pk, origin=None):
+    key = (sales_order_id, product_id)
+    counted = _counted_out(origin) if origin is not None else set()
+    orders = 0
+    if key not in counted and not _shares_order(sales_order_id, product_id, pk):
+        orders = -1
+        counted.add(key)
+    apply_product_sales_deltas(tenant_id, created_at, {product_id: (-quantity, -quantity * price, orders)})
+
+
+def _price(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def item_saved(item, created):
+    """Apply the summary delta of an inserted or updated order item."""
+
+    created_at = summary_queue.order_datetime(item)
+    if created:
+        _add(item.tenant_id, created_at, item.sales_order_id, item.product_id,
+             item.quantity, _price(item.price), item.pk)
+        return
+
+    original = (item._original_product_id, item._original_sales_order_id,
+                item._original_quantity, item._original_price)
+    if None in original:
+        # Loaded with deferred fields, so the previous values are unknown: recompute both.
+        summary_queue.mark_dirty(item.tenant_id, item.product_id, created_at)
+        if item._original_sales_order_id is not None:
+            summary_queue.mark_dirty(item.tenant_id, item._original_product_id,
+                                     summary_queue.order_created_at(item._original_sales_order_id))
+        return
+
+    product_id, sales_order_id, quantity, price = original
+    price = _price(price)
+    if (product_id, sales_order_id) == (item.product_id, item.sales_order_id):
+        new_price = _price(item.price)
+        apply_product_sales_deltas(item.tenant_id, created_at, {
+            product_id: (item.quantity - quantity, item.quantity * new_price - quantity * price, 0),
+        })
+        return
+
+    _remove(item.tenant_id, summary_queue.order_created_at(sales_order_id), sales_order_id, product_id,
+            quantity, price, item.pk)
+    _add(item.tenant_id, created_at, item.sales_order_id, item.product_id,
+         item.quantity, _price(item.price), item.pk)
+
+
+def item_deleted(item, origin=None):
+    """Subtract a deleted order item from its summary.
+
+    ``origin`` is the post_delete signal's origin: the instance or queryset whose
+    ``delete()`` removed the item.
+    """
+
+    _remove(item.tenant_id, summary_queue.order_datetime(item), item.sales_order_id, item.product_id,
+            item.quantity, _price(item.price), item.pk, origin)
+
+
+def order_items_added(sales_order, items):
+    """Apply the deltas of items bulk-inserted into a new order, one update per product."""
+
+    deltas = {}
+    for item in items:
+        quantity, revenue, _ = deltas.get(item.product_id, (0, Decimal('0.00'), 1))
+        deltas[item.product_id] = (quantity + item.quantity, revenue + item.quantity * _price(item.price), 1)
+    apply_product_sales_deltas(sales_order.tenant_id, sales_order.created_at, deltas)
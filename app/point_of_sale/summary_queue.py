@@ -0,0 +1,116 @@
+"""Coalesced, post-commit refresh of ProductSalesSummary rows.
+
+Order item signals only mark (tenant, day, product) keys as dirty. When the
+surrounding transaction commits, every dirty key is refreshed exactly once, with
+one grouped aggregate and one upsert per (tenant, day) plus one per rollup. With
+``PRODUCT_SALES_SUMMARY_FLUSH = 'background'`` the refresh runs on a worker
+thread instead of delaying the response.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import SalesOrder
+from .services import _resolve_period_bounds, refresh_product_sales_summaries
+
+FLUSH_INLINE = 'inline'
+FLUSH_BACKGROUND = 'background'
+
+_state = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _pending():
+    if not hasattr(_state, 'keys'):
+        # (tenant_id, day) -> (an order datetime on that day, {product ids})
+        _state.keys = {}
+        _state.order_dates = {}
+    return _state
+
+
+def order_created_at(sales_order_id):
+    """Return when the order was created, querying each order at most once per flush."""
+
+    state = _pending()
+    if sales_order_id not in state.order_dates:
+        state.order_dates[sales_order_id] = (
+            SalesOrder._base_manager.filter(pk=sales_order_id).values_list('created_at', flat=True).first()
+        )
+        # The memo is dropped by the next flush, even when nothing else is queued.
+        transaction.on_commit(flush)
+    return state.order_dates[sales_order_id]
+
+
+def order_datetime(order_item):
+    """Return the creation time of the item's order, preferring the already loaded order."""
+
+    if type(order_item).sales_order.is_cached(order_item):
+        sales_order = order_item.sales_order
+        return sales_order.created_at if sales_order else None
+    return order_created_at(order_item.sales_order_id)
+
+
+def mark_dirty(tenant_id, product_id, created_at):
+    """Queue the summaries of ``product_id`` for the day containing ``created_at``."""
+
+    if tenant_id is None or product_id is None or created_at is None:
+        return
+    day, _ = _resolve_period_bounds(created_at, 'daily')
+    state = _pending()
+    key = (tenant_id, day)
+    if key in state.keys:
+        state.keys[key][1].add(product_id)
+    else:
+        state.keys[key] = (created_at, {product_id})
+    # Registered on every call because a rolled-back savepoint discards its callbacks.
+    # The first callback drains the whole queue, so the later ones are no-ops; keys
+    # left behind by a rollback are simply recomputed by the next flush.
+    transaction.on_commit(flush)
+
+
+def _refresh(batches):
+    for tenant_id, order_created_at, product_ids in batches:
+        refresh_product_sales_summaries(product_ids, order_created_at, tenant_id)
+
+
+def _refresh_in_worker(batches):
+    try:
+        _refresh(batches)
+    finally:
+        connections.close_all()
+
+
+def _background_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sales-summary')
+        return _executor
+
+
+def flush():
+    """Refresh every queued summary key once."""
+
+    state = _pending()
+    keys, state.keys, state.order_dates = state.keys, {}, {}
+    if not keys:
+        return
+    batches = [
+        (tenant_id, order_created_at, product_ids)
+        for (tenant_id, _), (order_created_at, product_ids) in keys.items()
+    ]
+    if getattr(settings, 'PRODUCT_SALES_SUMMARY_FLUSH', FLUSH_INLINE) == FLUSH_BACKGROUND:
+        _background_executor().submit(_refresh_in_worker, batches)
+    else:
+        _refresh(batches)
+
+
+def reset():
+    """Drop queued keys without refreshing them (for tests and rolled-back work)."""
+
+    state = _pending()
+    state.keys, state.order_dates = {}, {}
@@ -1,11 +1,33 @@
-from django.test import TestCase, Client
+import calendar
+import importlib
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+
+from django.apps import apps as django_apps
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.exceptions import ValidationError
 from django.urls import reverse
+from django.utils import timezone
 from decimal import Decimal
-from .models import SalesOrder, Invoice, Payment
-from app.customers.models import Customer
+from unittest import skipUnless
+from . import checkout, numbering, summary_deltas, summary_queue
+from .services import plan_summary_buckets, reconcile_product_sales_summaries, summaries_covering
+from .models import (
+    SalesOrder, OrderItem, Invoice, Payment, InvoiceNumberSequence, OrderNumberSequence, ProductSalesSummary,
+)
+from app.core.models import Company
+from app.core.tenant_middleware import set_current_tenant
+from app.customers.models import Customer, CustomerFinancialSnapshot, CustomerLedger
 from app.employee.models import EmployeeProfile
-from app.inventory.models import Product, Category
+from app.inventory.models import Product, Category, Inventory, StockMovement, StockMovementType
 
 
 class RefundTestCase(TestCase):
@@ -168,3 +190,815 @@ class RefundTestCase(TestCase):
         self.assertIn('amount', form.fields)
         self.assertIn('payment_method', form.fields)
         self.assertIn('reference', form.fields)
+
+
+class StockAllocationTests(TestCase):
+    def setUp(self):
+        set_current_tenant(501)
+        self.addCleanup(set_current_tenant, None)
+        Company.objects.create(id=501, name='Retail Co', company_type='retail')
+
+    def _order_with_lines(self, line_count, quantity=3):
+        order = SalesOrder.objects.create(status='draft')
+        for i in range(line_count):
+            product = Product.objects.create(
+                name=f'Part {line_count}-{i}', cost=Decimal('1.00'), price=Decimal('2.00'), model='P'
+            )
+            Inventory.objects.create(product=product, location='Front', quantity=2)
+            Inventory.objects.create(product=product, location='Back', quantity=10)
+            OrderItem.objects.create(sales_order=order, product=product, quantity=quantity, price=Decimal('2.00'))
+        return order
+
+    def _finalize_queries(self, order):
+        with CaptureQueriesContext(connection) as ctx:
+            order.finalize_order()
+        return len(ctx.captured_queries)
+
+    def test_finalize_query_count_is_flat_in_line_count(self):
+        # Warm up the daily rollup row so both measurements update it.
+        self._order_with_lines(1).finalize_order()
+        small = self._finalize_queries(self._order_with_lines(2))
+        large = self._finalize_queries(self._order_with_lines(12))
+        self.assertEqual(small, large)
+
+    def test_deducts_from_largest_location_first_and_logs_movements(self):
+        order = self._order_with_lines(1, quantity=11)
+        order.finalize_order()
+
+        stock = dict(Inventory.objects.values_list('location', 'quantity'))
+        self.assertEqual(stock, {'Back': 0, 'Front': 1})
+        moves = StockMovement.objects.filter(related_sales_order=order, change_type=StockMovementType.SALE)
+        self.assertEqual(sorted(moves.values_list('quantity_change', flat=True)), [-10, -1])
+        self.assertEqual(order.status, 'completed')
+
+    def test_insufficient_stock_leaves_inventory_untouched(self):
+        order = self._order_with_lines(1, quantity=13)
+        with self.assertRaises(ValidationError):
+            order.finalize_order()
+        self.assertEqual(sum(Inventory.objects.values_list('quantity', flat=True)), 12)
+        self.assertFalse(StockMovement.objects.exists())
+
+    def test_inventory_locks_are_taken_in_product_location_order(self):
+        order = self._order_with_lines(3)
+        with CaptureQueriesContext(connection) as ctx:
+            order.finalize_order()
+        lock_sql = [q['sql'] for q in ctx.captured_queries
+                    if 'FROM "inventory"' in q['sql'] and 'ORDER BY' in q['sql']]
+        self.assertTrue(lock_sql)
+        for sql in lock_sql:
+            self.assertIn('ORDER BY "inventory"."product_id" ASC, "inventory"."location" ASC', sql)
+
+    def test_reverse_stock_deductions_restores_each_location(self):
+        order = self._order_with_lines(1, quantity=11)
+        order.finalize_order()
+
+        order.reverse_stock_deductions()
+
+        stock = dict(Inventory.objects.values_list('location', 'quantity'))
+        self.assertEqual(stock, {'Back': 10, 'Front': 2})
+        adjustments = StockMovement.objects.filter(related_sales_order=order, change_type=StockMovementType.ADJUSTMENT)
+        self.assertEqual(sorted(adjustments.values_list('quantity_change', flat=True)), [1, 10])
+
+
+class DocumentNumberingTests(TestCase):
+    def setUp(self):
+        numbering.reset_blocks()
+        self.addCleanup(numbering.reset_blocks)
+
+    def test_locked_mode_is_gapless(self):
+        numbers = [OrderNumberSequence.next_number(601) for _ in range(3)]
+        self.assertEqual(numbers, ['SO-00001', 'SO-00002', 'SO-00003'])
+
+    @override_settings(DOCUMENT_NUMBERING_MODE='block', DOCUMENT_NUMBERING_BLOCK_SIZE=5)
+    def test_block_mode_reserves_counter_once_per_block(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = OrderNumberSequence.next_number(602)
+        with CaptureQueriesContext(connection) as ctx:
+            rest = [OrderNumberSequence.next_number(602) for _ in range(4)]
+        self.assertEqual([first] + rest, [f'SO-{n:05d}' for n in range(1, 6)])
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(OrderNumberSequence.next_number(602), 'SO-00006')
+        self.assertEqual(OrderNumberSequence._base_manager.get(tenant_id=602).last_number, 10)
+
+    @override_settings(DOCUMENT_NUMBERING_MODE='block', DOCUMENT_NUMBERING_BLOCK_SIZE=5)
+    def test_block_is_not_shared_until_reservation_commits(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            self.assertEqual(InvoiceNumberSequence.next_number(603), 'INV-00001')
+            # Not committed yet, so the next caller reserves its own block.
+            self.assertEqual(InvoiceNumberSequence.next_number(603), 'INV-00006')
+
+    @skipUnless(connection.vendor == 'postgresql', 'Numbering sequences need PostgreSQL')
+    @override_settings(DOCUMENT_NUMBERING_MODE='sequence')
+    def test_sequence_created_in_rolled_back_transaction_is_created_again(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.assertEqual(OrderNumberSequence.next_number(604), 'SO-00001')
+                transaction.set_rollback(True)
+        self.assertEqual(OrderNumberSequence.next_number(604), 'SO-00001')
+
+    @skipUnless(connection.vendor == 'postgresql', 'Numbering sequences need PostgreSQL')
+    def test_switching_modes_never_repeats_a_number(self):
+        self.assertEqual(OrderNumberSequence.next_number(605), 'SO-00001')
+        with override_settings(DOCUMENT_NUMBERING_MODE='sequence'):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(OrderNumberSequence.next_number(605), 'SO-00002')
+            self.assertEqual(OrderNumberSequence.next_number(605), 'SO-00003')
+        self.assertEqual(OrderNumberSequence.next_number(605), 'SO-00004')
+        with override_settings(DOCUMENT_NUMBERING_MODE='sequence'):
+            numbering.reset_blocks()
+            self.assertEqual(OrderNumberSequence.next_number(605), 'SO-00005')
+
+
+class QuickCheckoutServiceTests(TestCase):
+    def setUp(self):
+        set_current_tenant(701)
+        self.addCleanup(set_current_tenant, None)
+        Company.objects.create(id=701, name='Retail Co', company_type='retail')
+        self.user = User.objects.create_user(username='cashier', password='pass123')
+        EmployeeProfile.objects.create(user=self.user, role='salesman', tenant_id=701)
+        self.products = []
+        for i in range(12):
+            product = Product.objects.create(name=f'Item {i}', cost=Decimal('1.00'), price=Decimal('4.00'), model='I')
+            Inventory.objects.create(product=product, location='Front', quantity=100)
+            self.products.append(product)
+        # Warm up the walk-in customer, numbering and daily rollup rows.
+        checkout.quick_checkout(self.user, self._cart(1))
+
+    def _cart(self, line_count):
+        return [{'product_id': p.id, 'quantity': 2} for p in self.products[:line_count]]
+
+    def _checkout_queries(self, line_count):
+        with CaptureQueriesContext(connection) as ctx:
+            checkout.quick_checkout(self.user, self._cart(line_count))
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        self.assertEqual(self._checkout_queries(2), self._checkout_queries(12))
+
+    def test_cash_sale_stays_within_its_query_budget(self):
+        customer = checkout.walk_in_customer()
+        with self.assertNumQueries(checkout.CASH_SALE_QUERIES):
+            checkout.quick_checkout(self.user, self._cart(5))
+        with self.assertNumQueries(checkout.CASH_SALE_QUERIES - 1):
+            checkout.quick_checkout(self.user, self._cart(5), customer=customer)
+
+    def test_ledger_is_recorded_once_per_paid_sale(self):
+        order, invoice = checkout.quick_checkout(self.user, self._cart(2))
+
+        entries = CustomerLedger.objects.filter(customer=order.customer).order_by('id')
+        self.assertEqual(
+            list(entries.values_list('type', 'amount', 'description'))[-2:],
+            [('debit', Decimal('16.00'), f'Invoice #{invoice.id}'),
+             ('credit', Decimal('16.00'), f'Payment for Invoice #{invoice.id}')],
+        )
+        snapshot = CustomerFinancialSnapshot.objects.get(customer=order.customer)
+        self.assertEqual((snapshot.total_sales, snapshot.total_payments, snapshot.total_debt),
+                         (Decimal('24.00'), Decimal('24.00'), Decimal('0.00')))
+
+    def test_invoice_is_paid_and_summaries_refresh_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            order, invoice = checkout.quick_checkout(self.user, self._cart(3))
+
+        self.assertEqual(order.status, 'completed')
+        self.assertEqual(order.cached_total, Decimal('24.00'))
+        self.assertEqual(invoice.payment_status, 'paid')
+        self.assertEqual(invoice.cached_paid_amount, Decimal('24.00'))
+        self.assertEqual(invoice.paid_amount(), Decimal('24.00'))
+        summary = ProductSalesSummary.objects.get(product=self.products[2], period='daily')
+        self.assertEqual((summary.total_quantity, summary.total_orders), (2, 1))
+        self.assertEqual(Inventory.objects.get(product=self.products[0]).quantity, 96)
+
+    def test_unknown_product_is_rejected(self):
+        with self.assertRaises(checkout.InvalidCheckoutItem):
+            checkout.quick_checkout(self.user, [{'product_id': 999999, 'quantity': 1}])
+
+
+class SummaryQueueTests(TestCase):
+    def setUp(self):
+        set_current_tenant(703)
+        self.addCleanup(set_current_tenant, None)
+        summary_queue.reset()
+        self.addCleanup(summary_queue.reset)
+        Company.objects.create(id=703, name='Retail Co', company_type='retail')
+        self.customer = Customer.objects.create(name='Shop', city='Town', customer_type='R', contact='703')
+        self.products = [
+            Product.objects.create(name=f'Item {i}', cost=Decimal('1.00'), price=Decimal('5.00'), model='Q')
+            for i in range(6)
+        ]
+        self.order = SalesOrder.objects.create(customer=self.customer, status='draft')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.items = [
+                OrderItem.objects.create(sales_order=self.order, product=product, quantity=1, price=product.price)
+                for product in self.products
+            ]
+
+    def _summary(self, product):
+        summary = ProductSalesSummary.objects.filter(product=product, period='daily').first()
+        return (summary.total_quantity, summary.total_orders) if summary else None
+
+    def _flush_queries(self, items):
+        with self.captureOnCommitCallbacks() as callbacks:
+            for item in items:
+                item.quantity += 1
+                item.save()
+        with CaptureQueriesContext(connection) as ctx:
+            for callback in callbacks:
+                callback()
+        return len(ctx.captured_queries)
+
+    def test_edits_are_refreshed_once_per_commit(self):
+        self.assertEqual(self._summary(self.products[5]), (1, 1))
+        self.assertEqual(self._flush_queries(self.items[:1]), self._flush_queries(self.items))
+        self.assertEqual(self._summary(self.products[0]), (3, 1))
+        self.assertEqual(self._summary(self.products[5]), (2, 1))
+
+    def test_changing_product_refreshes_old_and_new_summary(self):
+        item = OrderItem.objects.get(pk=self.items[0].pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            item.product = self.products[1]
+            item.save()
+
+        self.assertIsNone(self._summary(self.products[0]))
+        self.assertEqual(self._summary(self.products[1]), (2, 1))
+
+    def test_delete_shrinks_summary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.items[2].delete()
+
+        self.assertIsNone(self._summary(self.products[2]))
+        self.assertEqual(self._summary(self.products[3]), (1, 1))
+
+    def test_rolled_back_savepoint_still_flushes_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.items[4].quantity = 9
+                    self.items[4].save()
+                    raise ValueError
+            except ValueError:
+                pass
+            self.items[4].quantity = 4
+            self.items[4].save()
+
+        self.assertEqual(self._summary(self.products[4]), (4, 1))
+
+
+@override_settings(PRODUCT_SALES_SUMMARY_MODE='delta')
+class SummaryDeltaTests(TestCase):
+    def setUp(self):
+        set_current_tenant(704)
+        self.addCleanup(set_current_tenant, None)
+        self.addCleanup(summary_deltas.reset)
+        Company.objects.create(id=704, name='Retail Co', company_type='retail')
+        self.customer = Customer.objects.create(name='Shop', city='Town', customer_type='R', contact='704')
+        self.products = [
+            Product.objects.create(name=f'Item {i}', cost=Decimal('1.00'), price=Decimal('5.00'), model='D')
+            for i in range(3)
+        ]
+        self.order = SalesOrder.objects.create(customer=self.customer, status='draft')
+
+    def _add(self, product, quantity, order=None):
+        return OrderItem.objects.create(sales_order=order or self.order, product=product,
+                                        quantity=quantity, price=product.price)
+
+    def _summary(self, product):
+        summary = ProductSalesSummary.objects.filter(product=product, period='daily').first()
+        return (summary.total_quantity, summary.total_revenue, summary.total_orders) if summary else None
+
+    def _assert_no_drift(self):
+        today = timezone.localdate()
+        self.assertEqual(reconcile_product_sales_summaries(today, today, tenant_id=704, fix=False), [])
+
+    def test_orders_are_counted_distinctly(self):
+        first = self._add(self.products[0], 2)
+        self._add(self.products[0], 1)
+        self._add(self.products[0], 4, order=SalesOrder.objects.create(customer=self.customer))
+        self.assertEqual(self._summary(self.products[0]), (7, Decimal('35.00'), 2))
+
+        first.delete()
+        self.assertEqual(self._summary(self.products[0]), (5, Decimal('25.00'), 2))
+        self._assert_no_drift()
+
+    def test_updates_and_product_changes_apply_deltas(self):
+        item = self._add(self.products[0], 2)
+        self._add(self.products[1], 1)
+
+        item = OrderItem.objects.get(pk=item.pk)
+        item.quantity = 5
+        item.price = Decimal('6.00')
+        item.save()
+        self.assertEqual(self._summary(self.products[0]), (5, Decimal('30.00'), 1))
+
+        item.product = self.products[1]
+        item.save()
+        self.assertIsNone(self._summary(self.products[0]))
+        self.assertEqual(self._summary(self.products[1]), (6, Decimal('35.00'), 1))
+        self._assert_no_drift()
+
+    def test_deleting_order_with_repeated_lines_removes_summary(self):
+        self._add(self.products[2], 1)
+        self._add(self.products[2], 3)
+
+        self.order.delete()
+        self.assertIsNone(self._summary(self.products[2]))
+        self._assert_no_drift()
+
+    def test_rolled_back_cascade_does_not_skip_later_decrements(self):
+        self._add(self.products[2], 1)
+        self._add(self.products[2], 3)
+        with transaction.atomic():
+            SalesOrder.objects.get(pk=self.order.pk).delete()
+            transaction.set_rollback(True)
+        self.assertEqual(self._summary(self.products[2]), (4, Decimal('20.00'), 1))
+
+        # The next delete in this thread must count the order out again.
+        SalesOrder.objects.get(pk=self.order.pk).delete()
+        self.assertIsNone(self._summary(self.products[2]))
+        self._assert_no_drift()
+
+    def test_each_delete_in_a_transaction_counts_its_order_out(self):
+        with transaction.atomic():
+            self._add(self.products[2], 1).delete()
+            self._add(self.products[2], 2)
+            self._add(self.products[2], 3)
+            OrderItem.objects.filter(sales_order=self.order).delete()
+            self.assertIsNone(self._summary(self.products[2]))
+        self._assert_no_drift()
+
+    def test_quick_checkout_applies_deltas_without_waiting_for_commit(self):
+        user = User.objects.create_user(username='delta-cashier', password='pass123')
+        for product in self.products:
+            Inventory.objects.create(product=product, location='Front', quantity=10)
+
+        checkout.quick_checkout(user, [{'product_id': self.products[1].id, 'quantity': 3}])
+        self.assertEqual(self._summary(self.products[1]), (3, Decimal('15.00'), 1))
+        self._assert_no_drift()
+
+    def test_reconciliation_reports_and_repairs_drift(self):
+        self._add(self.products[0], 2)
+        ProductSalesSummary.objects.filter(product=self.products[0], period='daily').update(total_quantity=9)
+        today = timezone.localdate()
+
+        drift = reconcile_product_sales_summaries(today, today, tenant_id=704)
+        self.assertEqual(len(drift), 1)
+        self.assertEqual(drift[0]['actual'][0], 9)
+        self.assertEqual(drift[0]['expected'][0], 2)
+        self.assertEqual(self._summary(self.products[0]), (2, Decimal('10.00'), 1))
+        self._assert_no_drift()
+
+
+class SummaryRebuildTests(TestCase):
+    def setUp(self):
+        set_current_tenant(705)
+        self.addCleanup(set_current_tenant, None)
+        summary_queue.reset()
+        self.addCleanup(summary_queue.reset)
+        Company.objects.create(id=705, name='Retail Co', company_type='retail')
+        customer = Customer.objects.create(name='Shop', city='Town', customer_type='R', contact='705')
+        self.product = Product.objects.create(name='Item', cost=Decimal('1.00'), price=Decimal('2.00'), model='R')
+        self.today = timezone.localdate()
+        self.earlier = self.today - timedelta(days=45)
+        for days_ago in (0, 45):
+            order = SalesOrder.objects.create(customer=customer)
+            SalesOrder.objects.filter(pk=order.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+            OrderItem.objects.create(sales_order=SalesOrder.objects.get(pk=order.pk), product=self.product,
+                                     quantity=3, price=Decimal('2.00'))
+        ProductSalesSummary.objects.all().delete()
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.checkpoint = os.path.join(workdir.name, 'rebuild.json')
+
+    def _rebuild(self, **options):
+        out = StringIO()
+        call_command('rebuild_sales_summaries', tenant=[705], start=self.earlier, end=self.today, workers=1,
+                     checkpoint=self.checkpoint, stdout=out, **options)
+        return out.getvalue()
+
+    def test_rebuild_writes_rows_and_clears_checkpoint(self):
+        output = self._rebuild()
+
+        self.assertIn('chunks processed', output)
+        self.assertEqual(ProductSalesSummary.objects.filter(period='daily').count(), 2)
+        self.assertEqual(ProductSalesSummary.objects.filter(period='monthly').count(), 2)
+        self.assertEqual(reconcile_product_sales_summaries(self.earlier, self.today, tenant_id=705, fix=False), [])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_dry_run_prints_diff_without_writing(self):
+        output = self._rebuild(dry_run=True)
+
+        self.assertIn('stored=None', output)
+        self.assertFalse(ProductSalesSummary.objects.exists())
+
+    def test_resume_skips_checkpointed_chunks(self):
+        with open(self.checkpoint, 'w') as fh:
+            json.dump({'done': [[705, self.earlier.isoformat(), 'daily+monthly']]}, fh)
+
+        output = self._rebuild()
+
+        self.assertIn('1 chunks already rebuilt', output)
+        rebuilt = ProductSalesSummary.objects.filter(period='daily').values_list('period_start', flat=True)
+        self.assertEqual(list(rebuilt), [self.today])
+
+    def test_rollup_migration_rebuilds_days_of_monthly_only_tenants(self):
+        # Before 0004 a PRODUCT_SALES_SUMMARY_PERIOD='monthly' deployment kept whole-month rows only.
+        for day in (self.earlier, self.today):
+            month_start = day.replace(day=1)
+            ProductSalesSummary.objects.get_or_create(
+                product=self.product, period_start=month_start,
+                period_end=month_start.replace(day=calendar.monthrange(day.year, day.month)[1]),
+                defaults={'total_quantity': 3, 'total_revenue': Decimal('6.00'), 'total_orders': 1},
+            )
+        migration = importlib.import_module('app.point_of_sale.migrations.0004_product_sales_summary_rollups')
+
+        migration.label_and_roll_up_summaries(django_apps, None)
+
+        self.assertEqual(ProductSalesSummary.objects.filter(period='daily').count(), 2)
+        self.assertEqual(reconcile_product_sales_summaries(self.earlier, self.today, tenant_id=705, fix=False), [])
+
+
+@override_settings(PRODUCT_SALES_SUMMARY_ROLLUPS=['monthly', 'yearly'])
+class SummaryRollupTests(TestCase):
+    def setUp(self):
+        set_current_tenant(706)
+        self.addCleanup(set_current_tenant, None)
+        summary_queue.reset()
+        self.addCleanup(summary_queue.reset)
+        Company.objects.create(id=706, name='Retail Co', company_type='retail')
+        self.customer = Customer.objects.create(name='Shop', city='Town', customer_type='R', contact='706')
+        self.product = Product.objects.create(name='Item', cost=Decimal('1.00'), price=Decimal('2.00'), model='Y')
+
+    def _sell(self, when, quantity):
+        order = SalesOrder.objects.create(customer=self.customer)
+        SalesOrder.objects.filter(pk=order.pk).update(created_at=when)
+        with self.captureOnCommitCallbacks(execute=True):
+            return OrderItem.objects.create(sales_order=SalesOrder.objects.get(pk=order.pk), product=self.product,
+                                            quantity=quantity, price=Decimal('2.00'))
+
+    def _totals(self, period):
+        return list(ProductSalesSummary.objects.filter(period=period).values_list('total_quantity', 'total_orders'))
+
+    def test_rollups_follow_daily_rows(self):
+        now = timezone.now()
+        first = self._sell(now, 2)
+        self._sell(now - timedelta(days=1) if now.day > 1 else now, 3)
+        self.assertEqual(self._totals('monthly'), [(5, 2)])
+        self.assertEqual(self._totals('yearly'), [(5, 2)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self._totals('monthly'), [(3, 1)])
+        self.assertEqual(self._totals('yearly'), [(3, 1)])
+
+    def test_planner_uses_coarsest_complete_buckets(self):
+        self.assertEqual(plan_summary_buckets(date(2025, 1, 1), date(2025, 12, 31)),
+                         [('yearly', date(2025, 1, 1), date(2025, 12, 31))])
+
+        plan = plan_summary_buckets(date(2025, 1, 15), date(2026, 3, 10))
+        periods = [period for period, _, _ in plan]
+        self.assertEqual((periods.count('daily'), periods.count('monthly'), periods.count('yearly')), (27, 13, 0))
+        self.assertEqual(plan[17], ('monthly', date(2025, 2, 1), date(2025, 2, 28)))
+
+    def test_covering_rows_add_up_to_the_range(self):
+        today = timezone.localdate()
+        start = today - timedelta(days=400)
+        for days_ago in (0, 30, 200, 390, 420):
+            self._sell(timezone.now() - timedelta(days=days_ago), 1)
+
+        with self.assertNumQueries(1):
+            total = summaries_covering(start, today).aggregate(total=Sum('total_quantity'))['total']
+        self.assertEqual(total, 4)
+        self.assertLess(summaries_covering(start, today).count(), 10)
+
+
+class QuickCheckoutBatchTests(TestCase):
+    def setUp(self):
+        Company.objects.create(id=702, name='Retail Co', company_type='retail')
+        self.user = User.objects.create_user(username='terminal', password='pass123')
+        EmployeeProfile.objects.create(user=self.user, role='salesman', tenant_id=702)
+        self.client.force_login(self.user)
+        set_current_tenant(702)
+        self.addCleanup(set_current_tenant, None)
+        self.product = Product.objects.create(name='Soap', cost=Decimal('1.00'), price=Decimal('3.00'), model='S')
+        Inventory.objects.create(product=self.product, location='Front', quantity=5)
+
+    def _upload(self, sales):
+        response = self.client.post(
+            reverse('point_of_sale:quick_checkout_batch'),
+            data=json.dumps({'sales': sales}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def _sale(self, key, quantity):
+        return {'idempotency_key': key, 'items': [{'product_id': self.product.id, 'quantity': quantity}]}
+
+    def test_replayed_keys_return_the_original_sale(self):
+        first = self._upload([self._sale('a', 1), self._sale('b', 2), self._sale('a', 1)])
+        self.assertEqual([r['status'] for r in first], ['created', 'created', 'duplicate'])
+        self.assertEqual(first[2]['order_number'], first[0]['order_number'])
+
+        replay = self._upload([self._sale('b', 2), self._sale('a', 1)])
+        self.assertEqual([r['status'] for r in replay], ['duplicate', 'duplicate'])
+        self.assertEqual(replay[0]['invoice_number'], first[1]['invoice_number'])
+        self.assertEqual(SalesOrder.objects.count(), 2)
+        self.assertEqual(Inventory.objects.get().quantity, 2)
+
+    def test_sale_without_stock_fails_alone(self):
+        results = self._upload([self._sale('x', 4), self._sale('y', 4), self._sale('z', 1), {'items': []}])
+        self.assertEqual([r['status'] for r in results], ['created', 'error', 'created', 'error'])
+        self.assertEqual(results[1]['error'], 'Not enough stock for Soap')
+        self.assertEqual(Inventory.objects.get().quantity, 0)
+
+        # The rejected sale was not recorded, so it can be uploaded again once restocked.
+        Inventory.objects.update(quantity=4)
+        self.assertEqual(self._upload([self._sale('y', 4)])[0]['status'], 'created')
+
+    def test_chunk_locks_inventory_once_whatever_its_size(self):
+        Inventory.objects.update(quantity=40)
+        Inventory.objects.create(product=self.product, location='Back', quantity=20)
+
+        def inventory_reads(prefix, count):
+            sales = [self._sale(f'{prefix}{n}', 3) for n in range(count)]
+            with CaptureQueriesContext(connection) as ctx:
+                results = checkout.checkout_batch(self.user, sales, chunk_size=count)
+            self.assertEqual({r['status'] for r in results}, {'created'})
+            return [q['sql'] for q in ctx.captured_queries if 'FROM "inventory"' in q['sql']]
+
+        self.assertEqual(len(inventory_reads('small-', 2)), 1)
+        self.assertEqual(len(inventory_reads('large-', 8)), 1)
+        self.assertEqual(Inventory.objects.aggregate(total=Sum('quantity'))['total'], 60 - 30)
+        self.assertEqual(StockMovement.objects.filter(product=self.product).count(), 10)
+
+
+class SalesOrderListTests(TestCase):
+    def setUp(self):
+        Company.objects.create(id=707, name='Retail Co', company_type='retail')
+        self.user = User.objects.create_user(username='lister', password='pass123')
+        EmployeeProfile.objects.create(user=self.user, role='salesman', tenant_id=707)
+        self.client.force_login(self.user)
+        set_current_tenant(707)
+        self.addCleanup(set_current_tenant, None)
+        self.customer = Customer.objects.create(name='Shop', city='Town', customer_type='R', contact='707')
+        self.product = Product.objects.create(name='Soap', cost=Decimal('1.00'), price=Decimal('3.00'), model='S')
+
+    def _orders(self, count, **fields):
+        orders = []
+        for _ in range(count):
+            order = SalesOrder.objects.create(customer=self.customer, **fields)
+            OrderItem.objects.create(sales_order=order, product=self.product, quantity=2, price=Decimal('3.00'))
+            orders.append(order)
+        return orders
+
+    def _get(self, **params):
+        response = self.client.get(reverse('point_of_sale:sales_order_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def _page_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self._get()
+        return len(ctx.captured_queries)
+
+    def test_pages_walk_older_and_back_newer(self):
+        orders = self._orders(30)
+        Invoice.objects.create(sales_order=orders[-1], total_invoice_amount=Decimal('6.00'))
+
+        first = self._get()
+        self.assertEqual(len(first.context['sales_orders']), 24)
+        self.assertEqual(first.context['total_orders'], 30)
+        self.assertEqual(first.context['invoiced_count'], 1)
+        self.assertEqual(first.context['total_value'], Decimal('180.00'))
+        newest = first.context['sales_orders'][0]
+        self.assertEqual((newest.pk, newest.total_items, newest.total_amount), (orders[-1].pk, 2, Decimal('6.00')))
+        self.assertTrue(newest.has_invoice)
+        self.assertIsNone(first.context['newer_cursor'])
+
+        second = self._get(after=first.context['older_cursor'])
+        self.assertEqual([order.pk for order in second.context['sales_orders']], [o.pk for o in orders[5::-1]])
+        self.assertIsNone(second.context['older_cursor'])
+
+        back = self._get(before=second.context['newer_cursor'])
+        self.assertEqual([o.pk for o in back.context['sales_orders']], [o.pk for o in first.context['sales_orders']])
+
+    def test_query_count_does_not_grow_with_orders(self):
+        self._orders(3)
+        small = self._page_queries()
+        self._orders(40)
+        self.assertEqual(self._page_queries(), small)
+
+    def test_filters_by_status_customer_and_date(self):
+        self._orders(2)
+        self._orders(3, status='completed')
+        other = Customer.objects.create(name='Other', city='Town', customer_type='R', contact='708')
+        SalesOrder.objects.create(customer=other, status='completed')
+
+        completed = self._get(status='completed')
+        self.assertEqual(completed.context['total_orders'], 4)
+        by_customer = self._get(status='completed', customer=other.pk)
+        self.assertEqual(len(by_customer.context['sales_orders']), 1)
+        today = timezone.localdate()
+        self.assertEqual(self._get(start=today, end=today).context['total_orders'], 6)
+        self.assertEqual(self._get(end=today - timedelta(days=1)).context['total_orders'], 0)
+        self.assertEqual(self._get(start='2025-13-40').context['total_orders'], 6)
+
+
+class InvoicePaymentTotalsTests(TestCase):
+    def setUp(self):
+        Company.objects.create(id=808, name='Retail Co', company_type='retail')
+        self.user = User.objects.create_user(username='biller', password='pass123')
+        EmployeeProfile.objects.create(user=self.user, role='salesman', tenant_id=808)
+        self.client.force_login(self.user)
+        set_current_tenant(808)
+        self.addCleanup(set_current_tenant, None)
+        self.customer = Customer.objects.create(name='Shop', city='Town', customer_type='R', contact='808')
+
+    def _invoice(self, total=Decimal('100.00'), **fields):
+        order = SalesOrder.objects.create(customer=self.customer, cached_total=total)
+        return Invoice.objects.create(sales_order=order, total_invoice_amount=total, **fields)
+
+    def _pay(self, invoice, amount, type='payment'):
+        return Payment.objects.create(invoice=invoice, amount=Decimal(amount), payment_method='cash', type=type)
+
+    def _get(self, **params):
+        response = self.client.get(reverse('point_of_sale:invoice_list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_payments_and_refunds_update_stored_totals(self):
+        invoice = self._invoice()
+        self._pay(invoice, '40.00')
+        self.assertEqual((invoice.total_paid, invoice.payment_status), (Decimal('40.00'), 'partially_paid'))
+        self._pay(invoice, '60.00')
+        self._pay(invoice, '30.00', type='refund')
+
+        stored = Invoice.objects.get(pk=invoice.pk)
+        self.assertEqual((stored.total_paid, stored.total_refunded), (Decimal('100.00'), Decimal('30.00')))
+        self.assertEqual((stored.cached_paid_amount, stored.payment_status), (Decimal('70.00'), 'partially_paid'))
+        self.assertEqual(stored.payment_status, invoice.payment_status)
+        self.assertTrue(stored.has_refunds)
+
+    def test_payment_from_a_stale_instance_adds_to_the_stored_totals(self):
+        invoice = self._invoice()
+        stale = Invoice.objects.get(pk=invoice.pk)
+        self._pay(invoice, '50.00')
+        self._pay(stale, '50.00')
+
+        stored = Invoice.objects.get(pk=invoice.pk)
+        self.assertEqual((stored.total_paid, stored.payment_status), (Decimal('100.00'), 'paid'))
+
+    def test_recompute_matches_incremental_totals(self):
+        invoice = self._invoice()
+        self._pay(invoice, '100.00')
+        self._pay(invoice, '25.00', type='refund')
+        Invoice.objects.filter(pk=invoice.pk).update(total_paid=0, total_refunded=0, payment_status='unpaid')
+
+        invoice.refresh_from_db()
+        invoice.sales_order  # load the order up front; the check is one aggregate plus the save
+        with self.assertNumQueries(2):
+            invoice.update_cached_paid_amount()
+        self.assertEqual((invoice.total_paid, invoice.total_refunded), (Decimal('100.00'), Decimal('25.00')))
+        self.assertEqual(Invoice.objects.get(pk=invoice.pk).payment_status, 'partially_paid')
+
+    def test_list_query_count_does_not_grow_with_invoices(self):
+        def page_queries():
+            with CaptureQueriesContext(connection) as ctx:
+                self._get()
+            return len(ctx.captured_queries)
+
+        for _ in range(3):
+            self._pay(self._invoice(), '10.00')
+        small = page_queries()
+        for _ in range(30):
+            self._pay(self._invoice(), '10.00')
+        self.assertEqual(page_queries(), small)
+
+    def test_list_filters_by_payment_status_and_pages(self):
+        paid = [self._invoice() for _ in range(27)]
+        for invoice in paid:
+            self._pay(invoice, '100.00')
+        unpaid = self._invoice()
+
+        first = self._get()
+        self.assertEqual(len(first.context['invoices']), 25)
+        self.assertEqual(first.context['stats']['total_invoices'], 28)
+        self.assertEqual(first.context['stats']['paid_count'], 27)
+        self.assertEqual(first.context['invoices'][0].pk, unpaid.pk)
+        second = self._get(after=first.context['older_cursor'])
+        self.assertEqual([i.pk for i in second.context['invoices']], [paid[2].pk, paid[1].pk, paid[0].pk])
+
+        filtered = self._get(payment_status='unpaid')
+        self.assertEqual([i.pk for i in filtered.context['invoices']], [unpaid.pk])
+        self.assertEqual(filtered.context['stats']['unpaid_count'], 1)
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        self.assertEqual(list(self._get(start=tomorrow.isoformat()).context['invoices']), [])
+
+
+class OrderEditTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(id=909, name='Retail Co', company_type='retail')
+        self.user = User.objects.create_user(username='editor', password='pass123')
+        EmployeeProfile.objects.create(user=self.user, role='salesman', tenant_id=909)
+        self.client.force_login(self.user)
+        set_current_tenant(909)
+        self.addCleanup(set_current_tenant, None)
+        self.customer = Customer.objects.create(name='Shop', city='Town', customer_type='R', contact='909')
+        self.products = []
+        for i in range(3):
+            product = Product.objects.create(name=f'Bolt {i}', cost=Decimal('1.00'), price=Decimal('2.00'), model='B')
+            Inventory.objects.create(product=product, location='Main', quantity=20)
+            self.products.append(product)
+
+    def _order(self, quantities, finalize=True):
+        order = SalesOrder.objects.create(customer=self.customer)
+        for product, quantity in zip(self.products, quantities):
+            OrderItem.objects.create(sales_order=order, product=product, quantity=quantity, price=Decimal('2.00'))
+        if finalize:
+            order.finalize_order()
+        return order
+
+    def _edit(self, order, lines, **extra):
+        data = {'customer': self.customer.pk, 'note': '', 'items-TOTAL_FORMS': len(lines), **extra}
+        for i, (product, quantity) in enumerate(lines):
+            data.update({f'items-{i}-product': product.pk, f'items-{i}-quantity': quantity, f'items-{i}-price': '2.00'})
+        return self.client.post(reverse('point_of_sale:edit_sales_order', args=[order.pk]), data)
+
+    def _stock(self):
+        return [Inventory.objects.get(product=product).quantity for product in self.products]
+
+    def test_quantity_change_only_touches_that_line_and_product(self):
+        order = self._order([2, 3, 4])
+        item_ids = list(order.items.order_by('id').values_list('id', flat=True))
+        moves_before = StockMovement.objects.count()
+
+        response = self._edit(order, [(self.products[0], 2), (self.products[1], 5), (self.products[2], 4)])
+
+        self.assertRedirects(response, reverse('point_of_sale:sales_order_detail', args=[order.pk]),
+                             fetch_redirect_response=False)
+        self.assertEqual(list(order.items.order_by('id').values_list('id', flat=True)), item_ids)
+        self.assertEqual(self._stock(), [18, 15, 16])
+        new_moves = StockMovement.objects.order_by('id')[moves_before:]
+        self.assertEqual([(m.product_id, m.change_type, m.quantity_change) for m in new_moves],
+                         [(self.products[1].pk, StockMovementType.SALE, -2)])
+        order.refresh_from_db()
+        self.assertEqual((order.status, order.cached_total), ('completed', Decimal('22.00')))
+
+    def test_removed_and_added_lines_restore_and_deduct_net_quantities(self):
+        order = self._order([2, 3])
+
+        self._edit(order, [(self.products[0], 1), (self.products[2], 6)])
+
+        self.assertEqual(self._stock(), [19, 20, 14])
+        self.assertEqual(sorted(order.items.values_list('product_id', 'quantity')),
+                         [(self.products[0].pk, 1), (self.products[2].pk, 6)])
+        adjustments = StockMovement.objects.filter(related_sales_order=order, change_type=StockMovementType.ADJUSTMENT)
+        self.assertEqual(sorted(adjustments.values_list('product_id', 'quantity_change')),
+                         [(self.products[0].pk, 1), (self.products[1].pk, 3)])
+
+    def test_unchanged_submission_writes_no_items_or_movements(self):
+        order = self._order([2, 3])
+        moves_before = StockMovement.objects.count()
+
+        with CaptureQueriesContext(connection) as ctx:
+            self._edit(order, [(self.products[0], 2), (self.products[1], 3)])
+
+        self.assertEqual(StockMovement.objects.count(), moves_before)
+        self.assertFalse([q for q in ctx.captured_queries
+                          if q['sql'].startswith(('INSERT INTO "order_item"', 'DELETE FROM "order_item"',
+                                                  'UPDATE "order_item"', 'UPDATE "inventory"'))])
+
+    def test_insufficient_stock_rolls_back_the_whole_edit(self):
+        order = self._order([2, 3])
+
+        response = self._edit(order, [(self.products[0], 25), (self.products[1], 1)])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._stock(), [18, 17, 20])
+        self.assertEqual(sorted(order.items.values_list('quantity', flat=True)), [2, 3])
+
+    def test_wholesale_in_transit_order_saved_as_draft_returns_its_stock(self):
+        self.company.company_type = 'wholesale'
+        self.company.save()
+        order = self._order([2, 3], finalize=False)
+        order.mark_in_transit()
+
+        self._edit(order, [(self.products[0], 4)])
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'draft')
+        self.assertEqual(self._stock(), [20, 20, 20])
+        self.assertEqual(list(order.items.values_list('quantity', flat=True)), [4])
+
+    def test_wholesale_in_transit_edit_applies_only_the_delta(self):
+        self.company.company_type = 'wholesale'
+        self.company.save()
+        order = self._order([2, 3], finalize=False)
+        order.mark_in_transit()
+
+        self._edit(order, [(self.products[0], 2), (self.products[1], 1)], set_in_transit='on')
+
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'in_transit')
+        self.assertEqual(self._stock(), [18, 19, 20])
@@ -20,5 +20,6 @@ urlpatterns = [
     path('products/<int:product_id>/', views.product_sales_detail, name='product_sales_detail'),
     path('reports/popular-products/', views.popular_products_report, name='popular_products_report'),
     path('quick-checkout/', views.quick_checkout, name='quick_checkout'),
+    path('quick-checkout/batch/', views.quick_checkout_batch, name='quick_checkout_batch'),
 
 ]
@@ -1,7 +1,8 @@
 import json
-from datetime import timedelta
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
 from django.db.models import Sum
@@ -13,41 +14,115 @@ from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 from django.db import transaction
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.dateparse import parse_date
 
-from .models import SalesOrder, OrderItem, Invoice, Payment, ProductSalesSummary
+from . import checkout, order_edit
+from .listing import keyset_page
+from .models import ORDER_STATUS_CHOICES, SalesOrder, OrderItem, Invoice, Payment, ProductSalesSummary
 from .forms import SalesOrderForm, OrderItemForm, PaymentForm, RefundForm
+from .services import summaries_covering
 from ..customers.models import Customer
-from ..inventory.models import Product, Inventory, StockMovement, StockMovementType
+from ..inventory.locking import retry_on_deadlock, run_with_retry
+from ..inventory.models import Product, Inventory
 from ..employee.models import EmployeeProfile
-from app.core.models import Company
+
+SALES_ORDER_PAGE_SIZE = 24
+INVOICE_PAGE_SIZE = 25
+
+def _date_param(request, name):
+    try:
+        return parse_date(request.GET.get(name) or '')
+    except ValueError:
+        return None
+
 
 # Sales Order Views
 @login_required(login_url='/authentication/login/')
 def sales_order_list(request):
-    """Display list of all sales orders with status and actions"""
-    sales_orders = SalesOrder.objects.all().select_related('customer', 'employee').prefetch_related('items__product').order_by('-created_at')
-    
-    # Add computed fields and rollups
-    total_value = 0
-    invoiced_count = 0
+    """Display sales orders newest first, one keyset page at a time, with filters and totals."""
+
+    filters = {
+        'status': request.GET.get('status', ''),
+        'customer': request.GET.get('customer', ''),
+        'start': _date_param(request, 'start'),
+        'end': _date_param(request, 'end'),
+        'q': request.GET.get('q', '').strip(),
+    }
+
+    orders = SalesOrder.objects.all()
+    if filters['status'] in dict(ORDER_STATUS_CHOICES):
+        orders = orders.filter(status=filters['status'])
+    else:
+        filters['status'] = ''
+    if filters['customer'].isdigit():
+        orders = orders.filter(customer_id=int(filters['customer']))
+    else:
+        filters['customer'] = ''
+    # Compare against local-midnight bounds so the (tenant_id, created_at) indexes apply.
+    tz = timezone.get_current_timezone()
+    if filters['start']:
+        orders = orders.filter(created_at__gte=timezone.make_aware(datetime.combine(filters['start'], time.min), tz))
+    if filters['end']:
+        orders = orders.filter(
+            created_at__lt=timezone.make_aware(datetime.combine(filters['end'] + timedelta(days=1), time.min), tz)
+        )
+    if filters['q']:
+        orders = orders.filter(
+            models.Q(order_number__istartswith=filters['q']) | models.Q(customer__name__icontains=filters['q'])
+        )
+
+    stats = orders.aggregate(
+        total_orders=models.Count('id'),
+        invoiced_count=models.Count('invoice'),
+    )
+    total_value = OrderItem.objects.filter(sales_order__in=orders).aggregate(
+        total=Sum(models.F('quantity') * models.F('price'), output_field=models.DecimalField())
+    )['total'] or 0
+
+    items = OrderItem.objects.filter(sales_order=models.OuterRef('pk')).order_by().values('sales_order')
+    page = (
+        orders.select_related('customer', 'employee__user')
+        .annotate(
+            total_amount=Coalesce(
+                models.Subquery(items.annotate(
+                    amount=Sum(models.F('quantity') * models.F('price'), output_field=models.DecimalField())
+                ).values('amount')),
+                Decimal('0.00'),
+                output_field=models.DecimalField(),
+            ),
+            total_items=Coalesce(
+                models.Subquery(items.annotate(count=Sum('quantity')).values('count')),
+                0,
+            ),
+            invoice_pk=models.Subquery(Invoice.objects.filter(sales_order=models.OuterRef('pk')).values('id')[:1]),
+        )
+    )
+    sales_orders, older_cursor, newer_cursor = keyset_page(
+        page,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        size=SALES_ORDER_PAGE_SIZE,
+    )
     for order in sales_orders:
-        order.total_amount = sum(item.quantity * item.price for item in order.items.all())
+        order.has_invoice = order.invoice_pk is not None
 
-        order.total_items = sum(item.quantity for item in order.items.all())
-        order.has_invoice = hasattr(order, 'invoice')
-        order.status_display = order.get_status_display() if hasattr(order, 'get_status_display') else 'Draft'
-        total_value += float(order.total_amount or 0)
-        if order.has_invoice:
-            invoiced_count += 1
-    draft_count = sales_orders.count() - invoiced_count
+    query = request.GET.copy()
+    for key in ('after', 'before'):
+        query.pop(key, None)
 
     return render(request, 'point_of_sale/sales_order_list.html', {
         'sales_orders': sales_orders,
+        'total_orders': stats['total_orders'],
         'total_value': total_value,
-        'invoiced_count': invoiced_count,
-        'draft_count': draft_count,
+        'invoiced_count': stats['invoiced_count'],
+        'draft_count': stats['total_orders'] - stats['invoiced_count'],
+        'filters': filters,
+        'status_choices': ORDER_STATUS_CHOICES,
+        'filter_query': query.urlencode(),
+        'older_cursor': older_cursor,
+        'newer_cursor': newer_cursor,
     })
 
 
@@ -82,16 +157,6 @@ def edit_sales_order(request, sales_order_id):
         messages.error(request, "Cannot edit a sales order that has already been converted to an invoice.")
         return redirect('point_of_sale:sales_order_detail', sales_order_id=sales_order.id)
     
-    # Serialize products for JavaScript
-    products = Product.objects.all().values('id', 'name', 'price', 'barcode', 'model')
-    products_list = []
-    for product in products:
-        product_dict = dict(product)
-        if isinstance(product_dict.get('price'), Decimal):
-            product_dict['price'] = float(product_dict['price'])
-        products_list.append(product_dict)
-    products_json = json.dumps(products_list)
-    
     customers = Customer.objects.all()
     employees = EmployeeProfile.objects.all()
     order_items = sales_order.items.all()
@@ -100,120 +165,40 @@ def edit_sales_order(request, sales_order_id):
         sales_order_form = SalesOrderForm(request.POST, instance=sales_order)
 
         if sales_order_form.is_valid():
-            try:
-                with transaction.atomic():
-                    # First, reverse previous inventory deductions if needed
-                    if sales_order.status in ['completed', 'in_transit']:
-                        # Determine how much to reverse per product based on current items
-                        to_reverse = {}
-                        for it in sales_order.items.select_related('product').all():
-                            to_reverse[it.product_id] = to_reverse.get(it.product_id, 0) + int(it.quantity)
-
-                        if to_reverse:
-                            # Decide which movement type to reverse.
-                            # If order is completed but has in-transit movements, reverse those (wholesale flow).
-                            change_type = StockMovementType.SALE_IN_TRANSIT if (
-                                sales_order.status == 'in_transit' or
-                                StockMovement.objects.filter(related_sales_order=sales_order,
-                                                             change_type=StockMovementType.SALE_IN_TRANSIT).exists()
-                            ) else StockMovementType.SALE
-                            # Walk movements from latest to oldest and add back until satisfied
-                            prior_moves = (StockMovement.objects.select_for_update()
-                                           .filter(related_sales_order=sales_order,
-                                                   change_type=change_type)
-                                            .order_by('-created_at', '-id'))
-                            for mv in prior_moves:
-                                remaining = to_reverse.get(mv.product_id, 0)
-                                if remaining <= 0:
-                                    continue
-                                moved = -int(mv.quantity_change)  # SALE is negative
-                                qty_to_add = min(moved, remaining)
-                                if qty_to_add <= 0:
-                                    continue
-                                inv = (Inventory.objects.select_for_update()
-                                       .filter(product=mv.product, location=mv.location)
-                                       .first())
-                                if not inv:
-                                    inv = Inventory(product=mv.product, location=mv.location, quantity=0)
-                                inv.quantity += qty_to_add
-                                inv.save()
-                                # Log compensating adjustment for audit trail
-                                StockMovement.objects.create(
-                                    product=mv.product,
-                                    location=mv.location,
-                                    change_type=StockMovementType.ADJUSTMENT,
-                                    quantity_change=qty_to_add,
-                                    related_sales_order=sales_order,
-                                    tenant_id=sales_order.tenant_id,
-                                    note=f"Reversal for editing SO {sales_order.order_number or sales_order.id}"
-                                )
-                                to_reverse[mv.product_id] = remaining - qty_to_add
-                                # Optional micro-optimization: break when all zero
-                                if all(qty <= 0 for qty in to_reverse.values()):
-                                    break
-
-                        # Mark order as draft again
-                        sales_order.status = 'draft'
-                        sales_order.save()
-
-                    updated_sales_order = sales_order_form.save()
-
-                    # Delete existing items and recreate them
-                    sales_order.items.all().delete()
-
-                    # Process items from the frontend
-                    total_forms = int(request.POST.get('items-TOTAL_FORMS', 0))
-
-                    for i in range(total_forms):
-                        product_id = request.POST.get(f'items-{i}-product')
-                        quantity = request.POST.get(f'items-{i}-quantity')
-                        price = request.POST.get(f'items-{i}-price')
-
-                        if product_id and quantity and price:
-                            try:
-                                product = Product.objects.get(id=product_id)
-                                OrderItem.objects.create(
-                                    sales_order=updated_sales_order,
-                                    product=product,
-                                    quantity=int(quantity),
-                                    price=float(price)
-                                )
-                            except (Product.DoesNotExist, ValueError) as e:
-                                messages.error(request, f"Error updating item: {str(e)}")
-                                continue
-
-                    # Decide action based on company type and user intent
-                    tenant_id = getattr(getattr(request.user, 'employee_profile', None), 'tenant_id', None)
-                    company = Company.objects.filter(id=tenant_id).first()
-                    set_in_transit = request.POST.get('set_in_transit') in ['on', 'true', '1']
-                    try:
-                        if company and company.company_type == 'wholesale':
-                            if set_in_transit:
-                                updated_sales_order.mark_in_transit()
-                                messages.success(request, f"Sales order {updated_sales_order.order_number} updated and moved to In Transit.")
-                            else:
-                                # Keep as draft and only update total
-                                updated_sales_order.cached_total = updated_sales_order.total_price
-                                updated_sales_order.save()
-                                messages.success(request, f"Sales order {updated_sales_order.order_number} updated as Draft. Mark In Transit to deduct inventory.")
-                        else:
-                            updated_sales_order.finalize_order()
-                            messages.success(request, f"Sales order {updated_sales_order.order_number} updated and inventory adjusted successfully!")
-                    except ValidationError as e:
-                        messages.error(request, f"Error updating order: {str(e)}")
-                        return render(request, 'point_of_sale/edit_sales_order.html', {
-                            'sales_order_form': sales_order_form,
-                            'sales_order': sales_order,
-                            'order_items': order_items,
-                            'products': products_json,
-                            'customers': customers,
-                            'employees': employees
-                        })
-
-                    return redirect('point_of_sale:sales_order_detail', sales_order_id=updated_sales_order.id)
+            lines, line_errors = order_edit.parse_lines(request.POST)
+            for error in line_errors:
+                messages.error(request, error)
+            set_in_transit = request.POST.get('set_in_transit') in ['on', 'true', '1']
+            original_status = sales_order.status
+
+            def apply_edit():
+                # A retried attempt starts from the status the order had before the edit.
+                sales_order.status = original_status
+                sales_order_form.save()
+                return order_edit.edit_order(sales_order, lines, set_in_transit=set_in_transit)
 
+            try:
+                status = run_with_retry(apply_edit)
+            except ValidationError as e:
+                sales_order.status = original_status
+                messages.error(request, f"Error updating order: {str(e)}")
+                return render(request, 'point_of_sale/edit_sales_order.html', {
+                    'sales_order_form': sales_order_form,
+                    'sales_order': sales_order,
+                    'order_items': order_items,
+                    'customers': customers,
+                    'employees': employees
+                })
             except Exception as e:
                 messages.error(request, f"Error updating sales order: {str(e)}")
+            else:
+                if status == 'in_transit':
+                    messages.success(request, f"Sales order {sales_order.order_number} updated and moved to In Transit.")
+                elif status == 'draft':
+                    messages.success(request, f"Sales order {sales_order.order_number} updated as Draft. Mark In Transit to deduct inventory.")
+                else:
+                    messages.success(request, f"Sales order {sales_order.order_number} updated and inventory adjusted successfully!")
+                return redirect('point_of_sale:sales_order_detail', sales_order_id=sales_order.id)
         else:
             for field, errors in sales_order_form.errors.items():
                 for error in errors:
@@ -226,7 +211,6 @@ def edit_sales_order(request, sales_order_id):
         'sales_order_form': sales_order_form,
         'sales_order': sales_order,
         'order_items': order_items,
-        'products': products_json,
         'customers': customers,
         'employees': employees
     })
@@ -238,17 +222,6 @@ def create_sales_order(request):
         SalesOrder, OrderItem, form=OrderItemForm, extra=1, can_delete=True
     )
     
-    # Serialize products for JavaScript
-    products = Product.objects.all().values('id', 'name', 'price', 'barcode', 'model')
-    # Convert Decimal to float for JSON serialization
-    products_list = []
-    for product in products:
-        product_dict = dict(product)
-        if isinstance(product_dict.get('price'), Decimal):
-            product_dict['price'] = float(product_dict['price'])
-        products_list.append(product_dict)
-    products_json = json.dumps(products_list)
-    
     customers = Customer.objects.all()
     employees = EmployeeProfile.objects.all()
 
@@ -294,11 +267,9 @@ def create_sales_order(request):
                                 continue
 
                     # Decide action based on company type and user intent
-                    tenant_id = getattr(getattr(request.user, 'employee_profile', None), 'tenant_id', None)
-                    company = Company.objects.filter(id=tenant_id).first()
                     set_in_transit = request.POST.get('set_in_transit') in ['on', 'true', '1']
                     try:
-                        if company and company.company_type == 'wholesale':
+                        if request.tenant.is_wholesale:
                             if set_in_transit:
                                 sales_order.mark_in_transit()
                                 messages.success(request, f"Sales order {sales_order.order_number} created and moved to In Transit.")
@@ -324,7 +295,6 @@ def create_sales_order(request):
                                         payment_method='cash',
                                         received_by=request.user,
                                     )
-                                    invoice.update_cached_paid_amount()
                             except Exception as e:
                                 messages.warning(request, f"Order created, but auto-invoice/payment failed: {str(e)}")
                             messages.success(request, f"Sales order {sales_order.order_number} created and inventory updated successfully!")
@@ -333,7 +303,6 @@ def create_sales_order(request):
                         messages.error(request, f"Error creating sales order: {str(e)}")
                         return render(request, 'point_of_sale/create_sales_order.html', {
                             'sales_order_form': sales_order_form,
-                            'products': products_json,
                             'customers': customers,
                             'employees': employees
                         })
@@ -347,7 +316,6 @@ def create_sales_order(request):
 
     return render(request, 'point_of_sale/create_sales_order.html', {
         'sales_order_form': sales_order_form,
-        'products': products_json,
         'customers': customers,
         'employees': employees
     })
@@ -399,24 +367,61 @@ def convert_to_invoice(request, sales_order_id):
 # Invoice Views
 @login_required(login_url='/authentication/login/')
 def invoice_list(request):
-    invoices = Invoice.objects.all().select_related('sales_order', 'sales_order__customer')
-    
-    # Calculate payment and refund totals for each invoice
-    for invoice in invoices:
-        total_paid = invoice.payments.filter(type='payment').aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        
-        total_refunded = invoice.payments.filter(type='refund').aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
-        
-        invoice.net_paid = total_paid - total_refunded
-        invoice.total_paid = total_paid
-        invoice.total_refunded = total_refunded
-        invoice.has_refunds = total_refunded > 0
-    
-    return render(request, 'point_of_sale/invoice_list.html', {'invoices': invoices})
+    """Display invoices newest first, one keyset page at a time, filtered by payment status and date."""
+
+    filters = {
+        'payment_status': request.GET.get('payment_status', ''),
+        'start': _date_param(request, 'start'),
+        'end': _date_param(request, 'end'),
+        'q': request.GET.get('q', '').strip(),
+    }
+
+    invoices = Invoice.objects.all()
+    if filters['payment_status'] in dict(Invoice.PAYMENT_STATUS_CHOICE):
+        invoices = invoices.filter(payment_status=filters['payment_status'])
+    else:
+        filters['payment_status'] = ''
+    tz = timezone.get_current_timezone()
+    if filters['start']:
+        invoices = invoices.filter(date__gte=timezone.make_aware(datetime.combine(filters['start'], time.min), tz))
+    if filters['end']:
+        invoices = invoices.filter(
+            date__lt=timezone.make_aware(datetime.combine(filters['end'] + timedelta(days=1), time.min), tz)
+        )
+    if filters['q']:
+        invoices = invoices.filter(invoice_number__istartswith=filters['q'])
+
+    # One pass over the filtered invoices for every status count and the money totals.
+    stats = invoices.aggregate(
+        total_invoices=models.Count('id'),
+        paid_count=models.Count('id', filter=models.Q(payment_status='paid')),
+        partially_paid_count=models.Count('id', filter=models.Q(payment_status='partially_paid')),
+        unpaid_count=models.Count('id', filter=models.Q(payment_status='unpaid')),
+        total_paid=Sum('total_paid', default=Decimal('0.00')),
+        total_refunded=Sum('total_refunded', default=Decimal('0.00')),
+    )
+
+    page, older_cursor, newer_cursor = keyset_page(
+        invoices.select_related('sales_order', 'sales_order__customer'),
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        size=INVOICE_PAGE_SIZE,
+        fields=('date', 'id'),
+    )
+
+    query = request.GET.copy()
+    for key in ('after', 'before'):
+        query.pop(key, None)
+
+    return render(request, 'point_of_sale/invoice_list.html', {
+        'invoices': page,
+        'stats': stats,
+        'filters': filters,
+        'payment_status_choices': Invoice.PAYMENT_STATUS_CHOICE,
+        'filter_query': query.urlencode(),
+        'older_cursor': older_cursor,
+        'newer_cursor': newer_cursor,
+    })
 
 
 @login_required(login_url='/authentication/login/')
@@ -428,7 +433,8 @@ def invoice_print(request, pk):
 @login_required(login_url='/authentication/login/')
 @transaction.atomic
 def process_refund(request, invoice_id):
-    invoice = get_object_or_404(Invoice, id=invoice_id)
+    # Locked so two refunds submitted together cannot both pass the available amount check.
+    invoice = get_object_or_404(Invoice.objects.select_for_update(), id=invoice_id)
     customer = invoice.sales_order.customer
 
     # Check if invoice has been paid
@@ -437,15 +443,9 @@ def process_refund(request, invoice_id):
         return redirect('point_of_sale:invoice_detail', invoice_id=invoice.id)
 
     # Calculate available amount for refund
-    total_paid = invoice.payments.filter(type='payment').aggregate(
-        total=models.Sum('amount')
-    )['total'] or 0
-    
-    total_refunded = invoice.payments.filter(type='refund').aggregate(
-        total=models.Sum('amount')
-    )['total'] or 0
-    
-    available_for_refund = total_paid - total_refunded
+    total_paid = invoice.total_paid
+    total_refunded = invoice.total_refunded
+    available_for_refund = invoice.net_paid
 
     if available_for_refund <= 0:
         messages.error(request, "No amount available for refund.")
@@ -462,9 +462,6 @@ def process_refund(request, invoice_id):
                 refund.received_by = request.user
                 refund.save()
 
-                # Update invoice payment state
-                invoice.update_cached_paid_amount()
-
                 # Update customer account balance (increase debt for refund)
                 if customer:
                     customer.total_debt += refund.amount
@@ -493,15 +490,9 @@ def invoice_detail(request, invoice_id):
     invoice = get_object_or_404(Invoice, id=invoice_id)
     
     # Calculate payment and refund totals
-    total_paid = invoice.payments.filter(type='payment').aggregate(
-        total=models.Sum('amount')
-    )['total'] or 0
-    
-    total_refunded = invoice.payments.filter(type='refund').aggregate(
-        total=models.Sum('amount')
-    )['total'] or 0
-    
-    available_for_refund = total_paid - total_refunded
+    total_paid = invoice.total_paid
+    total_refunded = invoice.total_refunded
+    available_for_refund = invoice.net_paid
     
     # Get payment and refund history
     payments = invoice.payments.filter(type='payment').order_by('-date')
@@ -542,7 +533,7 @@ def product_sales_detail(request, product_id):
     )
 
     sales_summaries = (
-        ProductSalesSummary.objects.filter(product=product)
+        ProductSalesSummary.objects.filter(product=product, period='daily')
         .order_by('-period_start')[:12]
     )
 
@@ -581,10 +572,8 @@ def popular_products_report(request):
     if start_date > end_date:
         start_date, end_date = end_date, start_date
 
-    summaries = ProductSalesSummary.objects.filter(
-        period_start__gte=start_date,
-        period_end__lte=end_date,
-    )
+    # Whole years/months come from the rollup rows, only the ragged edges from daily rows.
+    summaries = summaries_covering(start_date, end_date)
 
     top_products = list(
         summaries.values(
@@ -632,9 +621,6 @@ def add_payment(request, invoice_id):
             payment.received_by = request.user
             payment.save()
 
-            # Update invoice payment state
-            invoice.update_cached_paid_amount()
-
             # Update customer account balance
             if customer:
                 customer.total_debt -= payment.amount
@@ -655,7 +641,7 @@ def add_payment(request, invoice_id):
 
 @login_required(login_url='/authentication/login/')
 @require_http_methods(["GET", "POST"])
-@transaction.atomic
+@retry_on_deadlock
 def quick_checkout(request):
     """
     Fast POS endpoint:
@@ -670,16 +656,8 @@ def quick_checkout(request):
     }
     """
     if request.method == 'GET':
-        # Simple UI to test quick checkout; embed product catalog for selection/scanning
-        products = Product.objects.all().values('id', 'name', 'price', 'barcode', 'model')
-        # Convert Decimal to float for JSON serialization
-        plist = []
-        for p in products:
-            d = dict(p)
-            if isinstance(d.get('price'), Decimal):
-                d['price'] = float(d['price'])
-            plist.append(d)
-        return render(request, 'point_of_sale/quick_checkout.html', { 'products': json.dumps(plist) })
+        # The page loads the product catalog from inventory:catalog_sync and caches it locally.
+        return render(request, 'point_of_sale/quick_checkout.html')
 
     try:
         data = json.loads(request.body.decode('utf-8'))
@@ -692,62 +670,50 @@ def quick_checkout(request):
     if not items:
         return JsonResponse({"error": "No items provided"}, status=400)
 
-    # Ensure a Walk-in Customer with static code exists (customer_id = "001" via contact field)
-    walkin_customer = Customer.objects.filter(name='Walk-in Customer', city='Walk-in', contact='001').first()
-    if not walkin_customer:
-        walkin_customer = Customer.objects.create(
-            name='Walk-in Customer',
-            city='Walk-in',
-            customer_type='C',
-            contact='001',  # static code
-            email='',
-            shop=''
-        )
-
-    # Create draft order
-    sales_order = SalesOrder.objects.create(
-        customer=walkin_customer,
-        customer_type='walk_in',
-        employee=EmployeeProfile.objects.filter(user=request.user).first(),
-        status='draft'
-    )
-
-    # Add items
-    for it in items:
-        try:
-            product = Product.objects.get(pk=it['product_id'])
-            qty = int(it['quantity'])
-            price = Decimal(str(it.get('price', product.price)))
-        except Exception:
-            transaction.set_rollback(True)
-            return JsonResponse({"error": "Invalid item in payload"}, status=400)
-        OrderItem.objects.create(sales_order=sales_order, product=product, quantity=qty, price=price)
-
-    # Finalize order: updates cached_total and deducts inventory + logs StockMovement
     try:
-        sales_order.finalize_order()
+        sales_order, invoice = checkout.quick_checkout(request.user, items, payment_method)
+    except checkout.InvalidCheckoutItem as e:
+        transaction.set_rollback(True)
+        return JsonResponse({"error": str(e)}, status=400)
     except ValidationError as e:
         transaction.set_rollback(True)
         return JsonResponse({"error": str(e)}, status=400)
 
-    # Create invoice, mark paid, and record payment
-    invoice = Invoice.objects.create(
-        sales_order=sales_order,
-        total_invoice_amount=sales_order.cached_total,
-        created_by=request.user,
-        payment_status='paid'
-    )
-    Payment.objects.create(
-        invoice=invoice,
-        amount=sales_order.cached_total,
-        payment_method=payment_method,
-        received_by=request.user
-    )
-    invoice.update_cached_paid_amount()
-
     return JsonResponse({
         "order_number": sales_order.order_number,
         "invoice_number": invoice.invoice_number,
         "total": float(sales_order.cached_total),
         "status": "paid"
     })
+
+
+@login_required(login_url='/authentication/login/')
+@require_http_methods(["POST"])
+def quick_checkout_batch(request):
+    """
+    Upload sales recorded while a POS terminal was offline.
+
+    Expected JSON body:
+    {
+      "sales": [
+        {"idempotency_key": "<client uuid>", "items": [...], "payment_method": "cash"}, ...
+      ]
+    }
+
+    Returns {"results": [...]} with one entry per sale, in order; each has the
+    idempotency_key and a status of "created", "duplicate" (already uploaded,
+    original order/invoice numbers returned) or "error".
+    """
+    try:
+        data = json.loads(request.body.decode('utf-8'))
+    except Exception:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+
+    sales = data.get('sales') if isinstance(data, dict) else None
+    if not isinstance(sales, list) or not sales or not all(isinstance(sale, dict) for sale in sales):
+        return JsonResponse({"error": "No sales provided"}, status=400)
+    max_sales = getattr(settings, 'CHECKOUT_BATCH_MAX_SALES', 500)
+    if len(sales) > max_sales:
+        return JsonResponse({"error": f"At most {max_sales} sales per upload"}, status=413)
+
+    return JsonResponse({"results": checkout.checkout_batch(request.user, sales)})
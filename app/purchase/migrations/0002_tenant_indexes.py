@@ -0,0 +1,33 @@
+# Generated by Django 4.2.9 on 2026-10-18 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('purchase', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['tenant_id', '-bill_date'], name='purchase_bi_tenant__f9e3ed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['tenant_id', '-created_at'], name='purchase_pu_tenant__97f053_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorder',
+            index=models.Index(fields=['tenant_id', 'status', '-created_at'], name='purchase_pu_tenant__fdb832_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='purchaseorderitem',
+            index=models.Index(fields=['tenant_id', 'purchase_order'], name='purchase_pu_tenant__d7519e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['tenant_id', 'name'], name='purchase_ve_tenant__24d706_idx'),
+        ),
+    ]
@@ -22,6 +22,11 @@ class Bill(TenantAwareModel):
     paid_to = models.ForeignKey(EmployeeProfile, null=True, blank=True, on_delete=models.SET_NULL)
     notes = models.TextField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant_id', '-bill_date']),
+        ]
+
     def __str__(self):
         return f"{self.get_category_display()} - {self.amount} on {self.bill_date}"
 
@@ -31,6 +36,11 @@ class Vendor(TenantAwareModel):
     contact = models.CharField(max_length=50, blank=True, null=True)
     email = models.EmailField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant_id', 'name']),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -50,6 +60,13 @@ class PurchaseOrder(TenantAwareModel):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        # Newest-first purchase order list, unfiltered or by status.
+        indexes = [
+            models.Index(fields=['tenant_id', '-created_at']),
+            models.Index(fields=['tenant_id', 'status', '-created_at']),
+        ]
+
     def __str__(self):
         return f"PO #{self.id} - {self.vendor.name if self.vendor else 'No Vendor'}"
 
@@ -113,6 +130,11 @@ class PurchaseOrderItem(TenantAwareModel):
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
     subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['tenant_id', 'purchase_order']),
+        ]
+
     def save(self, *args, **kwargs):
         self.subtotal = (self.quantity or 0) * (self.unit_price or 0)
         super().save(*args, **kwargs)
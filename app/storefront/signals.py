@@ -1,3 +1,7 @@
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils.text import slugify
@@ -30,10 +34,14 @@ def create_storefront_listing(sender, instance, created, **kwargs):
 
     slug = _generate_unique_slug(instance.name, instance.pk)
 
-    StorefrontProduct.objects.create(
-        product=instance,
+    _listing(instance, slug).save()
+
+
+def _listing(product, slug):
+    return StorefrontProduct(
+        product=product,
         slug=slug,
-        list_price=instance.price,
+        list_price=product.price,
         seven_day_test_price=None,
         test_price_expires_at=None,
         compatibility_notes='',
@@ -41,3 +49,31 @@ def create_storefront_listing(sender, instance, created, **kwargs):
         is_published=False,
         short_tagline='',
     )
+
+
+def create_storefront_listings(products, batch_size=500):
+    """
+    Bulk version of ``create_storefront_listing`` for products inserted with ``bulk_create``,
+    which sends no post_save. Slugs are resolved with a couple of queries, not one per attempt.
+    """
+    products = list(products)
+    if not products:
+        return []
+
+    bases = {product.pk: slugify(product.name) or f"product-{product.pk}" for product in products}
+    taken = set(StorefrontProduct.objects.filter(slug__in=set(bases.values())).values_list('slug', flat=True))
+    clashing = sorted({base for base in bases.values() if base in taken})
+    for start in range(0, len(clashing), batch_size):
+        prefixes = reduce(or_, (Q(slug__startswith=f"{base}-") for base in clashing[start:start + batch_size]))
+        taken.update(StorefrontProduct.objects.filter(prefixes).values_list('slug', flat=True))
+
+    listings = []
+    for product in products:
+        base_slug = slug = bases[product.pk]
+        suffix = 1
+        while slug in taken:
+            slug = f"{base_slug}-{suffix}"
+            suffix += 1
+        taken.add(slug)
+        listings.append(_listing(product, slug))
+    return StorefrontProduct.objects.bulk_create(listings, batch_size=batch_size)
@@ -1,15 +1,9 @@
 document.addEventListener('alpine:init', () => {
     Alpine.data('inventoryManager', () => ({
         isGridView: true,
-        searchQuery: '',
         importFile: null,
         isImporting: false,
-        filters: {
-            category: '',
-            minPrice: '',
-            maxPrice: '',
-            stock: 'all'
-        },
+        importJob: null,
 
         init() {
             // Load view preference from localStorage
@@ -21,19 +15,6 @@ document.addEventListener('alpine:init', () => {
             localStorage.setItem('inventoryView', this.isGridView ? 'grid' : 'list');
         },
 
-        filterItems() {
-            // Implement client-side filtering logic
-            const searchTerm = this.searchQuery.toLowerCase();
-            const items = document.querySelectorAll('.item-card, .table tbody tr');
-
-            items.forEach(item => {
-                const name = item.querySelector('.item-name').textContent.toLowerCase();
-                const category = item.querySelector('.category').textContent.toLowerCase();
-                const shouldShow = name.includes(searchTerm) || category.includes(searchTerm);
-                item.style.display = shouldShow ? '' : 'none';
-            });
-        },
-
         async editItem(id) {
             window.location.href = `/inventory/edit/${id}/`;
         },
@@ -82,37 +63,6 @@ document.addEventListener('alpine:init', () => {
             modal.show();
         },
 
-        applyFilters() {
-            // Implement filter logic
-            // This would typically make an API call with the filter parameters
-            console.log('Applying filters:', this.filters);
-        },
-
-        async exportInventory() {
-            try {
-                // Export is a file download; use GET to avoid CSRF.
-                const response = await fetch('/inventory/export_inventory/', {
-                    method: 'GET'
-                });
-
-                if (response.ok) {
-                    const blob = await response.blob();
-                    const url = window.URL.createObjectURL(blob);
-                    const a = document.createElement('a');
-                    a.href = url;
-                    a.download = 'inventory.xlsx';
-                    document.body.appendChild(a);
-                    a.click();
-                    window.URL.revokeObjectURL(url);
-                    this.showNotification('Export completed successfully', 'success');
-                } else {
-                    throw new Error('Export failed');
-                }
-            } catch (error) {
-                this.showNotification('Error exporting inventory', 'error');
-            }
-        },
-
         openImportModal() {
             const modal = new bootstrap.Modal(document.getElementById('importModal'));
             modal.show();
@@ -127,6 +77,7 @@ document.addEventListener('alpine:init', () => {
             if (!file || this.isImporting) return;
 
             this.isImporting = true;
+            this.importJob = null;
             try {
                 const formData = new FormData();
                 formData.append('file', file);
@@ -140,8 +91,8 @@ document.addEventListener('alpine:init', () => {
                 });
 
                 if (response.ok) {
-                    this.showNotification('Import completed successfully', 'success');
-                    window.location.reload();
+                    const data = await response.json();
+                    await this.pollImportJob(data.status_url);
                 } else {
                     let message = `Import failed (HTTP ${response.status})`;
                     try {
@@ -163,6 +114,39 @@ document.addEventListener('alpine:init', () => {
             }
         },
 
+        async pollImportJob(statusUrl) {
+            // The import runs as a background job; poll it until it finishes.
+            while (true) {
+                const response = await fetch(statusUrl, {
+                    headers: { 'X-Requested-With': 'XMLHttpRequest' }
+                });
+                if (!response.ok) {
+                    this.showNotification(`Could not read import progress (HTTP ${response.status})`, 'error');
+                    return;
+                }
+                this.importJob = await response.json();
+                if (this.importJob.finished) break;
+                await new Promise(resolve => setTimeout(resolve, 1500));
+            }
+
+            if (this.importJob.status === 'failed') {
+                this.showNotification(`Import failed: ${this.importJob.message}`, 'error');
+            } else if (this.importJob.error_count) {
+                this.showNotification(`Imported ${this.importJob.rows_imported} lines with ${this.importJob.error_count} row errors`, 'info');
+            } else {
+                this.showNotification('Import completed successfully', 'success');
+                window.location.reload();
+            }
+        },
+
+        importProgressText() {
+            const job = this.importJob;
+            if (!job) return '';
+            const rate = job.rows_per_second ? ` · ${job.rows_per_second} rows/s` : '';
+            const errors = job.error_count ? ` · ${job.error_count} errors` : '';
+            return `${job.status}: ${job.rows_processed} rows processed, ${job.rows_imported} imported${errors}${rate}`;
+        },
+
         printInventory() {
             window.print();
         },
@@ -0,0 +1,60 @@
+// Keeps a copy of the tenant's product catalog in localStorage and only downloads changes.
+window.PosCatalog = (() => {
+    const storageKey = (tenant) => `pos-catalog:${tenant || 'default'}`;
+
+    function readCache(tenant) {
+        try {
+            return JSON.parse(localStorage.getItem(storageKey(tenant)));
+        } catch (error) {
+            return null;
+        }
+    }
+
+    function writeCache(tenant, catalog) {
+        try {
+            localStorage.setItem(storageKey(tenant), JSON.stringify(catalog));
+        } catch (error) {
+            // Storage full or disabled: the catalog is simply fetched again next time.
+        }
+    }
+
+    const toList = (catalog) => Object.values(catalog ? catalog.products : {});
+
+    async function load(url, tenant) {
+        const cached = readCache(tenant);
+        const requestUrl = new URL(url, window.location.origin);
+        const headers = { Accept: 'application/json' };
+        if (cached && cached.version) {
+            requestUrl.searchParams.set('since', cached.version);
+            if (cached.etag) {
+                headers['If-None-Match'] = cached.etag;
+            }
+        }
+
+        let response;
+        try {
+            response = await fetch(requestUrl, { headers, credentials: 'same-origin' });
+        } catch (error) {
+            console.error('Catalog sync failed, using cached catalog:', error);
+            return toList(cached);
+        }
+        if (response.status === 304 || !response.ok) {
+            return toList(cached);
+        }
+
+        const data = await response.json();
+        const products = data.full || !cached ? {} : cached.products;
+        data.products.forEach((row) => {
+            const product = {};
+            data.fields.forEach((field, index) => { product[field] = row[index]; });
+            products[product.id] = product;
+        });
+        data.deleted.forEach((id) => { delete products[id]; });
+
+        const catalog = { version: data.version, etag: response.headers.get('ETag'), products };
+        writeCache(tenant, catalog);
+        return toList(catalog);
+    }
+
+    return { load };
+})();
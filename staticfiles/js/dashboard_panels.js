@@ -0,0 +1,22 @@
+// Loads every dashboard panel in parallel so one slow widget never blocks the others.
+document.addEventListener('DOMContentLoaded', () => {
+    const panels = document.querySelectorAll('.dashboard-panel[data-panel-url]');
+
+    panels.forEach(async (panel) => {
+        try {
+            const response = await fetch(panel.dataset.panelUrl, {
+                headers: { 'X-Requested-With': 'XMLHttpRequest' },
+                credentials: 'same-origin',
+            });
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            panel.innerHTML = await response.text();
+        } catch (error) {
+            console.error('Error loading dashboard panel:', panel.dataset.panelUrl, error);
+            panel.innerHTML = '<div class="text-muted small p-3">Unable to load this section.</div>';
+        } finally {
+            panel.classList.remove('loading');
+        }
+    });
+});
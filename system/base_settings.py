@@ -161,6 +161,62 @@ S3_UPLOAD_SECRET_KEY = os.getenv('S3_UPLOAD_SECRET_KEY', AWS_SECRET_ACCESS_KEY i
 S3_UPLOAD_USE_ANONYMOUS = os.getenv('S3_UPLOAD_USE_ANONYMOUS', 'false').lower() == 'true'
 S3_UPLOAD_PUBLIC_BASE_URL = os.getenv('S3_UPLOAD_PUBLIC_BASE_URL', PUBLIC_MEDIA_BASE_URL)
 
+# Caching: local-memory by default; set CACHE_REDIS_URL to share cache entries across workers.
+CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL')
+if CACHE_REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_REDIS_URL,
+        }
+    }
+
+DASHBOARD_CACHE_ALIAS = os.getenv('DASHBOARD_CACHE_ALIAS', 'default')
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_TIMEOUT', '60'))
+
+# Transactions that lock inventory are replayed on deadlocks/lock timeouts.
+STOCK_LOCK_RETRY_ATTEMPTS = int(os.getenv('STOCK_LOCK_RETRY_ATTEMPTS', '3'))
+STOCK_LOCK_RETRY_BACKOFF = float(os.getenv('STOCK_LOCK_RETRY_BACKOFF', '0.05'))
+
+# Order/invoice numbering: 'locked' (gapless, one row lock per number), 'block'
+# (per-worker blocks of DOCUMENT_NUMBERING_BLOCK_SIZE numbers) or 'sequence'
+# (PostgreSQL sequence per tenant). See app/point_of_sale/numbering.py.
+DOCUMENT_NUMBERING_MODE = os.getenv('DOCUMENT_NUMBERING_MODE', 'locked')
+DOCUMENT_NUMBERING_BLOCK_SIZE = int(os.getenv('DOCUMENT_NUMBERING_BLOCK_SIZE', '20'))
+
+# Offline POS uploads: sales accepted per request and sales committed per transaction.
+CHECKOUT_BATCH_MAX_SALES = int(os.getenv('CHECKOUT_BATCH_MAX_SALES', '500'))
+CHECKOUT_BATCH_CHUNK_SIZE = int(os.getenv('CHECKOUT_BATCH_CHUNK_SIZE', '25'))
+
+# Per-process barcode/SKU scan cache: entries kept per tenant and their lifetime in seconds.
+SCAN_CACHE_SIZE = int(os.getenv('SCAN_CACHE_SIZE', '2048'))
+SCAN_CACHE_TTL = int(os.getenv('SCAN_CACHE_TTL', '60'))
+
+# Product sales summaries are refreshed once per commit: 'inline' in the request
+# or 'background' on a worker thread. See app/point_of_sale/summary_queue.py.
+PRODUCT_SALES_SUMMARY_FLUSH = os.getenv('PRODUCT_SALES_SUMMARY_FLUSH', 'inline')
+# 'recompute' re-aggregates touched summaries; 'delta' adds each item change in place
+# (run `manage.py reconcile_sales_summaries` periodically to repair drift).
+PRODUCT_SALES_SUMMARY_MODE = os.getenv('PRODUCT_SALES_SUMMARY_MODE', 'recompute')
+# Coarser summary rows kept next to the daily ones ('monthly', 'yearly'); long report
+# ranges read them instead of every day.
+PRODUCT_SALES_SUMMARY_ROLLUPS = [
+    period.strip() for period in os.getenv('PRODUCT_SALES_SUMMARY_ROLLUPS', 'monthly').split(',') if period.strip()
+]
+
+# Rows per bulk upsert chunk of an inventory spreadsheet import. See app/inventory/importer.py.
+INVENTORY_IMPORT_CHUNK_SIZE = int(os.getenv('INVENTORY_IMPORT_CHUNK_SIZE', '1000'))
+# Import jobs run on a 'background' worker thread after the upload request commits, or
+# 'inline' in the request. See app/inventory/import_jobs.py.
+INVENTORY_IMPORT_RUNNER = os.getenv('INVENTORY_IMPORT_RUNNER', 'background')
+# Rows fetched per server-side cursor round trip by the streaming inventory export.
+# See app/inventory/export.py.
+INVENTORY_EXPORT_CHUNK_SIZE = int(os.getenv('INVENTORY_EXPORT_CHUNK_SIZE', '2000'))
+
+# Seconds a worker process keeps a tenant's company profile (type, name); saving the
+# Company drops it immediately in the saving process. See app/core/tenant_context.py.
+TENANT_CONTEXT_CACHE_TTL = int(os.getenv('TENANT_CONTEXT_CACHE_TTL', '300'))
+
 # STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"